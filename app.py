@@ -5,15 +5,18 @@ from pyrogram import idle, Client
 from web import serve
 from utils import cache_manager
 from state import work_loads, multi_clients
-from config import API_ID, API_HASH, BOT_TOKEN
+from config import API_ID, API_HASH, BOT_TOKEN, WEB_WORKERS
 from importlib import import_module
 import signal
 from utils.telegram_logger import send_info, send_error
 from utils.db_utils.mongo_client import close_connections
+from utils.db_utils.executor import shutdown_executor, run_db
+from utils.db_utils.registry import ensure_indexes
 
 
 async def shutdowndb():
     
+    shutdown_executor()
     close_connections()
 
 basicConfig(
@@ -26,6 +29,7 @@ basicConfig(
 loop = get_event_loop()
 LOGGER = getLogger(__name__)
 LOGGER.setLevel(INFO)
+web_cluster = None
 
 # Credits:
 # This code is adapted from Surf-TG by weebzone (GitHub Username)
@@ -115,8 +119,22 @@ async def init():
     await bot.start()
     LOGGER.info(f"Bot Started Successfully!")
 
+    LOGGER.info("Ensuring database indexes...")
+    await run_db(ensure_indexes)
+
+
+    if WEB_WORKERS > 1:
+        # Streaming clients are logged in by the web workers instead
+        multi_clients[0] = bot
+        work_loads[0] = 0
+    else:
+        await initialize_clients()
+
+        from utils.session_warmer import start_session_warmer
+
+        LOGGER.info("Pre-warming media sessions...")
+        create_task(start_session_warmer())
 
-    await initialize_clients()
     LOGGER.info("Starting cache manager...")
     
     cache_task = create_task(cache_manager.start_cache_updater())
@@ -131,7 +149,15 @@ async def init():
     
     LOGGER.info("Initializing Web Server...")
 
-    loop.create_task(serve())
+    if WEB_WORKERS > 1:
+        global web_cluster
+        from web.cluster import WebCluster
+
+        web_cluster = WebCluster(WEB_WORKERS)
+        web_cluster.start()
+        loop.create_task(web_cluster.supervise())
+    else:
+        loop.create_task(serve())
     LOGGER.info("Backend Started Successfully!")
     await send_info(bot, "🚀 Bot Started Successfully!")
     await idle()
@@ -146,6 +172,8 @@ async def handle_cache_crash(task):
 async def stop_clients():
     LOGGER.info("Stopping all clients ...")
     await send_info(bot, "Stopping all clients ...")
+    if web_cluster is not None:
+        await web_cluster.stop()
     await shutdowndb()
     await bot.stop()
     for client_id, client in multi_clients.items():
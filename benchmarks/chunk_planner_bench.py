@@ -0,0 +1,151 @@
+"""
+Benchmark the fixed and adaptive chunk planners against a fake GetFile server.
+
+Runs ByteStreamer.yield_file end to end for typical player access patterns and
+reports GetFile request count, bytes fetched from "Telegram" and throughput.
+The fake server enforces the upload.GetFile offset/limit rules and simulates a
+round trip plus a per-request transfer time.
+
+Usage:
+    python benchmarks/chunk_planner_bench.py [--rtt 0.25] [--bandwidth-mb 8] [--file-size-mb 512]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py reads these at import time; the benchmark never talks to Telegram
+for key, value in {
+    "API_ID": "0", "API_HASH": "bench", "BOT_TOKEN": "bench", "OWNER_ID": "0",
+    "AUTH_CHAT": "0", "LOGS_CHAT": "0", "POST_CHAT": "0", "CHUNK_CACHE_SIZE_MB": "0",
+}.items():
+    os.environ.setdefault(key, value)
+
+from pyrogram import raw  # noqa: E402
+from state import work_loads  # noqa: E402
+from utils.custom_dl import ByteStreamer, inflight_chunks  # noqa: E402
+from utils.chunk_planner import choose_chunk_size  # noqa: E402
+from utils.ranges import plan_parts  # noqa: E402
+
+MIB = 1024 * 1024
+
+
+class FakeGetFileServer:
+    """Stands in for a media Session, serving deterministic bytes for GetFile."""
+
+    def __init__(self, file_size: int, rtt: float, bandwidth: float):
+        self.file_size = file_size
+        self.rtt = rtt
+        self.bandwidth = bandwidth
+        self.requests = 0
+        self.bytes_sent = 0
+
+    async def send(self, request):
+        offset, limit = request.offset, request.limit
+        if limit % 4096 or MIB % limit or offset % 4096:
+            raise ValueError(f"LIMIT_INVALID/OFFSET_INVALID: offset={offset} limit={limit}")
+        if offset // MIB != (offset + limit - 1) // MIB:
+            raise ValueError(f"Part crosses a 1 MiB boundary: offset={offset} limit={limit}")
+
+        size = max(0, min(limit, self.file_size - offset))
+        await asyncio.sleep(self.rtt + size / self.bandwidth)
+        self.requests += 1
+        self.bytes_sent += size
+        return raw.types.upload.File(
+            type=raw.types.storage.FileUnknown(), mtime=0, bytes=bytes(size)
+        )
+
+
+class BenchStreamer(ByteStreamer):
+    def __init__(self, server: FakeGetFileServer):
+        super().__init__(client=SimpleNamespace(media_sessions={}))
+        self.server = server
+
+    async def generate_media_session(self, client, dc_id):
+        return self.server
+
+    @staticmethod
+    async def get_location(file_id):
+        return None
+
+
+def fixed_chunk_size(file_size: int, *_):
+    """The original media_streamer formula."""
+    return min(MIB, max(1024, file_size // 10))
+
+
+def access_patterns(file_size: int, seed: int = 7):
+    rng = random.Random(seed)
+    seeks = []
+    for _ in range(4):
+        start = rng.randrange(0, file_size - 4 * MIB)
+        seeks.append((start, start + 4 * MIB - 1))
+    return {
+        "probe bytes=0-1": [(0, 1)],
+        "header 64 KiB": [(0, 64 * 1024 - 1)],
+        "moov tail 256 KiB": [(file_size - 256 * 1024, file_size - 1)],
+        "4 seeks x 4 MiB": seeks,
+        "sequential 32 MiB": [(0, 32 * MIB - 1)],
+    }
+
+
+async def run_ranges(ranges, file_size, planner, rtt, bandwidth):
+    server = FakeGetFileServer(file_size, rtt, bandwidth)
+    streamer = BenchStreamer(server)
+    file_id = SimpleNamespace(media_id=random.getrandbits(48), dc_id=4, file_size=file_size)
+    served = 0
+    chunk_sizes = set()
+    started = time.monotonic()
+    for from_bytes, until_bytes in ranges:
+        chunk_size = planner(file_size, from_bytes, until_bytes, rtt, bandwidth)
+        chunk_sizes.add(chunk_size)
+        offset, first_cut, last_cut, part_count = plan_parts(from_bytes, until_bytes, chunk_size)
+        async for chunk in streamer.yield_file(file_id, 0, offset, first_cut, last_cut, part_count, chunk_size):
+            served += len(chunk)
+        assert served > 0
+    elapsed = time.monotonic() - started
+    expected = sum(until - start + 1 for start, until in ranges)
+    assert served == expected, f"served {served} bytes, expected {expected}"
+    return {
+        "chunk": "/".join(f"{size // 1024}K" for size in sorted(chunk_sizes)),
+        "requests": server.requests,
+        "fetched_mb": server.bytes_sent / MIB,
+        "seconds": elapsed,
+        "mbps": served / MIB / elapsed if elapsed else 0.0,
+    }
+
+
+async def main(args):
+    work_loads[0] = 0
+    file_size = args.file_size_mb * MIB
+    rtt = args.rtt
+    bandwidth = args.bandwidth_mb * MIB
+    planners = {
+        "fixed": fixed_chunk_size,
+        "adaptive": lambda size, start, until, r, b: choose_chunk_size(start, until, r, b),
+    }
+
+    print(f"file={args.file_size_mb} MiB rtt={rtt * 1000:.0f} ms bandwidth={args.bandwidth_mb} MiB/s")
+    print(f"{'pattern':<20} {'planner':<9} {'chunk':>10} {'requests':>9} {'fetched MiB':>12} {'seconds':>8} {'MiB/s':>8}")
+    for name, ranges in access_patterns(file_size).items():
+        for planner_name, planner in planners.items():
+            result = await run_ranges(ranges, file_size, planner, rtt, bandwidth)
+            print(
+                f"{name:<20} {planner_name:<9} {result['chunk']:>10} {result['requests']:>9} "
+                f"{result['fetched_mb']:>12.2f} {result['seconds']:>8.2f} {result['mbps']:>8.2f}"
+            )
+    print(f"coalescing: {inflight_chunks.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rtt", type=float, default=0.25, help="GetFile round trip in seconds")
+    parser.add_argument("--bandwidth-mb", type=float, default=8, help="Per-request transfer rate in MiB/s")
+    parser.add_argument("--file-size-mb", type=int, default=512, help="Size of the simulated file")
+    asyncio.run(main(parser.parse_args()))
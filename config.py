@@ -46,8 +46,68 @@ DELETE_AFTER_MINUTES = int(os.environ.get("DELETE_AFTER_MINUTES", 10))
 POST_UPDATES = os.environ.get("POST_UPDATES", "False")
 USE_CAPTION = os.environ.get("USE_CAPTION", "True")
 
+# Streaming configuration
+# Number of GetFile requests kept in flight per stream (read-ahead window)
+STREAM_PREFETCH = int(os.environ.get("STREAM_PREFETCH", 4))
+# Local chunk cache for hot files (set CHUNK_CACHE_SIZE_MB=0 to disable)
+CHUNK_CACHE_DIR = os.environ.get("CHUNK_CACHE_DIR", "chunk_cache")
+CHUNK_CACHE_SIZE_MB = int(os.environ.get("CHUNK_CACHE_SIZE_MB", 1024))
+CHUNK_CACHE_MEMORY_MB = int(os.environ.get("CHUNK_CACHE_MEMORY_MB", 64))
+# Seconds a streaming client is skipped after timeouts or errors
+SCHEDULER_COOLDOWN = int(os.environ.get("SCHEDULER_COOLDOWN", 30))
+# Messages whose DC is remembered for routing their next stream
+SCHEDULER_DC_HINTS = int(os.environ.get("SCHEDULER_DC_HINTS", 10000))
+# Seconds between health checks of the pre-warmed media sessions
+SESSION_HEALTH_INTERVAL = int(os.environ.get("SESSION_HEALTH_INTERVAL", 300))
+# Resolved FileIds kept in memory, shared by all streaming clients
+FILE_CACHE_SIZE = int(os.environ.get("FILE_CACHE_SIZE", 10000))
+# Seconds a FileId is served as fresh, then served stale while it is refreshed
+FILE_CACHE_TTL = int(os.environ.get("FILE_CACHE_TTL", 1800))
+FILE_CACHE_STALE_TTL = int(os.environ.get("FILE_CACHE_STALE_TTL", 1800))
+# Stream admission: concurrent streams per process, per user and per stream token (0 = unlimited)
+STREAM_MAX_ACTIVE = int(os.environ.get("STREAM_MAX_ACTIVE", 0))
+STREAM_USER_LIMIT = int(os.environ.get("STREAM_USER_LIMIT", 0))
+STREAM_TOKEN_LIMIT = int(os.environ.get("STREAM_TOKEN_LIMIT", 4))
+# Bandwidth caps in KiB/s shared by all streams of a user or token (0 = unlimited)
+STREAM_USER_BANDWIDTH_KB = int(os.environ.get("STREAM_USER_BANDWIDTH_KB", 0))
+STREAM_TOKEN_BANDWIDTH_KB = int(os.environ.get("STREAM_TOKEN_BANDWIDTH_KB", 0))
+# Proxies in front of the app that append to X-Forwarded-For (e.g. 1 on Heroku); 0 ignores the
+# header. Only used to group streams whose token has no user claim, which otherwise count per token
+STREAM_TRUSTED_PROXIES = int(os.environ.get("STREAM_TRUSTED_PROXIES", 0))
+# Seconds a stream may wait for a free slot before it is rejected with 429
+STREAM_QUEUE_TIMEOUT = int(os.environ.get("STREAM_QUEUE_TIMEOUT", 10))
+
+# Database configuration
+# Pooled Mongo connections, also the size of the thread pool running queries
+MONGO_POOL_SIZE = int(os.environ.get("MONGO_POOL_SIZE", 32))
+
+# Catalog caches (hero slider, latest, trending)
+# Seconds between full rebuilds; CACHE_RESYNC_INTERVAL applies while change streams keep them fresh
+CACHE_REFRESH_INTERVAL = int(os.environ.get("CACHE_REFRESH_INTERVAL", 180))
+CACHE_RESYNC_INTERVAL = int(os.environ.get("CACHE_RESYNC_INTERVAL", 1800))
+# Follow Mongo change streams (replica sets only) so every process sees catalog and trending edits
+CACHE_CHANGE_STREAMS = os.environ.get("CACHE_CHANGE_STREAMS", "True").lower() == "true"
+# Catalog changes are applied after this many quiet seconds, at most CACHE_EVENT_MAX_DELAY after the first
+CACHE_EVENT_DEBOUNCE = float(os.environ.get("CACHE_EVENT_DEBOUNCE", 2))
+CACHE_EVENT_MAX_DELAY = float(os.environ.get("CACHE_EVENT_MAX_DELAY", 10))
+
+# HTTP responses
+# JSON bodies smaller than this many bytes are sent uncompressed
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 6))
+# Used when the optional brotli package is installed
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", 5))
+
+# Cache-Control of the public catalog routes, by group (empty to send none)
+CACHE_CONTROL_HOME = os.environ.get("CACHE_CONTROL_HOME", "public, max-age=60, stale-while-revalidate=300")
+CACHE_CONTROL_DETAILS = os.environ.get("CACHE_CONTROL_DETAILS", "public, max-age=300, stale-while-revalidate=3600")
+CACHE_CONTROL_LISTS = os.environ.get("CACHE_CONTROL_LISTS", "public, max-age=60, stale-while-revalidate=300")
+CACHE_CONTROL_SEARCH = os.environ.get("CACHE_CONTROL_SEARCH", "public, max-age=30")
+
 # Port configuration
 PORT = int(os.environ.get("PORT", 8080))
+# Number of web worker processes; above 1 the API and streaming run outside the bot process
+WEB_WORKERS = int(os.environ.get("WEB_WORKERS", 1))
 
 # Internal Configuration (Do not change unless you know what you're doing)
 SUDO_USERS = [int(x) for x in OWNER_ID.split()]
@@ -28,7 +28,7 @@ async def batch_process(client: Client, message: Message):
         global worker_task
         if worker_task is None or worker_task.done():
             LOGGER.info("Starting video processing worker for batch operation")
-            worker_task = create_task(process_video_queue(False))
+            worker_task = create_task(process_video_queue())
 
         start_link = message.command[1]
         end_link = message.command[2]
@@ -2,8 +2,9 @@ from pyrogram import Client
 from pyrogram import filters
 from pyrogram.types import Message
 import re
-from utils.db_utils.movie_db import MovieDatabase
-from utils.db_utils.show_db import ShowDatabase
+from utils.db_utils.registry import get_movie_db, get_show_db
+from utils.db_utils.executor import run_db
+from utils.cache_events import catalog_events
 from config import SUDO_USERS
 from utils.telegram_logger import send_info, send_error, send_warning
 
@@ -32,15 +33,14 @@ async def del_command(client: Client, message: Message):
     
     try:
         if content_type == "movie":
-            db = MovieDatabase()
-            result = db.delete_movie(content_id)
+            result = await run_db(lambda: get_movie_db().delete_movie(content_id))
             
         else:  
-            db = ShowDatabase()
-            result = db.delete_show(content_id)
+            result = await run_db(lambda: get_show_db().delete_show(content_id))
             
         
         if result["status"] == "success":
+            catalog_events.publish(content_type, content_id, structural=True)
             await message.reply(f"Successfully deleted {content_type} with ID {content_id}.")
             await send_info(client, f"✅ Successfully deleted {content_type} with ID {content_id}")
         elif result["status"] == "not_found":
@@ -2,6 +2,7 @@ from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from utils.user.registeruser import UserRegistrationHandler
 from utils.telegram_logger import send_info, send_error
+from utils.db_utils.executor import run_db
 from app import LOGGER
 import config
 
@@ -53,7 +54,7 @@ async def register_command(client: Client, message: Message):
             await message.reply_text("❌ Unable to get user information.")
             return
 
-        result = registration_handler.register_user_from_telegram(user)
+        result = await run_db(registration_handler.register_user_from_telegram, user)
 
         if result["status"] == "success":
             response_text = (
@@ -116,7 +117,7 @@ async def profile_command(client: Client, message: Message):
             await message.reply_text("❌ Unable to get user information.")
             return
 
-        result = registration_handler.get_user_info(user.id)
+        result = await run_db(registration_handler.get_user_info, user.id)
 
         if result["status"] == "found":
             user_data = result["user"]
@@ -1,7 +1,7 @@
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
-from utils.db_utils.movie_db import MovieDatabase
-from utils.db_utils.show_db import ShowDatabase
+from utils.db_utils.registry import get_movie_db, get_show_db
+from utils.db_utils.executor import run_db
 import asyncio
 import logging
 import config
@@ -50,9 +50,8 @@ async def forward_(client: Client, message: Message):
         episode = details[4]
 
         if media_type == "m":  
-            movie_db = MovieDatabase()
             try:
-                movie = movie_db.find_movie_by_id(int(id))
+                movie = await run_db(lambda: get_movie_db().find_movie_by_id(int(id)))
                 if not movie:
                     await processing_msg.edit_text("Sorry, movie not found.")
                     return
@@ -88,9 +87,8 @@ async def forward_(client: Client, message: Message):
                 return
                 
         elif media_type == "s":  
-            show_db = ShowDatabase()
             try:
-                show = show_db.find_show_by_id(int(id))
+                show = await run_db(lambda: get_show_db().find_show_by_id(int(id)))
                 if not show:
                     await processing_msg.edit_text("Sorry, show not found.")
                     return
@@ -3,25 +3,25 @@ from pyrogram import filters
 from pyrogram.types import Message
 from pyrogram.errors import FloodWait
 from utils.get_details import get_content_details
-from utils.db_utils.show_db import ShowDatabase
-from utils.db_utils.movie_db import MovieDatabase
+from utils.db_utils.registry import get_movie_db, get_show_db
 from utils.utils import remove_redandent
 from asyncio import sleep, create_task, Queue, Task
 from app import LOGGER
 import config
 from utils.auto_poster import auto_poster
-from utils.cache_manager import update_all_caches
+from utils.cache_events import catalog_events
+from utils.db_utils.executor import run_db
 from utils.telegram_logger import send_info, send_error, send_warning
 
 message_queue = Queue()
 
 worker_task: Task = None
 
-movie_db = MovieDatabase()
-show_db = ShowDatabase()
+movie_db = get_movie_db()
+show_db = get_show_db()
 
 
-async def process_video(client: Client, message: Message, update_cache: bool):
+async def process_video(client: Client, message: Message):
     """Process a single video message."""
     try:
         file = message.video or message.document or message.animation
@@ -55,15 +55,17 @@ async def process_video(client: Client, message: Message, update_cache: bool):
             LOGGER.info(f"Processing movie: {title}")
 
             try:
-                upload_result = movie_db.upsert_movie(media_details)
+                upload_result = await run_db(movie_db.upsert_movie, media_details)
 
                 await send_info(
                     client,
                     f"✅ Movie **{media_details.get('title', 'Unknown')}** {upload_result['status']} successfully",
                 )
-                if update_cache:
-                    LOGGER.info("Triggering cache update after movie addition")
-                    create_task(update_all_caches())
+                if upload_result["status"] != "error":
+                    # Caches are patched once a burst of ingests settles
+                    catalog_events.publish(
+                        "movie", media_details.get("mid"), structural=upload_result["status"] == "inserted"
+                    )
             except Exception as e:
                 LOGGER.error(f"Error uploading movie data: {str(e)}")
                 await send_error(client, f"Error uploading movie data for '{title}'", e)
@@ -72,14 +74,16 @@ async def process_video(client: Client, message: Message, update_cache: bool):
         elif media_type == "show":
             LOGGER.info(f"Processing show: {title}")
             try:
-                upload_result = show_db.upsert_show(media_details)
+                upload_result = await run_db(show_db.upsert_show, media_details)
                 await send_info(
                     client,
                     f"✅ Show **{media_details.get('title', 'Unknown')}** {upload_result['status']} successfully",
                 )
-                if update_cache:
-                    LOGGER.info("Triggering cache update after show addition")
-                    create_task(update_all_caches())
+                if upload_result["status"] != "error":
+                    # Caches are patched once a burst of ingests settles
+                    catalog_events.publish(
+                        "show", media_details.get("sid"), structural=upload_result["status"] == "inserted"
+                    )
             except Exception as e:
                 LOGGER.error(f"Error uploading show data: {str(e)}")
                 await send_error(client, f"Error uploading show data for '{title}'", e)
@@ -114,7 +118,7 @@ async def process_video(client: Client, message: Message, update_cache: bool):
         await message.reply_text(f"An unexpected error occurred: {str(e)}")
 
 
-async def process_video_queue(update_cache: bool):
+async def process_video_queue():
     """Worker that processes videos from the queue one by one."""
     while True:
         try:
@@ -123,7 +127,7 @@ async def process_video_queue(update_cache: bool):
 
             try:
                 LOGGER.info(f"Processing queued video: {message.id}")
-                await process_video(client, message, update_cache)
+                await process_video(client, message)
 
                 await sleep(1)
             except Exception as e:
@@ -143,7 +147,7 @@ async def get_video(client: Client, message: Message):
     global worker_task
 
     if worker_task is None or worker_task.done():
-        worker_task = create_task(process_video_queue(True))
+        worker_task = create_task(process_video_queue())
         LOGGER.info("Started video processing worker")
 
     if not (message.video or message.document or message.animation):
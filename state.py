@@ -1,2 +1,3 @@
 multi_clients = {}
-work_loads = {}
\ No newline at end of file
+work_loads = {}
+active_streams = {}
@@ -0,0 +1,11 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py reads these at import time; the tests never talk to Telegram or Mongo
+for key, value in {
+    "API_ID": "0", "API_HASH": "test", "BOT_TOKEN": "test", "OWNER_ID": "0",
+    "AUTH_CHAT": "0", "LOGS_CHAT": "0", "POST_CHAT": "0", "CHUNK_CACHE_SIZE_MB": "0",
+}.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,101 @@
+import asyncio
+import utils.cache_manager as cache_manager
+from utils.cache_events import CatalogEvents
+
+
+def run_events(events, script):
+    """Run `events` while `script` publishes, returning the batches applied."""
+    batches = []
+
+    async def apply(changes):
+        batches.append(changes)
+
+    async def scenario():
+        runner = asyncio.create_task(events.run(apply))
+        await script()
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+
+    asyncio.run(scenario())
+    return batches
+
+
+def test_burst_is_applied_once_after_quiet_window():
+    events = CatalogEvents(debounce=0.05, max_delay=1)
+
+    async def script():
+        for media_id in (1, 2, 3):
+            events.publish("movie", media_id)
+            await asyncio.sleep(0.01)
+        events.publish("show", 9, structural=True)
+        await asyncio.sleep(0.2)
+
+    batches = run_events(events, script)
+    assert batches == [{
+        "movie": {"ids": {1, 2, 3}, "structural": False},
+        "show": {"ids": {9}, "structural": True},
+    }]
+
+
+def test_steady_stream_is_flushed_after_max_delay():
+    events = CatalogEvents(debounce=0.05, max_delay=0.1)
+
+    async def script():
+        for media_id in range(12):
+            events.publish("movie", media_id)
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.15)
+
+    batches = run_events(events, script)
+    assert len(batches) >= 2
+    assert set().union(*(batch["movie"]["ids"] for batch in batches)) == set(range(12))
+
+
+def test_config_changes_are_forwarded_as_structural():
+    events = CatalogEvents()
+    published = []
+
+    class Loop:
+        def call_soon_threadsafe(self, func, *args):
+            published.append(args)
+
+    events.loop = Loop()
+    events._forward("trending", None, {"operationType": "update", "fullDocument": {"key": "trending"}})
+    events._forward("movie", "mid", {"operationType": "update", "fullDocument": {"mid": 7}})
+    events._forward("movie", "mid", {"operationType": "delete"})
+    assert published == [("trending", None, True), ("movie", 7, False), ("movie", None, True)]
+
+
+def test_trending_change_reloads_trending(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cache_manager, "update_trending_cache", lambda: calls.append("trending"))
+    monkeypatch.setattr(cache_manager, "update_hero_slider_cache", lambda: calls.append("hero"))
+    monkeypatch.setattr(cache_manager, "refresh_snapshots", lambda: calls.append("snapshots"))
+
+    cache_manager.patch_caches({cache_manager.TRENDING_CHANNEL: {"ids": set(), "structural": True}})
+    assert calls == ["trending", "snapshots"]
+
+
+def test_update_patches_shown_cards_only(monkeypatch):
+    monkeypatch.setattr(cache_manager, "cache", {
+        **cache_manager.cache,
+        "latest_movies": [{"id": 1, "title": "Old", "media_type": "movie"}, {"id": 2, "title": "Two", "media_type": "movie"}],
+        "latest_shows": [],
+        "trending": {"movie": [{"id": 1, "title": "Old"}], "show": []},
+        "trending_ids": {"movie": [1], "show": []},
+        "hero_slider": [],
+        "snapshots": {},
+    })
+    queried = []
+
+    def find_by_ids(media_type, ids, projection):
+        queried.append(sorted(ids))
+        return [{"mid": 1, "title": "New"}]
+
+    monkeypatch.setattr(cache_manager, "find_by_ids", find_by_ids)
+    monkeypatch.setattr(cache_manager, "refresh_snapshots", lambda: None)
+
+    cache_manager.patch_caches({"movie": {"ids": {1, 99}, "structural": False}})
+    assert queried == [[1]]
+    assert [item["title"] for item in cache_manager.cache["latest_movies"]] == ["New", "Two"]
+    assert cache_manager.cache["trending"]["movie"][0]["title"] == "New"
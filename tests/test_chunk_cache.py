@@ -0,0 +1,83 @@
+import asyncio
+from utils.chunk_cache import ChunkCache
+
+KIB = 1024
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_find_part_of_any_chunk_size(tmp_path):
+    cache = ChunkCache(str(tmp_path), 1024 * KIB, 64 * KIB)
+    run(cache.put(7, 0, 4 * KIB, b"h" * 4 * KIB, edge=True))
+    for _ in range(2):
+        run(cache.put(7, 64 * KIB, 64 * KIB, bytes(range(256)) * 256))
+
+    assert run(cache.find_part(7, 0, 1)) == (0, b"h" * 4 * KIB)
+    offset, data = run(cache.find_part(7, 65 * KIB, 65 * KIB + 9))
+    assert offset == 64 * KIB
+    assert data[KIB:KIB + 10] == bytes(range(10))
+    # No single cached part holds the range
+    assert run(cache.find_part(7, 3 * KIB, 5 * KIB)) is None
+    assert run(cache.find_part(8, 0, 1)) is None
+    assert cache.stats()["misses"] == 0
+
+
+def test_find_part_ignores_short_last_part(tmp_path):
+    cache = ChunkCache(str(tmp_path), 1024 * KIB, 64 * KIB)
+    run(cache.put(7, 8 * KIB, 4 * KIB, b"t" * 100, edge=True))
+    assert run(cache.find_part(7, 8 * KIB, 8 * KIB + 99)) == (8 * KIB, b"t" * 100)
+    assert run(cache.find_part(7, 8 * KIB, 8 * KIB + 100)) is None
+
+
+def test_part_is_written_to_disk_on_second_fetch(tmp_path):
+    cache = ChunkCache(str(tmp_path), 1024 * KIB, 0)
+    run(cache.put(7, 4 * KIB, 4 * KIB, b"a" * 4 * KIB))
+    assert run(cache.get(7, 4 * KIB, 4 * KIB)) is None
+    assert not list(tmp_path.glob("*.chunk"))
+
+    run(cache.put(7, 4 * KIB, 4 * KIB, b"a" * 4 * KIB))
+    assert run(cache.get(7, 4 * KIB, 4 * KIB)) == b"a" * 4 * KIB
+    assert cache.stats()["rejected"] == 1
+
+
+def test_edge_parts_are_admitted_at_once(tmp_path):
+    cache = ChunkCache(str(tmp_path), 1024 * KIB, 0)
+    run(cache.put(7, 0, 4 * KIB, b"h" * 4 * KIB, edge=True))
+    assert run(cache.get(7, 0, 4 * KIB)) == b"h" * 4 * KIB
+
+
+def test_playthrough_does_not_evict_hot_parts(tmp_path):
+    cache = ChunkCache(str(tmp_path), 64 * KIB, 0)
+    run(cache.put(7, 0, 16 * KIB, b"h" * 16 * KIB, edge=True))
+    for _ in range(2):
+        run(cache.put(7, 16 * KIB, 16 * KIB, b"s" * 16 * KIB))
+
+    # One viewer streams another file from start to end
+    for offset in range(0, 1024 * KIB, 16 * KIB):
+        run(cache.put(8, offset, 16 * KIB, b"x" * 16 * KIB))
+
+    assert run(cache.get(7, 0, 16 * KIB)) is not None
+    assert run(cache.get(7, 16 * KIB, 16 * KIB)) is not None
+
+
+def test_least_recently_used_part_is_evicted(tmp_path):
+    cache = ChunkCache(str(tmp_path), 32 * KIB, 0)
+    for offset in (0, 16 * KIB):
+        run(cache.put(7, offset, 16 * KIB, b"p" * 16 * KIB, edge=True))
+    # Reading the first part makes the second the least recently used
+    run(cache.get(7, 0, 16 * KIB))
+    run(cache.put(7, 32 * KIB, 16 * KIB, b"p" * 16 * KIB, edge=True))
+
+    assert run(cache.get(7, 0, 16 * KIB)) is not None
+    assert run(cache.get(7, 16 * KIB, 16 * KIB)) is None
+    assert not (tmp_path / f"7_{16 * KIB}_{16 * KIB}.chunk").exists()
+    assert cache.stats()["disk_bytes"] == 32 * KIB
+
+
+def test_index_is_rebuilt_from_disk(tmp_path):
+    cache = ChunkCache(str(tmp_path), 1024 * KIB, 0)
+    run(cache.put(7, 0, 4 * KIB, b"h" * 4 * KIB, edge=True))
+    reopened = ChunkCache(str(tmp_path), 1024 * KIB, 0)
+    assert run(reopened.get(7, 0, 4 * KIB)) == b"h" * 4 * KIB
@@ -0,0 +1,50 @@
+import pytest
+from utils.chunk_planner import (
+    CHUNK_SIZES,
+    MAX_CHUNK_SIZE,
+    MIN_CHUNK_SIZE,
+    choose_chunk_size,
+    count_parts,
+    estimate_range_time,
+)
+
+MIB = 1024 * 1024
+
+
+@pytest.mark.parametrize("from_bytes, until_bytes, chunk_size, expected", [
+    (0, 0, 4096, 1),
+    (0, 4095, 4096, 1),
+    (0, 4096, 4096, 2),
+    (4095, 4096, 4096, 2),
+    (MIB, 3 * MIB - 1, MIB, 2),
+])
+def test_count_parts(from_bytes, until_bytes, chunk_size, expected):
+    assert count_parts(from_bytes, until_bytes, chunk_size) == expected
+
+
+def test_chunk_sizes_are_telegram_legal():
+    assert CHUNK_SIZES[0] == MIN_CHUNK_SIZE
+    assert CHUNK_SIZES[-1] == MAX_CHUNK_SIZE
+    for size in CHUNK_SIZES:
+        assert size & (size - 1) == 0
+        assert MAX_CHUNK_SIZE % size == 0
+
+
+def test_probe_gets_smallest_chunk():
+    assert choose_chunk_size(0, 1) == MIN_CHUNK_SIZE
+
+
+def test_long_span_gets_largest_chunk():
+    assert choose_chunk_size(0, 512 * MIB - 1) == MAX_CHUNK_SIZE
+
+
+def test_high_rtt_prefers_larger_chunks():
+    span = (0, 4 * MIB - 1)
+    assert choose_chunk_size(*span, rtt=2.0) >= choose_chunk_size(*span, rtt=0.01)
+
+
+def test_choice_has_lowest_estimate():
+    from_bytes, until_bytes, rtt, throughput = 300_000, 900_000, 0.1, 4 * MIB
+    chosen = choose_chunk_size(from_bytes, until_bytes, rtt, throughput, window=4)
+    best = min(estimate_range_time(from_bytes, until_bytes, size, rtt, throughput, 4) for size in CHUNK_SIZES)
+    assert estimate_range_time(from_bytes, until_bytes, chosen, rtt, throughput, 4) == best
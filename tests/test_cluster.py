@@ -0,0 +1,55 @@
+import os
+from types import SimpleNamespace
+import config
+import web.cluster as cluster
+from web.cluster import WebCluster, worker_environment, worker_tokens
+
+
+def test_tokens_are_dealt_round_robin(monkeypatch):
+    monkeypatch.setattr(config, "MULTI_TOKENS", {1: "a", 2: "b", 3: "c", 4: None})
+    monkeypatch.setattr(config, "BOT_TOKEN", "main")
+    assert worker_tokens(0, 2) == {1: "a", 3: "c"}
+    assert worker_tokens(1, 2) == {2: "b"}
+    # Left without a token, a worker streams through the main bot
+    assert worker_tokens(3, 4) == {0: "main"}
+
+
+def test_each_worker_gets_its_own_cache_slice(monkeypatch):
+    monkeypatch.setattr(config, "CHUNK_CACHE_DIR", "cache")
+    monkeypatch.setattr(config, "CHUNK_CACHE_SIZE_MB", 1000)
+    assert worker_environment(1, 4) == {
+        "CHUNK_CACHE_DIR": os.path.join("cache", "worker-1"),
+        "CHUNK_CACHE_SIZE_MB": "250",
+        "WEB_WORKER_INDEX": "1",
+    }
+
+
+class FakeProcess:
+    started_with = []
+
+    def __init__(self, target, args, name, daemon):
+        self.name = name
+
+    def start(self):
+        self.started_with.append({name: os.environ.get(name) for name in ("CHUNK_CACHE_DIR", "WEB_WORKER_INDEX")})
+
+
+def test_spawn_starts_worker_with_its_environment(monkeypatch):
+    monkeypatch.setattr(config, "CHUNK_CACHE_DIR", "cache")
+    monkeypatch.setattr(config, "CHUNK_CACHE_SIZE_MB", 1000)
+    monkeypatch.setattr(cluster.multiprocessing, "get_context", lambda method: SimpleNamespace(Process=FakeProcess))
+    monkeypatch.setenv("CHUNK_CACHE_DIR", "cache")
+    monkeypatch.delenv("WEB_WORKER_INDEX", raising=False)
+    FakeProcess.started_with = []
+
+    web_cluster = WebCluster(2, port=8000)
+    web_cluster.spawn(0)
+    web_cluster.spawn(1)
+
+    assert FakeProcess.started_with == [
+        {"CHUNK_CACHE_DIR": os.path.join("cache", "worker-0"), "WEB_WORKER_INDEX": "0"},
+        {"CHUNK_CACHE_DIR": os.path.join("cache", "worker-1"), "WEB_WORKER_INDEX": "1"},
+    ]
+    # The parent's environment is left as it was
+    assert os.environ["CHUNK_CACHE_DIR"] == "cache"
+    assert "WEB_WORKER_INDEX" not in os.environ
@@ -0,0 +1,124 @@
+import asyncio
+import gzip
+import pytest
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from utils.compression import AVAILABLE_ENCODINGS, CompressionMiddleware
+from utils.precompressed import JSONSnapshot, accepted_encodings, choose_encoding, compress_variants
+from config import COMPRESS_MIN_SIZE
+
+LARGE = {"items": ["entry"] * COMPRESS_MIN_SIZE}
+
+
+def call(app, path, headers=None, method="GET"):
+    """Run `app` for one request, returning (status, response headers, body)."""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    messages = []
+
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # The client stays connected until the response is done
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start["status"], Headers(raw=start["headers"]), body
+
+
+def endpoint(response):
+    async def app(scope, receive, send):
+        await response(scope, receive, send)
+    return app
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip;q=0.5, BR, deflate;q=x") == {"gzip": 0.5, "br": 1.0, "deflate": 0.0}
+    assert accepted_encodings(None) == {}
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, br", {"br", "gzip"}) == "br"
+    assert choose_encoding("br;q=0, gzip", {"br", "gzip"}) == "gzip"
+    assert choose_encoding("*", {"gzip"}) == "gzip"
+    assert choose_encoding("identity", {"br", "gzip"}) is None
+    assert choose_encoding(None, {"gzip"}) is None
+
+
+def test_small_bodies_get_no_variants():
+    assert compress_variants(b"x" * (COMPRESS_MIN_SIZE - 1)) == {}
+    assert gzip.decompress(compress_variants(b"x" * COMPRESS_MIN_SIZE)["gzip"]) == b"x" * COMPRESS_MIN_SIZE
+
+
+def test_gzip_compresses_large_json():
+    app = CompressionMiddleware(endpoint(JSONResponse(LARGE, headers={"ETag": '"abc"'})))
+    status, headers, body = call(app, "/api/v1/paginated/movie", {"Accept-Encoding": "gzip"})
+    assert status == 200
+    assert headers["content-encoding"] == "gzip"
+    assert headers["content-length"] == str(len(body))
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["etag"] == 'W/"abc"'
+    assert gzip.decompress(body) == JSONResponse(LARGE).body
+
+
+def test_identity_still_varies():
+    app = CompressionMiddleware(endpoint(JSONResponse(LARGE)))
+    _, headers, body = call(app, "/api/v1/paginated/movie")
+    assert "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert body == JSONResponse(LARGE).body
+
+
+@pytest.mark.parametrize("path, response", [
+    ("/api/v1/search", JSONResponse({"items": []})),
+    ("/api/v1/dl/abc", Response(b"x" * COMPRESS_MIN_SIZE, media_type="text/plain")),
+    ("/poster.jpg", Response(b"x" * COMPRESS_MIN_SIZE, media_type="image/jpeg")),
+    ("/api/v1/heroslider", Response(b"x" * COMPRESS_MIN_SIZE, media_type="application/json", headers={"Content-Encoding": "br"})),
+    ("/api/v1/trending", Response(status_code=304, headers={"ETag": '"abc"'})),
+])
+def test_passes_through(path, response):
+    app = CompressionMiddleware(endpoint(response))
+    status, headers, body = call(app, path, {"Accept-Encoding": "gzip"})
+    assert status == response.status_code
+    assert headers.get("content-encoding") == response.headers.get("content-encoding")
+    assert body == response.body
+
+
+def test_streamed_responses_pass_through():
+    async def chunks():
+        yield b"{" + b" " * COMPRESS_MIN_SIZE
+        yield b"}"
+
+    app = CompressionMiddleware(endpoint(StreamingResponse(chunks(), media_type="application/json")))
+    _, headers, body = call(app, "/api/v1/similar", {"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in headers
+    assert body == b"{" + b" " * COMPRESS_MIN_SIZE + b"}"
+
+
+def test_snapshot_serves_best_variant_and_304():
+    snapshot = JSONSnapshot(LARGE)
+
+    async def app(scope, receive, send):
+        from starlette.requests import Request
+        await snapshot.response(Request(scope))(scope, receive, send)
+
+    _, headers, body = call(app, "/api/v1/heroslider", {"Accept-Encoding": "gzip, br"})
+    assert headers["content-encoding"] == AVAILABLE_ENCODINGS[0]
+    assert headers["etag"] == snapshot.etag
+    assert body == snapshot.variants[AVAILABLE_ENCODINGS[0]]
+
+    status, headers, body = call(app, "/api/v1/heroslider", {"If-None-Match": snapshot.etag})
+    assert status == 304
+    assert body == b""
+    assert headers["vary"] == "Accept-Encoding"
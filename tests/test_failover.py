@@ -0,0 +1,100 @@
+import asyncio
+from collections import defaultdict
+from types import SimpleNamespace
+import pytest
+from pyrogram import raw
+from pyrogram.errors import FloodWait
+from pyrogram.file_id import FileType
+import utils.custom_dl as custom_dl
+import utils.scheduler as scheduler_module
+from utils.custom_dl import MAX_FAILOVERS, ByteStreamer, stream_with_failover
+from utils.ranges import plan_parts
+from utils.scheduler import ClientScheduler
+from utils.singleflight import SingleFlight
+
+FILE_SIZE = 60_000
+DATA = bytes(i % 251 for i in range(FILE_SIZE))
+CHUNK_SIZE = 4096
+
+
+class FlakyMediaSession:
+    """Serves DATA, raising `error` once `fail_after` requests have succeeded."""
+
+    def __init__(self, fail_after=None, error=None):
+        self.fail_after = fail_after
+        self.error = error
+        self.offsets = []
+
+    async def send(self, request):
+        if self.fail_after is not None and len(self.offsets) >= self.fail_after:
+            raise self.error
+        self.offsets.append(request.offset)
+        await asyncio.sleep(0)
+        return raw.types.upload.File(
+            type=raw.types.storage.FileUnknown(), mtime=0,
+            bytes=DATA[request.offset:request.offset + request.limit])
+
+
+def make_file_id():
+    return SimpleNamespace(
+        media_id=1, dc_id=2, file_type=FileType.DOCUMENT, file_size=FILE_SIZE,
+        access_hash=0, file_reference=b"", thumbnail_size="")
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = ClientScheduler(cooldown=30)
+    monkeypatch.setattr(custom_dl, "client_scheduler", scheduler)
+    monkeypatch.setattr(custom_dl, "inflight_chunks", SingleFlight())
+    monkeypatch.setattr(custom_dl, "chunk_cache", None)
+    monkeypatch.setattr(custom_dl, "work_loads", defaultdict(int))
+    # One part in flight keeps the point of failure deterministic
+    monkeypatch.setattr(custom_dl, "STREAM_PREFETCH", 1)
+    return scheduler
+
+
+def run_failover(monkeypatch, sessions, from_bytes, until_bytes):
+    clients = {index: SimpleNamespace(media_sessions={2: session}) for index, session in sessions.items()}
+    monkeypatch.setattr(scheduler_module, "multi_clients", clients)
+    streamers = {}
+    for index, client in clients.items():
+        streamer = ByteStreamer(client)
+
+        async def get_file_properties(chat_id, message_id):
+            return make_file_id()
+
+        streamer.get_file_properties = get_file_properties
+        streamers[index] = streamer
+
+    offset, first_cut, last_cut, part_count = plan_parts(from_bytes, until_bytes, CHUNK_SIZE)
+
+    async def collect():
+        body = stream_with_failover(
+            streamers.__getitem__, -100, 5, 0, make_file_id(),
+            offset, first_cut, last_cut, part_count, CHUNK_SIZE)
+        return b"".join([bytes(part) async for part in body])
+
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("from_bytes, until_bytes", [(0, FILE_SIZE - 1), (1234, 40_000)])
+def test_resumes_on_another_client_byte_exact(monkeypatch, scheduler, from_bytes, until_bytes):
+    failing = FlakyMediaSession(fail_after=3, error=FloodWait(value=60))
+    healthy = FlakyMediaSession()
+    body = run_failover(monkeypatch, {0: failing, 1: healthy}, from_bytes, until_bytes)
+
+    assert body == DATA[from_bytes:until_bytes + 1]
+    # The healthy client picks up exactly at the first part not yet sent
+    first_offset = from_bytes - from_bytes % CHUNK_SIZE
+    assert failing.offsets == [first_offset + i * CHUNK_SIZE for i in range(3)]
+    assert healthy.offsets[0] == first_offset + 3 * CHUNK_SIZE
+    assert scheduler.state(0).in_cooldown(scheduler_module.time.monotonic())
+    assert not scheduler.state(1).in_cooldown(scheduler_module.time.monotonic())
+
+
+def test_gives_up_after_max_failovers(monkeypatch, scheduler):
+    sessions = {index: FlakyMediaSession(fail_after=1, error=FloodWait(value=60)) for index in range(MAX_FAILOVERS + 2)}
+    with pytest.raises(FloodWait):
+        run_failover(monkeypatch, sessions, 0, FILE_SIZE - 1)
+    used = [index for index, session in sessions.items() if session.offsets]
+    assert len(used) == MAX_FAILOVERS + 1
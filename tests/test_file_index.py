@@ -0,0 +1,114 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from pyrogram.file_id import FileId, FileType
+import utils.custom_dl as custom_dl
+from utils.custom_dl import ByteStreamer
+from utils.exceptions import FileNotFound
+from utils.file_index import FileMetaIndex
+from utils.file_properties import decode_file_properties, encode_file_properties
+from utils.ttl_cache import TTLCache
+
+
+def make_file_id(media_id=123):
+    file_id = FileId(file_type=FileType.VIDEO, dc_id=4, media_id=media_id, access_hash=456, file_reference=b"ref")
+    file_id.file_name = "movie.mkv"
+    file_id.file_size = 1_000_000
+    file_id.mime_type = "video/x-matroska"
+    file_id.unique_id = "AgADxyz"
+    return file_id
+
+
+class MemoryFileDatabase:
+    def __init__(self):
+        self.files = {}
+
+    def find_file(self, chat_id, msg_id, bot_id):
+        return self.files.get((chat_id, msg_id, bot_id))
+
+    def upsert_file(self, chat_id, msg_id, bot_id, file_data):
+        self.files[(chat_id, msg_id, bot_id)] = file_data
+        return {"status": "inserted"}
+
+    def delete_file(self, chat_id, msg_id, bot_id=None):
+        self.files.pop((chat_id, msg_id, bot_id), None)
+        return {"status": "success"}
+
+
+@pytest.fixture
+def file_db(monkeypatch):
+    file_db = MemoryFileDatabase()
+    monkeypatch.setattr(custom_dl, "get_file_db", lambda: file_db)
+    monkeypatch.setattr(custom_dl, "file_properties_cache", TTLCache(100, 60, evict_on=(FileNotFound,)))
+    return file_db
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    lookups = []
+
+    async def get_file_ids(client, chat_id, message_id):
+        lookups.append(message_id)
+        return make_file_id() if message_id != 404 else None
+
+    monkeypatch.setattr(custom_dl, "get_file_ids", get_file_ids)
+    return lookups
+
+
+def streamer(bot_id=77):
+    return ByteStreamer(SimpleNamespace(me=SimpleNamespace(id=bot_id), media_sessions={}))
+
+
+def test_file_properties_round_trip():
+    original = make_file_id()
+    decoded = decode_file_properties(encode_file_properties(original))
+    assert (decoded.media_id, decoded.access_hash, decoded.dc_id, decoded.file_reference) == (123, 456, 4, b"ref")
+    assert (decoded.file_name, decoded.file_size, decoded.mime_type, decoded.unique_id) == (
+        "movie.mkv", 1_000_000, "video/x-matroska", "AgADxyz")
+
+
+def test_resolved_file_id_is_stored_and_reused(file_db, lookups, monkeypatch):
+    file_id = asyncio.run(streamer().get_file_properties(-100, 5))
+    assert lookups == [5]
+    assert file_db.find_file(-100, 5, 77)["dc_id"] == 4
+
+    # A fresh process (empty memory cache) loads it from the index instead of get_messages
+    monkeypatch.setattr(custom_dl, "file_properties_cache", TTLCache(100, 60))
+    again = asyncio.run(streamer().get_file_properties(-100, 5))
+    assert lookups == [5]
+    assert again.media_id == file_id.media_id
+
+
+def test_file_ids_are_kept_per_bot(file_db, lookups):
+    asyncio.run(streamer(bot_id=1).get_file_properties(-100, 5))
+    asyncio.run(streamer(bot_id=2).get_file_properties(-100, 5))
+    assert lookups == [5, 5]
+    assert set(file_db.files) == {(-100, 5, 1), (-100, 5, 2)}
+
+
+def test_missing_message_is_not_stored(file_db, lookups):
+    with pytest.raises(FileNotFound):
+        asyncio.run(streamer().get_file_properties(-100, 404))
+    assert file_db.files == {}
+
+
+def test_invalidate_drops_cached_and_stored_file_id(file_db, lookups):
+    byte_streamer = streamer()
+    asyncio.run(byte_streamer.get_file_properties(-100, 5))
+    asyncio.run(byte_streamer.invalidate_file_properties(-100, 5))
+    assert file_db.files == {}
+    asyncio.run(byte_streamer.get_file_properties(-100, 5))
+    assert lookups == [5, 5]
+
+
+def test_meta_index_keeps_response_metadata():
+    index = FileMetaIndex(max_entries=2)
+    meta = index.remember(-100, 5, make_file_id())
+    assert meta == {
+        "file_size": 1_000_000, "mime_type": "video/x-matroska", "file_name": "movie.mkv",
+        "unique_id": "AgADxyz", "media_id": 123, "dc_id": 4,
+    }
+    assert index.get_meta(-100, 5) is meta
+    index.remember(-100, 6, make_file_id(124))
+    index.remember(-100, 7, make_file_id(125))
+    assert index.get_meta(-100, 5) is None
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from utils.http_cache import HTTPCacheMiddleware, document_etag, not_modified, route_policy, version_headers
+from utils.precompressed import etag_matches
+
+
+def call(app, path, headers=None, method="GET"):
+    """Run `app` for one request, returning (status, response headers, body)."""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    messages = []
+
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # The client stays connected until the response is done
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = messages[0]
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    return start["status"], Headers(raw=start["headers"]), body
+
+
+def endpoint(response):
+    async def app(scope, receive, send):
+        await response(scope, receive, send)
+    return app
+
+
+def test_route_policy():
+    assert route_policy("/api/v1/getMovieDetails/12") == "details"
+    assert route_policy("/api/v1/search?q=x") == "search"
+    assert route_policy("/api/v1/dl/abc") is None
+
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', 'W/"b"')
+    assert etag_matches('W/"a"', '"a"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"a"')
+
+
+def test_document_etag_varies_with_version_and_fields():
+    updated_at = datetime(2024, 5, 1, 12, 0, 0)
+    etag = document_etag("movie", 7, updated_at)
+    assert etag.startswith('W/"movie-7-')
+    assert document_etag("movie", 7, updated_at.replace(second=1)) != etag
+    assert document_etag("movie", 7, updated_at, ["title"]) != etag
+    assert version_headers("movie", 7, updated_at)["Last-Modified"] == "Wed, 01 May 2024 12:00:00 GMT"
+
+
+def test_not_modified():
+    last_modified = "Wed, 01 May 2024 12:00:00 GMT"
+    assert not_modified(Headers({"if-none-match": 'W/"a"'}), 'W/"a"')
+    # If-None-Match decides when present
+    assert not not_modified(Headers({"if-none-match": '"b"', "if-modified-since": last_modified}), 'W/"a"', last_modified)
+    assert not_modified(Headers({"if-modified-since": last_modified}), None, last_modified)
+    assert not not_modified(Headers({"if-modified-since": "Tue, 30 Apr 2024 12:00:00 GMT"}), None, last_modified)
+    assert not not_modified(Headers({"if-modified-since": "garbage"}), None, last_modified)
+
+
+def test_adds_cache_control_and_body_etag():
+    app = HTTPCacheMiddleware(endpoint(JSONResponse({"results": [1, 2, 3]})))
+    status, headers, body = call(app, "/api/v1/search")
+    assert status == 200
+    assert "cache-control" in headers
+    assert headers["etag"].startswith('W/"')
+    assert body == b'{"results":[1,2,3]}'
+
+
+def test_matching_etag_gets_empty_304_with_vary():
+    app = HTTPCacheMiddleware(endpoint(JSONResponse({"results": [1, 2, 3]})))
+    _, headers, _ = call(app, "/api/v1/paginated/movie")
+    status, not_modified_headers, body = call(app, "/api/v1/paginated/movie", {"If-None-Match": headers["etag"]})
+    assert status == 304
+    assert body == b""
+    assert not_modified_headers["etag"] == headers["etag"]
+    assert "content-length" not in not_modified_headers
+    assert "content-type" not in not_modified_headers
+    assert not_modified_headers["vary"] == "Accept-Encoding"
+
+
+def test_route_304_keeps_its_validators_and_gets_vary():
+    app = HTTPCacheMiddleware(endpoint(Response(status_code=304, headers={"ETag": 'W/"movie-1-2"'})))
+    status, headers, _ = call(app, "/api/v1/getMovieDetails/1", {"If-None-Match": 'W/"movie-1-2"'})
+    assert status == 304
+    assert headers["etag"] == 'W/"movie-1-2"'
+    assert "Accept-Encoding" in headers["vary"]
+
+
+def test_other_routes_and_errors_pass_through():
+    app = HTTPCacheMiddleware(endpoint(JSONResponse({"ok": True})))
+    _, headers, _ = call(app, "/api/v1/admin/stats")
+    assert "etag" not in headers and "cache-control" not in headers
+
+    app = HTTPCacheMiddleware(endpoint(JSONResponse({"detail": "missing"}, status_code=404)))
+    status, headers, _ = call(app, "/api/v1/getMovieDetails/1")
+    assert status == 404
+    assert "etag" not in headers
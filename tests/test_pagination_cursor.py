@@ -0,0 +1,58 @@
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from utils.api.pagination import SORT_MAPPING, InvalidCursor, decode_cursor, encode_cursor, keyset_filter
+
+
+@pytest.mark.parametrize("sort_by, start_key", [
+    ("new", [ObjectId("65f1c2a9e4b0a1b2c3d4e5f6")]),
+    ("most", [7.5, ObjectId("65f1c2a9e4b0a1b2c3d4e5f6")]),
+    ("date", [datetime(2024, 5, 1), ObjectId("65f1c2a9e4b0a1b2c3d4e5f6")]),
+    ("most", [None, ObjectId("65f1c2a9e4b0a1b2c3d4e5f6")]),
+])
+def test_cursor_round_trip(sort_by, start_key):
+    cursor = encode_cursor(sort_by, start_key)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, sort_by) == start_key
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "e30", "!!!!"])
+def test_malformed_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "new")
+
+
+def test_cursor_of_another_sort_order():
+    cursor = encode_cursor("most", [7.5, ObjectId()])
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "date")
+
+
+def test_cursor_with_wrong_key_length():
+    cursor = encode_cursor("new", [1, ObjectId()])
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "new")
+
+
+def test_every_sort_ends_on_id():
+    for sort_fields in SORT_MAPPING.values():
+        assert sort_fields[-1] == ("_id", -1)
+
+
+def test_keyset_filter_by_id():
+    start_id = ObjectId()
+    assert keyset_filter(SORT_MAPPING["new"], [start_id]) == {"_id": {"$lte": start_id}}
+
+
+def test_keyset_filter_by_value():
+    start_id = ObjectId()
+    assert keyset_filter(SORT_MAPPING["most"], [7.5, start_id]) == {"$or": [
+        {"vote_average": {"$lt": 7.5}},
+        {"vote_average": 7.5, "_id": {"$lte": start_id}},
+        {"vote_average": None},
+    ]}
+
+
+def test_keyset_filter_past_last_value():
+    start_id = ObjectId()
+    assert keyset_filter(SORT_MAPPING["date"], [None, start_id]) == {"release_date": None, "_id": {"$lte": start_id}}
@@ -0,0 +1,100 @@
+import asyncio
+from collections import defaultdict
+from types import SimpleNamespace
+import pytest
+from pyrogram import raw
+from pyrogram.file_id import FileType
+import utils.custom_dl as custom_dl
+from utils.custom_dl import ByteStreamer
+from utils.ranges import plan_parts
+from utils.scheduler import ClientScheduler
+from utils.singleflight import SingleFlight
+
+FILE_SIZE = 100_000
+DATA = bytes(i % 251 for i in range(FILE_SIZE))
+CHUNK_SIZE = 4096
+
+
+class FakeMediaSession:
+    """Serves DATA for GetFile, recording how many requests overlap."""
+
+    def __init__(self, delay: float = 0.005):
+        self.delay = delay
+        self.offsets = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send(self, request):
+        self.offsets.append(request.offset)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return raw.types.upload.File(
+            type=raw.types.storage.FileUnknown(), mtime=0,
+            bytes=DATA[request.offset:request.offset + request.limit])
+
+
+@pytest.fixture
+def file_id():
+    return SimpleNamespace(
+        media_id=1, dc_id=2, file_type=FileType.DOCUMENT, file_size=FILE_SIZE,
+        access_hash=0, file_reference=b"", thumbnail_size="")
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    monkeypatch.setattr(custom_dl, "client_scheduler", ClientScheduler())
+    monkeypatch.setattr(custom_dl, "inflight_chunks", SingleFlight())
+    monkeypatch.setattr(custom_dl, "chunk_cache", None)
+    monkeypatch.setattr(custom_dl, "work_loads", defaultdict(int))
+    monkeypatch.setattr(custom_dl, "STREAM_PREFETCH", 3)
+
+
+def read_range(session, file_id, from_bytes, until_bytes, limit=None):
+    streamer = ByteStreamer(SimpleNamespace(media_sessions={2: session}))
+    offset, first_cut, last_cut, part_count = plan_parts(from_bytes, until_bytes, CHUNK_SIZE)
+
+    async def collect():
+        parts = []
+        body = streamer.yield_file(file_id, 0, offset, first_cut, last_cut, part_count, CHUNK_SIZE)
+        async for part in body:
+            parts.append(bytes(part))
+            if limit is not None and len(parts) == limit:
+                break
+        await body.aclose()
+        return parts
+
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("from_bytes, until_bytes", [
+    (0, FILE_SIZE - 1),
+    (5000, 5001),
+    (1000, 50_000),
+    (CHUNK_SIZE, 3 * CHUNK_SIZE - 1),
+])
+def test_range_is_byte_exact(file_id, from_bytes, until_bytes):
+    parts = read_range(FakeMediaSession(delay=0), file_id, from_bytes, until_bytes)
+    assert b"".join(parts) == DATA[from_bytes:until_bytes + 1]
+
+
+def test_requests_stay_within_prefetch_window(file_id):
+    session = FakeMediaSession()
+    read_range(session, file_id, 0, FILE_SIZE - 1)
+    assert session.max_in_flight == 3
+    assert session.offsets == sorted(session.offsets)
+    assert len(session.offsets) == -(-FILE_SIZE // CHUNK_SIZE)
+
+
+def test_closing_early_stops_fetching(file_id):
+    session = FakeMediaSession()
+    parts = read_range(session, file_id, 0, FILE_SIZE - 1, limit=2)
+    assert len(parts) == 2
+    # Two parts consumed, at most a window of prefetched ones beyond them
+    assert len(session.offsets) <= 2 + 3
+    assert session.in_flight == 0
+    assert custom_dl.work_loads[0] == 0
+    assert custom_dl.client_scheduler.state(0).active_streams == 0
@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from utils.exceptions import RangeNotSatisfiable
+from utils.ranges import MAX_RANGES, PROBE_MAX_BYTES, MultipartByteranges, parse_range_header, plan_parts, probe_range
+
+
+@pytest.mark.parametrize("header", [None, "", "items=0-10", "bytes=", "bytes=abc", "bytes=5-2", "bytes=1-2-3", "bytes=-"])
+def test_ignored_headers(header):
+    assert parse_range_header(header, 1000) is None
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-499", [(0, 499)]),
+    ("bytes=500-", [(500, 999)]),
+    ("bytes=-200", [(800, 999)]),
+    ("bytes=-5000", [(0, 999)]),
+    ("bytes=900-5000", [(900, 999)]),
+    ("BYTES = 0-0", [(0, 0)]),
+])
+def test_single_range(header, expected):
+    assert parse_range_header(header, 1000) == expected
+
+
+def test_multiple_ranges_are_sorted_and_coalesced():
+    assert parse_range_header("bytes=500-600, 0-99, 100-199, 550-700", 1000) == [(0, 199), (500, 700)]
+
+
+def test_unsatisfiable_specs_are_dropped():
+    assert parse_range_header("bytes=2000-, 0-9", 1000) == [(0, 9)]
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-2000", "bytes=-0"])
+def test_not_satisfiable(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header(header, 1000)
+
+
+def test_suffix_of_empty_file_is_not_satisfiable():
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range_header("bytes=-10", 0)
+
+
+def test_too_many_ranges_collapse_to_covering_range():
+    header = "bytes=" + ",".join(f"{i * 10}-{i * 10 + 1}" for i in range(MAX_RANGES + 1))
+    assert parse_range_header(header, 1000) == [(0, MAX_RANGES * 10 + 1)]
+
+
+@pytest.mark.parametrize("from_bytes, until_bytes, chunk_size, expected", [
+    (0, 1023, 1024, (0, 0, 1024, 1)),
+    (100, 199, 1024, (0, 100, 200, 1)),
+    (1000, 1100, 1024, (0, 1000, 77, 2)),
+    (2048, 5000, 1024, (2048, 0, 905, 3)),
+])
+def test_plan_parts(from_bytes, until_bytes, chunk_size, expected):
+    assert plan_parts(from_bytes, until_bytes, chunk_size) == expected
+
+
+def test_multipart_body_matches_content_length():
+    data = bytes(range(256)) * 4
+    multipart = MultipartByteranges([(0, 9), (100, 299)], len(data), "video/mp4")
+
+    async def stream_range(start, end):
+        yield data[start:end + 1]
+
+    async def collect():
+        return b"".join([bytes(chunk) async for chunk in multipart.body(stream_range)])
+
+    body = asyncio.run(collect())
+    assert len(body) == multipart.content_length()
+    assert multipart.media_type == f"multipart/byteranges; boundary={multipart.boundary}"
+    assert multipart.part_header(0, 9) + data[0:10] + b"\r\n" in body
+    assert multipart.part_header(100, 299) + data[100:300] + b"\r\n" in body
+    assert body.endswith(multipart.closing())
+    assert b"Content-Range: bytes 100-299/1024" in body
+
+
+def test_multipart_body_closes_range_stream_when_closed_early():
+    multipart = MultipartByteranges([(0, 9), (20, 29)], 100, "video/mp4")
+    closed = []
+
+    async def stream_range(start, end):
+        try:
+            yield b"x" * (end - start + 1)
+        finally:
+            closed.append((start, end))
+
+    async def read_one_chunk():
+        body = multipart.body(stream_range)
+        await body.__anext__()
+        await body.__anext__()
+        await body.aclose()
+
+    asyncio.run(read_one_chunk())
+    assert closed == [(0, 9)]
+
+
+@pytest.mark.parametrize("ranges, expected", [
+    ([(0, 1)], (0, 1)),
+    ([(1000, 1000 + PROBE_MAX_BYTES - 1)], (1000, 1000 + PROBE_MAX_BYTES - 1)),
+    ([(0, PROBE_MAX_BYTES)], None),
+    ([(0, 1), (10, 11)], None),
+    (None, None),
+])
+def test_probe_range(ranges, expected):
+    assert probe_range(ranges) == expected
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+import pytest
+from pyrogram.errors import FileReferenceExpired, FloodWait
+import utils.scheduler as scheduler_module
+from utils.scheduler import MIN_THROUGHPUT_SAMPLE, ClientScheduler
+
+MIB = 1024 * 1024
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    clients = {index: SimpleNamespace(media_sessions={}) for index in range(3)}
+    monkeypatch.setattr(scheduler_module, "multi_clients", clients)
+    return clients
+
+
+def test_pick_prefers_fastest_idle_client(clients):
+    scheduler = ClientScheduler()
+    scheduler.record_sample(0, MIB, 1.0)
+    scheduler.record_sample(1, MIB, 0.1)
+    scheduler.record_sample(2, MIB, 0.5)
+    assert scheduler.pick(expected_bytes=10 * MIB) == 1
+
+    # Sharing the fastest client with several streams makes another one cheaper
+    for _ in range(5):
+        scheduler.stream_started(1)
+    assert scheduler.pick(expected_bytes=10 * MIB) == 2
+
+
+def test_pick_penalizes_missing_media_session(clients):
+    scheduler = ClientScheduler()
+    clients[2].media_sessions[4] = object()
+    assert scheduler.pick(expected_bytes=MIB, dc_id=4) == 2
+
+
+def test_cooldown_skips_client(clients):
+    scheduler = ClientScheduler(cooldown=30)
+    scheduler.record_sample(0, MIB, 0.01)
+    scheduler.record_error(0, TimeoutError())
+    assert scheduler.state(0).in_cooldown(scheduler_module.time.monotonic())
+    assert scheduler.pick() != 0
+
+
+def test_flood_wait_cools_down_for_its_duration(clients):
+    scheduler = ClientScheduler(cooldown=30)
+    scheduler.record_error(1, FloodWait(value=600))
+    remaining = scheduler.state(1).cooldown_until - scheduler_module.time.monotonic()
+    assert 590 < remaining <= 600
+
+
+def test_expired_file_reference_is_not_the_clients_fault(clients):
+    scheduler = ClientScheduler()
+    scheduler.record_error(0, FileReferenceExpired())
+    assert scheduler.state(0).errors == 1
+    assert scheduler.state(0).cooldown_until == 0
+
+
+def test_everyone_cooling_down_picks_first_to_recover(clients):
+    scheduler = ClientScheduler(cooldown=30)
+    scheduler.record_error(0, FloodWait(value=300))
+    scheduler.record_error(1, FloodWait(value=100))
+    scheduler.record_error(2, FloodWait(value=200))
+    assert scheduler.pick() == 1
+
+
+def test_small_parts_only_update_rtt(clients):
+    scheduler = ClientScheduler()
+    scheduler.record_sample(0, 4096, 0.2)
+    rtt, throughput = scheduler.measurements(0)
+    assert rtt == pytest.approx(0.2)
+    assert throughput is None
+
+    scheduler.record_sample(0, MIN_THROUGHPUT_SAMPLE, 0.5)
+    assert scheduler.measurements(0)[1] == pytest.approx(MIN_THROUGHPUT_SAMPLE / 0.5)
+    assert scheduler.state(0).bytes_served == 4096 + MIN_THROUGHPUT_SAMPLE
+
+
+def test_dc_hints_are_bounded(clients):
+    scheduler = ClientScheduler(max_dc_hints=2)
+    scheduler.remember_dc(1, 1, 4)
+    scheduler.remember_dc(1, 2, 5)
+    assert scheduler.dc_hint(1, 1) == 4
+    scheduler.remember_dc(1, 3, 1)
+    # (1, 2) was used least recently
+    assert scheduler.dc_hint(1, 2) is None
+    assert scheduler.dc_hint(1, 1) == 4
+    assert scheduler.dc_hint(1, 3) == 1
@@ -0,0 +1,76 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+import utils.session_warmer as session_warmer
+
+
+class FakeSession:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+        self.pings = 0
+        self.stopped = False
+
+    async def send(self, request):
+        self.pings += 1
+        if not self.healthy:
+            raise TimeoutError
+        return request
+
+    async def stop(self):
+        self.stopped = True
+
+
+class FakeStreamer:
+    def __init__(self, client, fail_dcs=()):
+        self.client = client
+        self.fail_dcs = fail_dcs
+        self.created = []
+
+    async def get_media_session(self, dc_id):
+        if dc_id in self.fail_dcs:
+            raise ConnectionError(f"DC {dc_id} unreachable")
+        self.created.append(dc_id)
+        session = self.client.media_sessions.get(dc_id)
+        if session is None:
+            session = self.client.media_sessions[dc_id] = FakeSession()
+        return session
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    async def home_dc():
+        return 2
+
+    clients = {
+        index: SimpleNamespace(media_sessions={}, storage=SimpleNamespace(dc_id=home_dc))
+        for index in range(2)
+    }
+    streamers = {0: FakeStreamer(clients[0]), 1: FakeStreamer(clients[1], fail_dcs=(5,))}
+    monkeypatch.setattr(session_warmer, "multi_clients", clients)
+    monkeypatch.setattr(session_warmer, "get_streamer", streamers.__getitem__)
+    return clients, streamers
+
+
+def test_catalog_dcs_include_home_dcs(monkeypatch, clients):
+    monkeypatch.setattr(session_warmer, "get_file_db", lambda: SimpleNamespace(distinct_dc_ids=lambda: [4, 1]))
+    assert asyncio.run(session_warmer.catalog_dc_ids()) == [1, 2, 4]
+
+
+def test_warm_up_survives_unreachable_dc(clients):
+    client_list, _ = clients
+    asyncio.run(session_warmer.warm_media_sessions([2, 5]))
+    assert sorted(client_list[0].media_sessions) == [2, 5]
+    assert sorted(client_list[1].media_sessions) == [2]
+
+
+def test_unhealthy_session_is_replaced(clients):
+    client_list, _ = clients
+    healthy, broken = FakeSession(), FakeSession(healthy=False)
+    client_list[0].media_sessions.update({2: healthy, 4: broken})
+
+    asyncio.run(session_warmer.check_media_sessions())
+
+    assert healthy.pings == 1 and not healthy.stopped
+    assert broken.stopped
+    assert client_list[0].media_sessions[2] is healthy
+    assert client_list[0].media_sessions[4] is not broken
@@ -0,0 +1,129 @@
+import asyncio
+from types import SimpleNamespace
+from pyrogram.errors import FloodWait
+from pyrogram.file_id import FileType
+import utils.custom_dl as custom_dl
+from utils.custom_dl import ByteStreamer, StreamStats
+from utils.scheduler import ClientScheduler
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_task():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return b"part"
+
+        results = await asyncio.gather(*(flight.do("k", work) for _ in range(3)))
+        assert results == [b"part"] * 3
+        assert len(calls) == 1
+        assert flight.stats() == {"in_flight": 0, "calls": 3, "shared": 2, "abandoned": 0}
+
+    asyncio.run(scenario())
+
+
+def test_waiters_share_the_exception():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise TimeoutError
+
+        results = await asyncio.gather(flight.do("k", work), flight.do("k", work), return_exceptions=True)
+        assert all(isinstance(result, TimeoutError) for result in results)
+
+    asyncio.run(scenario())
+
+
+def test_task_survives_while_a_waiter_remains():
+    async def scenario():
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(0.05)
+            return b"part"
+
+        leaving = asyncio.create_task(flight.do("k", work))
+        staying = asyncio.create_task(flight.do("k", work))
+        await started.wait()
+        leaving.cancel()
+        assert await staying == b"part"
+        assert flight.stats()["abandoned"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_task_is_cancelled_when_the_last_waiter_leaves():
+    async def scenario():
+        flight = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiters = [asyncio.create_task(flight.do("k", work)) for _ in range(2)]
+        await started.wait()
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert flight.stats()["in_flight"] == 0
+        assert flight.stats()["abandoned"] == 1
+
+        # A later caller starts a fresh task instead of joining the cancelled one
+        async def again():
+            return b"fresh"
+
+        assert await flight.do("k", again) == b"fresh"
+
+    asyncio.run(scenario())
+
+
+class FloodingSession:
+    def __init__(self):
+        self.requests = 0
+
+    async def send(self, request):
+        self.requests += 1
+        await asyncio.sleep(0.01)
+        raise FloodWait(value=60)
+
+
+def test_joined_error_is_charged_to_the_issuing_client_only(monkeypatch):
+    scheduler = ClientScheduler(cooldown=30)
+    monkeypatch.setattr(custom_dl, "client_scheduler", scheduler)
+    monkeypatch.setattr(custom_dl, "inflight_chunks", SingleFlight())
+    monkeypatch.setattr(custom_dl, "chunk_cache", None)
+    file_id = SimpleNamespace(
+        media_id=1, dc_id=2, file_type=FileType.DOCUMENT,
+        access_hash=0, file_reference=b"", thumbnail_size="")
+    session = FloodingSession()
+
+    def streamer():
+        return ByteStreamer(SimpleNamespace(media_sessions={2: session}))
+
+    async def scenario():
+        leader = streamer().fetch_chunk(file_id, 0, 4096, StreamStats(0, 2, 1, 1))
+        joiner = streamer().fetch_chunk(file_id, 0, 4096, StreamStats(1, 2, 1, 1))
+        return await asyncio.gather(leader, joiner, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, FloodWait) for result in results)
+    assert session.requests == 1
+    assert scheduler.state(0).errors == 1
+    assert scheduler.state(0).cooldown_until > 0
+    assert scheduler.state(1).errors == 0
+    assert scheduler.state(1).cooldown_until == 0
@@ -0,0 +1,143 @@
+import asyncio
+import pytest
+import utils.stream_limiter as limiter_module
+from utils.exceptions import StreamLimitExceeded
+from utils.stream_limiter import LimitedStream, StreamLimiter, TokenBucket, forwarded_client, stream_identity
+
+
+@pytest.mark.parametrize("forwarded_for, trusted_proxies, expected", [
+    ("203.0.113.7", 0, None),
+    (None, 1, None),
+    ("203.0.113.7", 1, "203.0.113.7"),
+    ("198.51.100.1, 203.0.113.7", 1, "203.0.113.7"),
+    ("198.51.100.1, 203.0.113.7, 10.0.0.2", 2, "203.0.113.7"),
+    ("203.0.113.7", 2, None),
+])
+def test_forwarded_client(forwarded_for, trusted_proxies, expected):
+    assert forwarded_client(forwarded_for, trusted_proxies) == expected
+
+
+def test_identity_from_user_claim():
+    user, token = stream_identity("abc", {"userId": 42}, "203.0.113.7")
+    assert user == "user:42"
+    assert len(token) == 16
+
+
+def test_identity_ignores_untrusted_forwarded_for():
+    user, token = stream_identity("abc", {}, "203.0.113.7")
+    assert user == f"token:{token}"
+    assert stream_identity("other", {}, "203.0.113.7")[0] != user
+
+
+def test_identity_from_trusted_forwarded_for(monkeypatch):
+    monkeypatch.setattr(limiter_module, "forwarded_client", lambda forwarded_for: forwarded_client(forwarded_for, 1))
+    assert stream_identity("abc", {}, "198.51.100.1, 203.0.113.7")[0] == "ip:203.0.113.7"
+
+
+def test_token_bucket_sleeps_off_debt(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(limiter_module.asyncio, "sleep", fake_sleep)
+
+    async def consume():
+        bucket = TokenBucket(rate=1000)
+        await bucket.consume(1000)
+        await bucket.consume(500)
+
+    asyncio.run(consume())
+    assert len(sleeps) == 1
+    assert sleeps[0] == pytest.approx(0.5, abs=0.01)
+
+
+def test_per_token_cap_and_release():
+    async def scenario():
+        limiter = StreamLimiter(max_active=0, per_user=0, per_token=1, user_rate=0, token_rate=0, queue_timeout=0.05)
+        lease = await limiter.acquire("user:1", "t1")
+        with pytest.raises(StreamLimitExceeded):
+            await limiter.acquire("user:1", "t1")
+        assert limiter.rejected == 1
+        lease.release()
+        lease.release()
+        assert limiter.stats()["active"] == 0
+        (await limiter.acquire("user:1", "t1")).release()
+
+    asyncio.run(scenario())
+
+
+def test_freed_slot_goes_to_user_with_fewest_streams():
+    async def scenario():
+        limiter = StreamLimiter(max_active=2, per_user=0, per_token=0, user_rate=0, token_rate=0, queue_timeout=1)
+        heavy = [await limiter.acquire("user:heavy", "h1"), await limiter.acquire("user:heavy", "h2")]
+        # The heavy user queues first, the light one after
+        heavy_waiter = asyncio.create_task(limiter.acquire("user:heavy", "h3"))
+        await asyncio.sleep(0)
+        light_waiter = asyncio.create_task(limiter.acquire("user:light", "l1"))
+        await asyncio.sleep(0)
+
+        heavy[0].release()
+        light = await asyncio.wait_for(light_waiter, 1)
+        assert light.user == "user:light"
+        assert not heavy_waiter.done()
+
+        light.release()
+        (await asyncio.wait_for(heavy_waiter, 1)).release()
+        heavy[1].release()
+        stats = limiter.stats()
+        assert (stats["active"], stats["waiting"], stats["users"]) == (0, 0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        limiter = StreamLimiter(max_active=1, per_user=0, per_token=0, user_rate=0, token_rate=0, queue_timeout=1)
+        lease = await limiter.acquire("user:1", "t1")
+        waiter = asyncio.create_task(limiter.acquire("user:2", "t2"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.stats()["waiting"] == 0
+        lease.release()
+        assert limiter.stats()["active"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_limited_stream_releases_lease():
+    async def body():
+        yield b"a"
+        yield b"b"
+
+    async def scenario():
+        limiter = StreamLimiter(max_active=0, per_user=0, per_token=0, user_rate=0, token_rate=0)
+
+        exhausted = LimitedStream(body(), await limiter.acquire("user:1", "t1"))
+        assert [chunk async for chunk in exhausted] == [b"a", b"b"]
+        assert exhausted.lease.released
+
+        never_iterated = LimitedStream(body(), await limiter.acquire("user:1", "t1"))
+        await never_iterated.aclose()
+        assert never_iterated.lease.released
+        assert limiter.stats()["active"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_rejected_waiters_leave_no_counters():
+    async def scenario():
+        limiter = StreamLimiter(max_active=0, per_user=2, per_token=1, user_rate=0, token_rate=0, queue_timeout=0.01)
+        lease = await limiter.acquire("user:1", "t1")
+        # Users under their cap sharing a token that is not
+        for index in range(5):
+            with pytest.raises(StreamLimitExceeded):
+                await limiter.acquire(f"user:waiter{index}", "t1")
+        assert limiter.stats()["users"] == 1
+        assert set(limiter.token_active) == {"t1"}
+        lease.release()
+        assert limiter.user_active == {} and limiter.token_active == {}
+
+    asyncio.run(scenario())
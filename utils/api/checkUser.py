@@ -1,4 +1,4 @@
-from utils.db_utils.user_db import UserDatabase
+from utils.db_utils.registry import get_user_db
 from typing import Dict, Any
 from datetime import datetime
 
@@ -14,7 +14,7 @@ def check_user(user_id: int) -> Dict[str, Any]:
         Dict containing user details or error message
     """
     try:
-        user_db = UserDatabase()
+        user_db = get_user_db()
         user = user_db.find_user_by_id(user_id)
 
         if user:
@@ -1,37 +1,45 @@
-from typing import Dict, Any
-from utils.db_utils.movie_db import MovieDatabase
+from typing import Dict, Any, List, Optional
+from utils.db_utils.registry import get_movie_db
 
-def get_movie_details(mid: int) -> Dict[str, Any]:
+MOVIE_DETAIL_FIELDS = [
+    "title", "release_date", "overview", "poster_path", 
+    "backdrop_path", "popularity", "vote_average", 
+    "genres", "logo", "quality", "cast", "runtime", "directors", "links", "studios", "trailer"
+]
+
+def get_movie_details(mid: int, fields: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     Retrieve movie details by movie ID (mid).
     
+    Only the requested fields are fetched from Mongo.
+
     Args:
         mid: The movie ID to look up
+        fields: Optional subset of MOVIE_DETAIL_FIELDS to return (default: all of them)
         
     Returns:
-        Dictionary containing the requested movie fields or an error message
+        Dictionary containing the requested movie fields (plus its updated_at
+        datetime when known) or an error message
     """
     try:
+        fields = fields or MOVIE_DETAIL_FIELDS
+        db = get_movie_db()
         
-        db = MovieDatabase()
-        
+        projection = {field: 1 for field in fields}
+        projection["_id"] = 0
+        projection["updated_at"] = 1
+        movie = db.find_movie_by_id(mid, projection)
         
-        movie = db.find_movie_by_id(mid)
-        
-        if not movie:
+        if movie is None:
             return {
                 "status": "error",
                 "message": f"Movie with ID {mid} not found"
             }
         
         
-        result = {
-            field: movie.get(field) for field in [
-                "title", "release_date", "overview", "poster_path", 
-                "backdrop_path", "popularity", "vote_average", 
-                "genres", "logo", "quality", "cast", "runtime", "directors", "links", "studios", "trailer"
-            ] if field in movie
-        }
+        result = {field: movie.get(field) for field in fields if field in movie}
+        if movie.get("updated_at"):
+            result["updated_at"] = movie["updated_at"]
         result["id"] = mid
         
 
@@ -42,4 +50,4 @@ def get_movie_details(mid: int) -> Dict[str, Any]:
         return {
             "status": "error",
             "message": str(e)
-        }
\ No newline at end of file
+        }
@@ -1,38 +1,63 @@
-from typing import Dict, Any
-from utils.db_utils.show_db import ShowDatabase
+from typing import Dict, Any, List, Optional
+from utils.db_utils.registry import get_show_db
 
-def get_show_details(sid: int) -> Dict[str, Any]:
+SHOW_DETAIL_FIELDS = [
+    "title", "original_title", "release_date", "overview", 
+    "poster_path", "backdrop_path", "popularity", "vote_average", 
+    "vote_count", "genres", "logo", "cast", "creators", "links", 
+    "studios", "season", "total_episodes", "total_seasons", "status", "trailer"
+]
+
+# Computed fields that can be requested with fields= but are not stored as such
+SHOW_COMPUTED_FIELDS = {
+    # Season numbers and episode counts without the episodes themselves
+    "seasons": {
+        "$map": {
+            "input": {"$ifNull": ["$season", []]},
+            "as": "s",
+            "in": {
+                "season_number": "$$s.season_number",
+                "episode_count": {"$size": {"$ifNull": ["$$s.episodes", []]}},
+            },
+        }
+    },
+}
+
+def get_show_details(sid: int, fields: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     Retrieve show details by show ID (sid).
     
+    Only the requested fields are fetched from Mongo. Request "seasons"
+    instead of "season" to get a season overview without every episode,
+    then load episodes per season with get_season_episodes.
+
     Args:
         sid: The show ID to look up
+        fields: Optional subset of SHOW_DETAIL_FIELDS and SHOW_COMPUTED_FIELDS (default: SHOW_DETAIL_FIELDS)
         
     Returns:
-        Dictionary containing the requested show fields or an error message
+        Dictionary containing the requested show fields (plus its updated_at
+        datetime when known) or an error message
     """
     try:
+        fields = fields or SHOW_DETAIL_FIELDS
+        db = get_show_db()
         
-        db = ShowDatabase()
-        
+        projection = {field: SHOW_COMPUTED_FIELDS.get(field, 1) for field in fields}
+        projection["_id"] = 0
+        projection["updated_at"] = 1
+        show = db.find_show_by_id(sid, projection)
         
-        show = db.find_show_by_id(sid)
-        
-        if not show:
+        if show is None:
             return {
                 "status": "error",
                 "message": f"Show with ID {sid} not found"
             }
         
         
-        result = {
-            field: show.get(field) for field in [
-                "title", "original_title", "release_date", "overview", 
-                "poster_path", "backdrop_path", "popularity", "vote_average", 
-                "vote_count", "genres", "logo", "cast", "creators", "links", 
-                "studios", "season", "total_episodes", "total_seasons", "status", "trailer"
-            ] if field in show
-        }
+        result = {field: show.get(field) for field in fields if field in show}
+        if show.get("updated_at"):
+            result["updated_at"] = show["updated_at"]
         result["id"] = sid
         
         
@@ -42,4 +67,22 @@ def get_show_details(sid: int) -> Dict[str, Any]:
         return {
             "status": "error",
             "message": str(e)
-        }
\ No newline at end of file
+        }
+
+
+def get_season_episodes(sid: int, season_number: int) -> Optional[Dict[str, Any]]:
+    """
+    Retrieve one season of a show with its episodes.
+
+    Args:
+        sid: The show ID to look up
+        season_number: Season to return
+
+    Returns:
+        Season dictionary with its episodes, or None if the show or season does not exist
+    """
+    season = get_show_db().find_show_season(sid, season_number)
+    if season is None:
+        return None
+    season["id"] = sid
+    return season
@@ -1,6 +1,5 @@
 from typing import List, Dict, Any
-from utils.db_utils.movie_db import MovieDatabase
-from utils.db_utils.show_db import ShowDatabase
+from utils.db_utils.registry import get_movie_db, get_show_db
 
 def get_similar_by_genre(media_type: str, genres: List[str], limit: int = 20) -> List[Dict[str, Any]]:
     """
@@ -15,11 +14,11 @@ def get_similar_by_genre(media_type: str, genres: List[str], limit: int = 20) ->
         List of media items matching at least one of the requested genres
     """
     if media_type == "movie":
-        db = MovieDatabase()
+        db = get_movie_db()
         collection = db.movies_collection
         id_field = "mid"
     else:
-        db = ShowDatabase()
+        db = get_show_db()
         collection = db.shows_collection
         id_field = "sid"
     
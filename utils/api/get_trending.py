@@ -1,4 +1,4 @@
-from utils.cache_manager import get_trending
+from utils.cache_manager import get_trending, TRENDING_PROJECTION
 from typing import Dict, List, Any, Optional
 
 def get_trending_entries(payload: Optional[Dict[str, List[int]]] = None) -> Dict[str, List[Dict[str, Any]]]:
@@ -20,40 +20,35 @@ def get_trending_entries(payload: Optional[Dict[str, List[int]]] = None) -> Dict
     else:
         
         
-        from utils.db_utils.movie_db import MovieDatabase
-        from utils.db_utils.show_db import ShowDatabase
+        from utils.db_utils.registry import get_movie_db, get_show_db
         
         
         movie_ids = payload.get("movie", [])
-        movie_db = MovieDatabase()
+        movie_db = get_movie_db()
         movies = []
-        for mid in movie_ids:
-            movie = movie_db.find_movie_by_id(mid)
-            if movie:
-                processed_movie = {
-                    "mid": movie.get("mid"),
-                    "title": movie.get("title"),
-                    "poster_path": movie.get("poster_path"),
-                    "vote_average": movie.get("vote_average"),
-                    "release_date": movie.get("release_date"),
-                }
-                movies.append(processed_movie)
+        for movie in movie_db.find_movies_by_ids(movie_ids, TRENDING_PROJECTION):
+            processed_movie = {
+                "mid": movie.get("mid"),
+                "title": movie.get("title"),
+                "poster_path": movie.get("poster_path"),
+                "vote_average": movie.get("vote_average"),
+                "release_date": movie.get("release_date"),
+            }
+            movies.append(processed_movie)
         
         
         show_ids = payload.get("show", [])
-        show_db = ShowDatabase()
+        show_db = get_show_db()
         shows = []
-        for sid in show_ids:
-            show = show_db.find_show_by_id(sid)
-            if show:
-                processed_show = {
-                    "sid": show.get("sid"),
-                    "title": show.get("title"),
-                    "poster_path": show.get("poster_path"),
-                    "vote_average": show.get("vote_average"),
-                    "release_date": show.get("release_date"),
-                }
-                shows.append(processed_show)
+        for show in show_db.find_shows_by_ids(show_ids, TRENDING_PROJECTION):
+            processed_show = {
+                "sid": show.get("sid"),
+                "title": show.get("title"),
+                "poster_path": show.get("poster_path"),
+                "vote_average": show.get("vote_average"),
+                "release_date": show.get("release_date"),
+            }
+            shows.append(processed_show)
         
         return {
             "movie": movies,
@@ -1,7 +1,10 @@
-from utils.db_utils.movie_db import MovieDatabase
-from utils.db_utils.show_db import ShowDatabase
+from utils.db_utils.registry import get_movie_db, get_show_db
 from fastapi import HTTPException
 from typing import Dict, Any, Optional
+from utils.db_utils.executor import run_db
+
+# Only the file references of each quality are needed to locate a stream
+MOVIE_FILE_PROJECTION = {"_id": 0, "quality.file_hash": 1, "quality.msg_id": 1, "quality.chat_id": 1}
 
 async def get_video_details(
     content_id: str,
@@ -43,8 +46,7 @@ async def get_video_details(
 
 async def _get_movie_file_details(movie_id: str, quality_index: int) -> Dict[str, Any]:
     """Get file details for a movie."""
-    db = MovieDatabase()
-    movie = db.find_movie_by_id(int(movie_id))
+    movie = await run_db(lambda: get_movie_db().find_movie_by_id(int(movie_id), MOVIE_FILE_PROJECTION))
     
     if not movie:
         raise HTTPException(status_code=404, detail=f"Movie with ID {movie_id} not found")
@@ -81,8 +83,8 @@ async def _get_show_file_details(
     episode_number: int
 ) -> Dict[str, Any]:
     """Get file details for a TV show episode."""
-    db = ShowDatabase()
-    show = db.find_show_by_id(int(show_id))
+    show = await run_db(
+        lambda: get_show_db().find_episode_files(int(show_id), season_number, episode_number))
     
     if not show:
         raise HTTPException(status_code=404, detail=f"Show with ID {show_id} not found")
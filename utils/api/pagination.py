@@ -1,67 +1,127 @@
-from typing import Dict, Any, List
-from utils.db_utils.movie_db import MovieDatabase
-from utils.db_utils.show_db import ShowDatabase
+from typing import Dict, Any, List, Optional
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from bson import json_util
+from utils.db_utils.registry import get_movie_db, get_show_db
+from utils.cache_manager import get_catalog_count
 import math
 
-def get_paginated_entries(media_type: str, page: int = 1, items_per_page: int = 20, sort_by: str = "new_release") -> Dict[str, Any]:
+# Every sort ends on _id so entries with equal values keep a stable order
+SORT_MAPPING = {
+    "new": [("_id", -1)],
+    "most": [("vote_average", -1), ("_id", -1)],
+    "date": [("release_date", -1), ("_id", -1)],
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_by: str, start_key: List[Any]) -> str:
+    """Opaque cursor pointing at the entry with sort values `start_key`."""
+    payload = json_util.dumps({"s": sort_by, "k": start_key})
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json_util.loads(urlsafe_b64decode(padded.encode()).decode())
+        start_key = payload["k"]
+    except Exception:
+        raise InvalidCursor("Invalid pagination cursor")
+    if payload.get("s") != sort_by or len(start_key) != len(SORT_MAPPING[sort_by]):
+        raise InvalidCursor("Cursor does not belong to this sort order")
+    return start_key
+
+
+def keyset_filter(sort_fields: List[tuple], start_key: List[Any]) -> Dict[str, Any]:
+    """
+    Filter selecting the documents from `start_key` onwards in a descending
+    (value, _id) order. Documents without the sort value sort last in
+    descending order, so they are still reachable after the last real value.
+    """
+    start_id = start_key[-1]
+    if len(sort_fields) == 1:
+        return {"_id": {"$lte": start_id}}
+
+    field, value = sort_fields[0][0], start_key[0]
+    if value is None:
+        return {field: None, "_id": {"$lte": start_id}}
+    return {"$or": [
+        {field: {"$lt": value}},
+        {field: value, "_id": {"$lte": start_id}},
+        {field: None},
+    ]}
+
+
+def get_paginated_entries(media_type: str, page: int = 1, items_per_page: int = 20, sort_by: str = "new_release", cursor: Optional[str] = None) -> Dict[str, Any]:
     """
     Get paginated movie or show entries with sorting options.
-    
+
+    Pages are addressed either by number or, for deep browsing, by the
+    opaque `next_cursor` returned with every page. Cursor pages seek
+    straight to the position through the sort index instead of skipping
+    over all earlier entries. Totals are cached estimates.
+
     Args:
         media_type: "movie" or "show"
-        page: Page number to retrieve
+        page: Page number to retrieve (ignored when a cursor is given)
         items_per_page: Items per page
-        sort_by: Sorting method (new_release, most_rated, release_date)
-        
+        sort_by: Sorting method (new, most, date)
+        cursor: Cursor from a previous page's next_cursor; "" starts at the first page
+
     Returns:
         Dict with items and pagination metadata
     """
     if media_type not in ["movie", "show"]:
         return {"status": "error", "message": "Media type must be 'movie' or 'show'"}
-    
+
     try:
-        
-        if media_type == "movie":
-            db = MovieDatabase()
-        else:  
-            db = ShowDatabase()
-        
-        
-        sort_mapping = {
-            "new": [("_id", -1)],  
-            "most": [("vote_average", -1)],  
-            "date": [("release_date", -1)]  
-        }
-        
-        if sort_by not in sort_mapping:
-            sort_by = "new"  
-            
-        sort_fields = sort_mapping[sort_by]
-        
-        
-        skip = (page - 1) * items_per_page
-        
+
         if media_type == "movie":
-            items, total_count = db.find_movies_paginated(skip, items_per_page, sort_fields)
+            db = get_movie_db()
+            find_paginated = db.find_movies_paginated
         else:
-            items, total_count = db.find_shows_paginated(skip, items_per_page, sort_fields)
-        
-        
+            db = get_show_db()
+            find_paginated = db.find_shows_paginated
+
+        if sort_by not in SORT_MAPPING:
+            sort_by = "new"
+
+        sort_fields = SORT_MAPPING[sort_by]
+
+        after = None
+        skip = 0
+        if cursor:
+            after = keyset_filter(sort_fields, decode_cursor(cursor, sort_by))
+        elif cursor is None:
+            skip = (page - 1) * items_per_page
+
+        # One extra entry tells whether another page follows, and its sort
+        # values are where the next page starts
+        items, last_key = find_paginated(skip, items_per_page + 1, sort_fields, after)
+        has_next = len(items) > items_per_page
+        items = items[:items_per_page]
+
+        total_count = get_catalog_count(media_type)
         total_pages = math.ceil(total_count / items_per_page)
-        has_next = page < total_pages
-        has_prev = page > 1
-        
+
+        pagination = {
+            "total_pages": total_pages,
+            "total_items": total_count,
+            "items_per_page": items_per_page,
+            "has_next": has_next,
+            "next_cursor": encode_cursor(sort_by, last_key) if has_next else None,
+        }
+        if cursor is None:
+            pagination["page"] = page
+            pagination["has_prev"] = page > 1
+
         return {
             "items": items,
-            "pagination": {
-                "page": page,
-                "total_pages": total_pages,
-                "total_items": total_count,
-                "items_per_page": items_per_page,
-                "has_next": has_next,
-                "has_prev": has_prev
-            }
+            "pagination": pagination
         }
-        
+
     except Exception as e:
-        return {"status": "error", "message": str(e)}
\ No newline at end of file
+        return {"status": "error", "message": str(e)}
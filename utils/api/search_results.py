@@ -1,8 +1,8 @@
 from typing import Dict, List, Any
 import asyncio
 import functools
-from utils.db_utils.movie_db import MovieDatabase
-from utils.db_utils.show_db import ShowDatabase
+from utils.db_utils.registry import get_movie_db, get_show_db
+from utils.db_utils.executor import run_db
 
 
 def async_lru_cache(maxsize=100):
@@ -88,7 +88,7 @@ async def search_movies(query: str, limit: int = 5) -> List[Dict[str, Any]]:
     """
     Search movies using Atlas Search with fuzzy matching.
     """
-    movie_db = MovieDatabase()
+    movie_db = get_movie_db()
     try:
         
         search_pipeline = [
@@ -123,7 +123,7 @@ async def search_movies(query: str, limit: int = 5) -> List[Dict[str, Any]]:
             {"$limit": limit}
         ]
         
-        results = list(movie_db.movies_collection.aggregate(search_pipeline))
+        results = await run_db(lambda: list(movie_db.movies_collection.aggregate(search_pipeline)))
         
         processed_results = []
         for item in results:
@@ -154,7 +154,7 @@ async def search_shows(query: str, limit: int = 5) -> List[Dict[str, Any]]:
     """
     Search shows using Atlas Search with fuzzy matching.
     """
-    show_db = ShowDatabase()
+    show_db = get_show_db()
     try:
         
         search_pipeline = [
@@ -189,7 +189,7 @@ async def search_shows(query: str, limit: int = 5) -> List[Dict[str, Any]]:
             {"$limit": limit}
         ]
         
-        results = list(show_db.shows_collection.aggregate(search_pipeline))
+        results = await run_db(lambda: list(show_db.shows_collection.aggregate(search_pipeline)))
         
         processed_results = []
         for item in results:
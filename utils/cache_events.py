@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure, PyMongoError
+from config import CACHE_EVENT_DEBOUNCE, CACHE_EVENT_MAX_DELAY
+
+LOGGER = logging.getLogger(__name__)
+
+# Server error raised when change streams are used on a standalone mongod
+CHANGE_STREAMS_UNSUPPORTED = 40573
+
+# Pending changes per media type: {"ids": changed IDs, "structural": documents were added or removed}
+Changes = Dict[str, Dict[str, Any]]
+
+
+class CatalogEvents:
+    """
+    Collects catalog changes and hands them to the caches in debounced batches.
+
+    Changes come from the ingest and delete plugins of this process through
+    publish(), and, when Mongo runs as a replica set, from change streams on
+    the catalog collections and the config collection (published as
+    "trending"), which also reach the other web workers. A burst
+    of changes (e.g. a /batch import) is merged and applied once it has been
+    quiet for CACHE_EVENT_DEBOUNCE seconds, and at the latest
+    CACHE_EVENT_MAX_DELAY seconds after its first change.
+    """
+
+    def __init__(self, debounce: float = CACHE_EVENT_DEBOUNCE, max_delay: float = CACHE_EVENT_MAX_DELAY):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.pending: Changes = {}
+        self.first_event: Optional[float] = None
+        self.last_event: Optional[float] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stopped = threading.Event()
+        self.watchers: Dict[str, threading.Thread] = {}
+        self.watching = set()
+        self.published = 0
+        self.batches = 0
+
+    def publish(self, media_type: str, media_id: Optional[int] = None, structural: bool = False) -> None:
+        """
+        Record a change to a movie or show. Must be called on the event loop.
+
+        Args:
+            media_type: "movie" or "show"
+            media_id: The changed mid/sid, None if unknown
+            structural: Whether a document was inserted or deleted rather than updated
+        """
+        change = self.pending.setdefault(media_type, {"ids": set(), "structural": False})
+        if media_id is not None:
+            change["ids"].add(int(media_id))
+        change["structural"] = change["structural"] or structural
+
+        now = time.monotonic()
+        if self.first_event is None:
+            self.first_event = now
+        self.last_event = now
+        self.published += 1
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def drain(self) -> Changes:
+        changes, self.pending = self.pending, {}
+        self.first_event = self.last_event = None
+        return changes
+
+    async def run(self, apply: Callable[[Changes], Awaitable[None]]) -> None:
+        """Apply pending changes in debounced batches until cancelled."""
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        if self.pending:
+            self.wakeup.set()
+        try:
+            while True:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                while self.pending:
+                    deadline = min(self.last_event + self.debounce, self.first_event + self.max_delay)
+                    delay = deadline - time.monotonic()
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                if not self.pending:
+                    continue
+
+                changes = self.drain()
+                self.batches += 1
+                try:
+                    await apply(changes)
+                except Exception as e:
+                    LOGGER.error(f"Error applying catalog changes: {str(e)}")
+        finally:
+            self.stop()
+
+    def watch(self, collection: Collection, media_type: str, id_field: Optional[str]) -> None:
+        """
+        Follow a collection's change stream on a background thread.
+
+        Without an `id_field` every change is published as structural, for
+        collections whose changes are applied by reloading rather than patching.
+        """
+        if media_type in self.watchers and self.watchers[media_type].is_alive():
+            return
+        self.stopped.clear()
+        thread = threading.Thread(
+            target=self._watch,
+            args=(collection, media_type, id_field),
+            name=f"catalog-watch-{media_type}",
+            daemon=True,
+        )
+        self.watchers[media_type] = thread
+        thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.watching.clear()
+
+    def _watch(self, collection: Collection, media_type: str, id_field: Optional[str]) -> None:
+        # Only the catalog ID of the changed document is sent back, not the document
+        fields = {"operationType": 1, "documentKey": 1}
+        if id_field:
+            fields[f"fullDocument.{id_field}"] = 1
+        pipeline = [{"$project": fields}]
+        resume_token = None
+        while not self.stopped.is_set():
+            try:
+                with collection.watch(
+                    pipeline,
+                    full_document="updateLookup" if id_field else None,
+                    resume_after=resume_token,
+                    max_await_time_ms=1000,
+                ) as stream:
+                    if media_type not in self.watching:
+                        LOGGER.info(f"Following change stream of {collection.full_name}")
+                    self.watching.add(media_type)
+                    while stream.alive and not self.stopped.is_set():
+                        change = stream.try_next()
+                        if change is None:
+                            continue
+                        resume_token = stream.resume_token
+                        self._forward(media_type, id_field, change)
+                        if change["operationType"] == "invalidate":
+                            resume_token = None
+            except OperationFailure as e:
+                self.watching.discard(media_type)
+                if e.code == CHANGE_STREAMS_UNSUPPORTED:
+                    LOGGER.info(
+                        f"Change streams unavailable on {collection.full_name}, caches are refreshed by polling"
+                    )
+                    return
+                LOGGER.warning(f"Change stream on {collection.full_name} failed: {str(e)}")
+                resume_token = None
+                self.stopped.wait(5)
+            except PyMongoError as e:
+                self.watching.discard(media_type)
+                LOGGER.warning(f"Change stream on {collection.full_name} interrupted: {str(e)}")
+                self.stopped.wait(5)
+        self.watching.discard(media_type)
+
+    def _forward(self, media_type: str, id_field: Optional[str], change: Dict[str, Any]) -> None:
+        operation = change["operationType"]
+        media_id = (change.get("fullDocument") or {}).get(id_field) if id_field else None
+        # Inserts, deletes and drops change which documents the lists hold;
+        # an update whose document is already gone is treated the same way
+        structural = operation not in ("update", "replace") or media_id is None
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.publish, media_type, media_id, structural)
+
+
+catalog_events = CatalogEvents()
@@ -1,71 +1,109 @@
 import asyncio
 import time
 import logging
-from .db_utils.movie_db import MovieDatabase
-from .db_utils.show_db import ShowDatabase
-from .db_utils.config_db import ConfigDatabase
-from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from .db_utils.registry import get_movie_db, get_show_db, get_config_db
+from .db_utils.executor import run_db
+from .cache_events import catalog_events
+from .precompressed import JSONSnapshot
+from config import CACHE_REFRESH_INTERVAL, CACHE_RESYNC_INTERVAL, CACHE_CHANGE_STREAMS
 LOGGER = logging.getLogger(__name__)
 
-thread_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache_worker")
-
 
 cache = {
     "hero_slider": [],
     "latest_movies": [],
     "latest_shows": [],
     "trending": {"movie": [], "show": []},
+    "trending_ids": {"movie": [], "show": []},
+    "counts": {"movie": None, "show": None},
+    # Serialized responses keyed by payload, replaced whenever the caches change
+    "snapshots": {},
     "last_updated": 0    
 }
 
+ID_FIELDS = {"movie": "mid", "show": "sid"}
+# Change channel of the config collection, which holds the trending IDs
+TRENDING_CHANNEL = "trending"
+LATEST_KEYS = {"movie": "latest_movies", "show": "latest_shows"}
+
+# Fields shown on each kind of card
+HERO_PROJECTION = {
+    "title": 1, "backdrop_path": 1, "overview": 1, "release_date": 1,
+    "vote_average": 1, "genres": 1, "logo": 1
+}
+LATEST_PROJECTION = {"_id": 0, "title": 1, "release_date": 1, "poster_path": 1, "vote_average": 1, "vote_count": 1}
+TRENDING_PROJECTION = {"_id": 0, "title": 1, "poster_path": 1, "vote_average": 1, "release_date": 1}
+# Everything needed to patch a card of any kind in place
+PATCH_PROJECTION = {**HERO_PROJECTION, **LATEST_PROJECTION, **TRENDING_PROJECTION, "_id": 0}
+
+
+def catalog_db(media_type: str):
+    return get_movie_db() if media_type == "movie" else get_show_db()
+
+def catalog_collection(media_type: str):
+    db = catalog_db(media_type)
+    return db.movies_collection if media_type == "movie" else db.shows_collection
+
+def find_by_ids(media_type: str, ids: List[int], projection: Dict[str, Any]) -> List[Dict[str, Any]]:
+    db = catalog_db(media_type)
+    if media_type == "movie":
+        return db.find_movies_by_ids(ids, projection)
+    return db.find_shows_by_ids(ids, projection)
+
+def release_year(doc: Dict[str, Any]):
+    if "release_date" in doc and doc["release_date"]:
+        try:
+            return int(doc["release_date"].split("-")[0])
+        except (IndexError, ValueError, AttributeError):
+            pass
+    return None
+
+def hero_item(doc: Dict[str, Any], media_type: str) -> Dict[str, Any]:
+    return {
+        "id": doc.get(ID_FIELDS[media_type]),
+        "title": doc.get("title", "Unknown Title") if media_type == "show" else doc.get("title"),
+        "media_type": media_type,
+        "backdrop_path": doc.get("backdrop_path"),
+        "overview": doc.get("overview", ""),
+        "release_date": doc.get("release_date", ""),
+        "vote_average": doc.get("vote_average", 0),
+        "genres": doc.get("genres", []),
+        "logo": doc.get("logo", ""),
+        "type": media_type,
+    }
+
+def latest_item(doc: Dict[str, Any], media_type: str) -> Dict[str, Any]:
+    return {
+        "id": doc.get(ID_FIELDS[media_type]),
+        "title": doc.get("title"),
+        "year": release_year(doc),
+        "poster": doc.get("poster_path"),
+        "vote_average": doc.get("vote_average"),
+        "vote_count": doc.get("vote_count"),
+        "media_type": media_type
+    }
+
+def trending_item(doc: Dict[str, Any], media_type: str) -> Dict[str, Any]:
+    return {
+        "id": doc.get(ID_FIELDS[media_type]),
+        "title": doc.get("title"),
+        "poster": doc.get("poster_path"),
+        "vote_average": doc.get("vote_average"),
+        "year": release_year(doc),
+    }
+
 def update_hero_slider_cache():
     """Update the hero slider cache with the most recent items"""
     try:
-        movie_db = MovieDatabase()
-        show_db = ShowDatabase()
-        
-        
-        recent_movies = list(movie_db.movies_collection.find().sort("_id", -1).limit(3))
-        
-        
-        recent_shows = list(show_db.shows_collection.find().sort("_id", -1).limit(3))
-        
-        
         slider_items = []
-        
-        
-        for movie in recent_movies:
-            item = {
-                "id": movie.get("mid"),
-                "title": movie.get("title"),
-                "media_type": "movie",
-                "backdrop_path": movie.get("backdrop_path"),
-                "overview": movie.get("overview", ""),
-                "release_date": movie.get("release_date", ""),
-                "vote_average": movie.get("vote_average", 0),
-                "genres": movie.get("genres", []),
-                "logo": movie.get("logo", ""),
-                "type": "movie",
-                "_id_hex": str(movie.get("_id"))
-            }
-            slider_items.append(item)
-        
-        
-        for show in recent_shows:
-            item = {
-                "id": show.get("sid"),
-                "title": show.get("title", "Unknown Title"),
-                "media_type": "show",
-                "backdrop_path": show.get("backdrop_path"),
-                "overview": show.get("overview", ""),
-                "release_date": show.get("release_date", ""),
-                "vote_average": show.get("vote_average", 0),
-                "genres": show.get("genres", []),
-                "type": "show",
-                "logo": show.get("logo", ""),
-                "_id_hex": str(show.get("_id"))
-            }
-            slider_items.append(item)
+        for media_type in ("movie", "show"):
+            projection = {**HERO_PROJECTION, ID_FIELDS[media_type]: 1}
+            recent = catalog_collection(media_type).find({}, projection).sort("_id", -1).limit(3)
+            for doc in recent:
+                item = hero_item(doc, media_type)
+                item["_id_hex"] = str(doc.get("_id"))
+                slider_items.append(item)
         
         
         slider_items.sort(key=lambda x: x["_id_hex"], reverse=True)
@@ -81,144 +119,121 @@ def update_hero_slider_cache():
     except Exception as e:
         LOGGER.error(f"Error updating hero slider cache: {str(e)}")
 
+def refresh_latest(media_type: str):
+    """Reload the latest entries of one media type"""
+    projection = {**LATEST_PROJECTION, ID_FIELDS[media_type]: 1}
+    latest = catalog_collection(media_type).find({}, projection).sort("_id", -1).limit(21)
+    cache[LATEST_KEYS[media_type]] = [latest_item(doc, media_type) for doc in latest]
+
 def update_latest_entries_cache():
     """Update latest movies and shows cache"""
     try:
-        movie_db = MovieDatabase()
-        show_db = ShowDatabase()
-        
-        
-        movie_projection = {
-            "_id": 0, "mid": 1, "title": 1, "release_date": 1,
-            "poster_path": 1, "vote_average": 1, "vote_count": 1
-        }
-        latest_movies = list(movie_db.movies_collection.find({}, movie_projection).sort("_id", -1).limit(21))
-        
-        processed_movies = []
-        for movie in latest_movies:
-            year = None
-            if "release_date" in movie and movie["release_date"]:
-                try:
-                    year = int(movie["release_date"].split("-")[0])
-                except (IndexError, ValueError, AttributeError):
-                    pass
-            
-            processed_movie = {
-                "id": movie.get("mid"),
-                "title": movie.get("title"),
-                "year": year,
-                "poster": movie.get("poster_path"),
-                "vote_average": movie.get("vote_average"),
-                "vote_count": movie.get("vote_count"),
-                "media_type": "movie"
-            }
-            processed_movies.append(processed_movie)
-        
-        cache["latest_movies"] = processed_movies
-        
-        
-        show_projection = {
-            "_id": 0, "sid": 1, "title": 1, "release_date": 1,
-            "poster_path": 1, "vote_average": 1, "vote_count": 1
-        }
-        latest_shows = list(show_db.shows_collection.find({}, show_projection).sort("_id", -1).limit(21))
-        
-        processed_shows = []
-        for show in latest_shows:
-            year = None
-            if "release_date" in show and show["release_date"]:
-                try:
-                    year = int(show["release_date"].split("-")[0])
-                except (IndexError, ValueError, AttributeError):
-                    pass
-            
-            processed_show = {
-                "id": show.get("sid"),
-                "title": show.get("title"),
-                "year": year,
-                "poster": show.get("poster_path"),
-                "vote_average": show.get("vote_average"),
-                "vote_count": show.get("vote_count"),
-                "media_type": "show"
-            }
-            processed_shows.append(processed_show)
-        
-        cache["latest_shows"] = processed_shows
-        
-        
-        
-        
-        
+        refresh_latest("movie")
+        refresh_latest("show")
     except Exception as e:
         LOGGER.error(f"Error updating latest entries cache: {str(e)}")
 
+def refresh_trending(media_type: str, ids: List[int]):
+    """Resolve the configured trending IDs of one media type"""
+    cache["trending"] = {
+        **cache["trending"],
+        media_type: [trending_item(doc, media_type) for doc in find_by_ids(media_type, ids, TRENDING_PROJECTION)],
+    }
+    cache["trending_ids"] = {**cache["trending_ids"], media_type: list(ids)}
+
 def update_trending_cache():
     """Update trending movies and shows cache"""
     try:
-        config_db = ConfigDatabase()
-        movie_db = MovieDatabase()
-        show_db = ShowDatabase()
-        
-        
-        trending_config = config_db.get_trending_config()
-        
-        
-        movie_ids = trending_config.get("movie", [])
-        movies = []
-        for mid in movie_ids:
-            movie = movie_db.find_movie_by_id(mid)
-            if movie:
-                year = None
-                if "release_date" in movie and movie["release_date"]:
-                    try:
-                        year = int(movie["release_date"].split("-")[0])
-                    except (IndexError, ValueError, AttributeError):
-                        pass
-                processed_movie = {
-                    "id": movie.get("mid"),
-                    "title": movie.get("title"),
-                    "poster": movie.get("poster_path"),
-                    "vote_average": movie.get("vote_average"),
-                    "year": year,
-                }
-                movies.append(processed_movie)
-        
-        
-        show_ids = trending_config.get("show", [])
-        shows = []
-        for sid in show_ids:
-            
-            show = show_db.find_show_by_id(sid)
-            if show:
-                year = None
-                if "release_date" in show and show["release_date"]:
-                    try:
-                        year = int(show["release_date"].split("-")[0])
-                    except (IndexError, ValueError, AttributeError):
-                        pass
-                processed_show = {
-                    "id": show.get("sid"),
-                    "title": show.get("title"),
-                    "poster": show.get("poster_path"),
-                    "vote_average": show.get("vote_average"),
-                    "year": year,
-                }
-                shows.append(processed_show)
-        
-        
-        cache["trending"] = {
-            "movie": movies,
-            "show": shows
-        }
-        
-        
-        
-        
-        
+        trending_config = get_config_db().get_trending_config()
+        refresh_trending("movie", trending_config.get("movie", []))
+        refresh_trending("show", trending_config.get("show", []))
     except Exception as e:
         LOGGER.error(f"Error updating trending cache: {str(e)}")
 
 
+def update_catalog_counts():
+    """Refresh the estimated movie and show counts used for pagination totals"""
+    try:
+        cache["counts"] = {
+            "movie": get_movie_db().movies_collection.estimated_document_count(),
+            "show": get_show_db().shows_collection.estimated_document_count(),
+        }
+    except Exception as e:
+        LOGGER.error(f"Error updating catalog counts: {str(e)}")
+
+
+def patch_caches(changes: Dict[str, Dict[str, Any]]):
+    """
+    Bring the caches up to date with a batch of catalog changes.
+
+    Lists of a media type that gained or lost documents are reloaded with
+    one query each. Updated documents that appear on a cached card are
+    fetched with one $in query and patched in place; changes to anything
+    not on a card cost nothing.
+
+    A change on the TRENDING_CHANNEL (the trending IDs were edited, possibly
+    by another worker) reloads the trending lists.
+
+    Args:
+        changes: Per media type, {"ids": changed IDs, "structural": documents were inserted or deleted}
+    """
+    if TRENDING_CHANNEL in changes:
+        update_trending_cache()
+
+    structural = [
+        media_type for media_type, change in changes.items()
+        if change["structural"] and media_type in ID_FIELDS
+    ]
+    if structural:
+        update_hero_slider_cache()
+        update_catalog_counts()
+
+    for media_type, change in changes.items():
+        if media_type not in ID_FIELDS:
+            continue
+        trending_ids = cache["trending_ids"][media_type]
+        if change["structural"]:
+            refresh_latest(media_type)
+            if trending_ids:
+                refresh_trending(media_type, trending_ids)
+            continue
+
+        cards = {
+            "latest": cache[LATEST_KEYS[media_type]],
+            "trending": cache["trending"][media_type],
+            "hero": [] if structural else [item for item in cache["hero_slider"] if item["media_type"] == media_type],
+        }
+        shown = {item["id"] for items in cards.values() for item in items}
+        ids = [media_id for media_id in change["ids"] if media_id in shown]
+        if not ids:
+            continue
+
+        projection = {**PATCH_PROJECTION, ID_FIELDS[media_type]: 1}
+        docs = {doc[ID_FIELDS[media_type]]: doc for doc in find_by_ids(media_type, ids, projection)}
+
+        def patched(items, make):
+            # Trending cards carry no media_type, their list is per type already
+            return [
+                make(docs[item["id"]], media_type)
+                if item.get("media_type", media_type) == media_type and item["id"] in docs else item
+                for item in items
+            ]
+
+        cache[LATEST_KEYS[media_type]] = patched(cache[LATEST_KEYS[media_type]], latest_item)
+        cache["trending"] = {**cache["trending"], media_type: patched(cache["trending"][media_type], trending_item)}
+        if not structural:
+            cache["hero_slider"] = patched(cache["hero_slider"], hero_item)
+
+    refresh_snapshots()
+    cache["last_updated"] = time.time()
+
+
+async def apply_catalog_changes(changes: Dict[str, Dict[str, Any]]):
+    """Apply a debounced batch of catalog changes on the database executor"""
+    await run_db(patch_caches, changes)
+    LOGGER.info(f"Catalog caches patched for {', '.join(sorted(changes))}")
+
+
 async def update_all_caches():
     """Update all caches with fresh data from MongoDB"""
     try:
@@ -228,8 +243,10 @@ async def update_all_caches():
         await asyncio.gather(
             run_in_thread(update_hero_slider_cache),
             run_in_thread(update_latest_entries_cache),
-            run_in_thread(update_trending_cache)
+            run_in_thread(update_trending_cache),
+            run_in_thread(update_catalog_counts)
         )
+        await run_in_thread(refresh_snapshots)
         
         
         cache["last_updated"] = time.time()
@@ -239,42 +256,61 @@ async def update_all_caches():
         LOGGER.error(f"Error in cache update: {str(e)}")
 
 async def run_in_thread(func):
-    """Run a function in the thread pool"""
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(thread_pool, func)
+    """Run a function on the database executor"""
+    return await run_db(func)
+
+def change_streams_active() -> bool:
+    """Whether change streams currently report edits of both catalog collections and the trending IDs"""
+    return catalog_events.watching >= {*ID_FIELDS, TRENDING_CHANNEL}
 
 async def start_cache_updater():
-    """Start the background task that updates the cache every 3 minutes"""
+    """
+    Start the background tasks keeping the caches fresh.
+
+    Catalog changes are applied incrementally as they are published (see
+    utils.cache_events); the periodic full rebuild only catches what no
+    event reported, and runs less often while change streams are followed.
+    """
     
     try:
         await update_all_caches()
     except Exception as e:
         LOGGER.error(f"Initial cache update failed: {str(e)}")
     
+    events_task = asyncio.create_task(catalog_events.run(apply_catalog_changes))
+    if CACHE_CHANGE_STREAMS:
+        for media_type in ID_FIELDS:
+            catalog_events.watch(catalog_collection(media_type), media_type, ID_FIELDS[media_type])
+        # Trending edits are saved by whichever worker served the admin request
+        catalog_events.watch(get_config_db().config_collection, TRENDING_CHANNEL, None)
     
-    while True:
-        try:
-            
-            await asyncio.sleep(180)
-            
-            
-            update_task = asyncio.create_task(update_all_caches())
+    try:
+        while True:
             try:
                 
-                await asyncio.wait_for(update_task, timeout=60)
-            except asyncio.TimeoutError:
-                LOGGER.error("Cache update timed out after 60 seconds")
+                interval = CACHE_RESYNC_INTERVAL if change_streams_active() else CACHE_REFRESH_INTERVAL
+                await asyncio.sleep(interval)
                 
                 
+                update_task = asyncio.create_task(update_all_caches())
+                try:
+                    
+                    await asyncio.wait_for(update_task, timeout=60)
+                except asyncio.TimeoutError:
+                    LOGGER.error("Cache update timed out after 60 seconds")
+                    
+                    
+                    
+            except asyncio.CancelledError:
+                
+                LOGGER.info("Cache updater task cancelled")
+                break
+            except Exception as e:
+                LOGGER.error(f"Error in cache updater: {str(e)}")
                 
-        except asyncio.CancelledError:
-            
-            LOGGER.info("Cache updater task cancelled")
-            break
-        except Exception as e:
-            LOGGER.error(f"Error in cache updater: {str(e)}")
-            
-            await asyncio.sleep(10)
+                await asyncio.sleep(10)
+    finally:
+        events_task.cancel()
 
 
 
@@ -291,6 +327,15 @@ def get_latest(media_type: str, limit: int = 21):
     else:
         return {"status": "error", "message": "media_type must be 'movie' or 'show'"}
 
+def get_catalog_count(media_type: str) -> int:
+    """Get the cached estimated number of movies or shows"""
+    count = cache["counts"].get(media_type)
+    if count is None:
+        # Not refreshed yet; estimated counts come from collection metadata and are cheap
+        update_catalog_counts()
+        count = cache["counts"].get(media_type) or 0
+    return count
+
 def get_trending():
     """Get trending entries from cache as a combined list with content type"""
     trending_data = cache["trending"]
@@ -310,3 +355,30 @@ def get_trending():
     
     return combined_list
 
+
+def refresh_snapshots():
+    """Serialize and compress the homepage payloads once per cache change"""
+    cache["snapshots"] = {
+        "hero_slider": JSONSnapshot(get_hero_slider()),
+        "trending": JSONSnapshot(get_trending()),
+        "latest:movie:21": JSONSnapshot(get_latest("movie")),
+        "latest:show:21": JSONSnapshot(get_latest("show")),
+    }
+
+def get_snapshot(key: str, build) -> JSONSnapshot:
+    """Get a serialized payload, building and keeping it until the next cache change"""
+    snapshots = cache["snapshots"]
+    snapshot = snapshots.get(key)
+    if snapshot is None:
+        snapshot = snapshots[key] = JSONSnapshot(build())
+    return snapshot
+
+def hero_slider_snapshot() -> JSONSnapshot:
+    return get_snapshot("hero_slider", get_hero_slider)
+
+def trending_snapshot() -> JSONSnapshot:
+    return get_snapshot("trending", get_trending)
+
+def latest_snapshot(media_type: str, limit: int = 21) -> JSONSnapshot:
+    """Serialized latest entries; media_type must be "movie" or "show" """
+    return get_snapshot(f"latest:{media_type}:{limit}", lambda: get_latest(media_type, limit))
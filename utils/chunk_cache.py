@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Tuple
+from utils.chunk_planner import CHUNK_SIZES
+from config import CHUNK_CACHE_DIR, CHUNK_CACHE_SIZE_MB, CHUNK_CACHE_MEMORY_MB
+
+LOGGER = logging.getLogger(__name__)
+
+io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="chunk_cache")
+
+ChunkKey = Tuple[int, int, int]
+
+# Parts fetched once but not admitted to disk are remembered this many at a
+# time; a part fetched again while remembered is admitted
+ADMISSION_HISTORY = 50000
+
+
+class ChunkCache:
+    """
+    Two-tier cache for raw file parts keyed by (media_id, offset, chunk_size).
+
+    Parts live on disk under `directory` with LRU eviction once `max_bytes` is
+    exceeded. A part is only written to disk the second time it is fetched
+    (the first and last part of each file, which hold the container headers,
+    right away), so a single viewer playing a file through does not push the
+    hot parts out. The first and last parts are also kept in memory so
+    player startup and container probes are served without touching disk.
+    Files are written to a temp name and atomically renamed, so concurrent
+    readers only ever see complete parts.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, memory_max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.memory_max_bytes = memory_max_bytes
+        self._disk: "OrderedDict[ChunkKey, int]" = OrderedDict()
+        self._disk_size = 0
+        self._memory: "OrderedDict[ChunkKey, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self._seen: "OrderedDict[ChunkKey, None]" = OrderedDict()
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self._load_index()
+
+    def _path(self, key: ChunkKey) -> Path:
+        media_id, offset, chunk_size = key
+        return self.directory / f"{media_id}_{offset}_{chunk_size}.chunk"
+
+    def _load_index(self) -> None:
+        """Rebuild the LRU index from files left by a previous run, oldest first."""
+        entries = []
+        for path in self.directory.glob("*.chunk"):
+            try:
+                media_id, offset, chunk_size = (int(x) for x in path.stem.split("_"))
+                stat = path.stat()
+            except (ValueError, OSError):
+                continue
+            entries.append((stat.st_mtime, (media_id, offset, chunk_size), stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_size += size
+        for path in self.directory.glob("*.tmp"):
+            path.unlink(missing_ok=True)
+        self._evict()
+        LOGGER.info(f"Chunk cache loaded {len(self._disk)} parts ({self._disk_size} bytes)")
+
+    async def get(self, media_id: int, offset: int, chunk_size: int) -> Optional[bytes]:
+        key = (media_id, offset, chunk_size)
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return data
+
+        if key not in self._disk:
+            self.misses += 1
+            return None
+
+        self._disk.move_to_end(key)
+        loop = asyncio.get_running_loop()
+        try:
+            data = await loop.run_in_executor(io_pool, self._path(key).read_bytes)
+        except FileNotFoundError:
+            self._forget(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    async def find_part(self, media_id: int, from_bytes: int, until_bytes: int) -> Optional[Tuple[int, bytes]]:
+        """
+        Any cached part, of whichever chunk size, holding the whole inclusive range.
+
+        Returns:
+            (offset of the part, part data) or None
+        """
+        for chunk_size in CHUNK_SIZES:
+            offset = from_bytes - from_bytes % chunk_size
+            if until_bytes >= offset + chunk_size:
+                continue
+            key = (media_id, offset, chunk_size)
+            if key not in self._memory and key not in self._disk:
+                continue
+            data = await self.get(media_id, offset, chunk_size)
+            # The last part of a file is shorter than the chunk size
+            if data is not None and len(data) > until_bytes - offset:
+                return offset, data
+        return None
+
+    async def put(self, media_id: int, offset: int, chunk_size: int, data: bytes, edge: bool = False) -> None:
+        key = (media_id, offset, chunk_size)
+        if edge and self.memory_max_bytes and key not in self._memory:
+            self._memory[key] = data
+            self._memory_size += len(data)
+            while self._memory_size > self.memory_max_bytes and self._memory:
+                _, dropped = self._memory.popitem(last=False)
+                self._memory_size -= len(dropped)
+
+        if key in self._disk or len(data) > self.max_bytes:
+            return
+        if not edge and not self._fetched_before(key):
+            self.rejected += 1
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(io_pool, self._write, key, data)
+        except OSError as e:
+            LOGGER.warning(f"Failed to write chunk {key} to cache: {e}")
+            return
+        if key not in self._disk:
+            self._disk[key] = len(data)
+            self._disk_size += len(data)
+            self._evict()
+
+    def _fetched_before(self, key: ChunkKey) -> bool:
+        """Whether `key` was fetched recently; otherwise remember that it now was."""
+        if key in self._seen:
+            del self._seen[key]
+            return True
+        self._seen[key] = None
+        while len(self._seen) > ADMISSION_HISTORY:
+            self._seen.popitem(last=False)
+        return False
+
+    def _write(self, key: ChunkKey, data: bytes) -> None:
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{id(data)}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _forget(self, key: ChunkKey) -> None:
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_size -= size
+
+    def _evict(self) -> None:
+        while self._disk_size > self.max_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_size -= size
+            # Readers that already opened the file keep their handle after unlink
+            self._path(key).unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        return {
+            "disk_parts": len(self._disk),
+            "disk_bytes": self._disk_size,
+            "memory_parts": len(self._memory),
+            "memory_bytes": self._memory_size,
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "rejected": self.rejected,
+        }
+
+
+chunk_cache: Optional[ChunkCache] = None
+if CHUNK_CACHE_SIZE_MB > 0:
+    chunk_cache = ChunkCache(
+        CHUNK_CACHE_DIR,
+        CHUNK_CACHE_SIZE_MB * 1024 * 1024,
+        CHUNK_CACHE_MEMORY_MB * 1024 * 1024,
+    )
@@ -0,0 +1,57 @@
+from typing import Optional
+from config import STREAM_PREFETCH
+
+# upload.GetFile accepts power-of-two limits from 4 KiB up to 1 MiB when the
+# offset is a multiple of the limit (a part then never crosses a 1 MiB boundary)
+MIN_CHUNK_SIZE = 4 * 1024
+MAX_CHUNK_SIZE = 1024 * 1024
+CHUNK_SIZES = [MIN_CHUNK_SIZE << i for i in range(9)]
+
+# Used until the scheduler has measured the serving client
+DEFAULT_RTT = 0.25
+DEFAULT_THROUGHPUT = 2 * 1024 * 1024
+
+
+def count_parts(from_bytes: int, until_bytes: int, chunk_size: int) -> int:
+    """Number of chunk-aligned parts needed to cover an inclusive byte range."""
+    return until_bytes // chunk_size - from_bytes // chunk_size + 1
+
+
+def estimate_range_time(from_bytes: int, until_bytes: int, chunk_size: int, rtt: float, throughput: float, window: int = STREAM_PREFETCH) -> float:
+    """
+    Rough time to serve a range: one round trip per batch of `window` parts
+    kept in flight, plus the time to transfer every byte actually fetched
+    (including the over-fetch before and after the range).
+    """
+    parts = count_parts(from_bytes, until_bytes, chunk_size)
+    batches = -(-parts // max(1, window))
+    return batches * rtt + parts * chunk_size / throughput
+
+
+def choose_chunk_size(from_bytes: int, until_bytes: int, rtt: Optional[float] = None, throughput: Optional[float] = None, window: int = STREAM_PREFETCH) -> int:
+    """
+    Pick the Telegram-legal chunk size with the lowest estimated serve time.
+
+    Small probes (bytes=0-1, container headers) get small parts so we don't
+    fetch a whole MiB to answer them; long spans and high-RTT clients get
+    large parts so request count, not latency, stays the bottleneck. Ties
+    go to the larger size to keep Telegram API calls down.
+
+    Args:
+        from_bytes: First byte of the range
+        until_bytes: Last byte of the range (inclusive)
+        rtt: Measured GetFile round trip of the serving client, in seconds
+        throughput: Measured throughput of the serving client, in bytes/sec
+        window: Number of parts kept in flight per stream
+
+    Returns:
+        Chunk size in bytes
+    """
+    rtt = rtt or DEFAULT_RTT
+    throughput = throughput or DEFAULT_THROUGHPUT
+    best_size, best_time = MAX_CHUNK_SIZE, None
+    for chunk_size in reversed(CHUNK_SIZES):
+        estimate = estimate_range_time(from_bytes, until_bytes, chunk_size, rtt, throughput, window)
+        if best_time is None or estimate < best_time:
+            best_size, best_time = chunk_size, estimate
+    return best_size
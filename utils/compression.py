@@ -0,0 +1,103 @@
+import asyncio
+import gzip
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.precompressed import brotli, choose_encoding
+from config import COMPRESS_MIN_SIZE, GZIP_LEVEL, BROTLI_QUALITY
+
+# Byte streams and files that are already served compressed (or not worth compressing)
+BYPASS_PREFIXES = ("/api/v1/dl", "/static")
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+# Larger bodies are compressed on a worker thread instead of the event loop
+OFFLOAD_SIZE = 256 * 1024
+
+AVAILABLE_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    gzip/brotli compression of buffered responses such as the JSON API.
+
+    Only complete bodies of at least COMPRESS_MIN_SIZE bytes with a textual
+    content type are compressed. Streamed responses, responses that already
+    carry a Content-Encoding (the pre-compressed homepage snapshots, static
+    files and templates) and everything under BYPASS_PREFIXES, most
+    importantly the /api/v1/dl byte streams, pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "HEAD"
+            or scope["path"].startswith(BYPASS_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        encoding_offer = choose_encoding(Headers(scope=scope).get("accept-encoding"), AVAILABLE_ENCODINGS)
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = Headers(raw=start["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    start["status"] < 200
+                    or start["status"] in (204, 206, 304)
+                    or "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(start)
+                return
+
+            if passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < COMPRESS_MIN_SIZE:
+                # Streamed or small: send as is
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=list(start["headers"]))
+            # Caches must keep compressed and plain copies apart
+            headers.add_vary_header("Accept-Encoding")
+            if encoding_offer is None:
+                await send({**start, "headers": headers.raw})
+                await send(message)
+                return
+
+            if len(body) >= OFFLOAD_SIZE:
+                compressed = await asyncio.to_thread(compress, body, encoding_offer)
+            else:
+                compressed = compress(body, encoding_offer)
+
+            headers["Content-Encoding"] = encoding_offer
+            headers["Content-Length"] = str(len(compressed))
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # The compressed body is a different representation of the same resource
+                headers["ETag"] = "W/" + etag
+            await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
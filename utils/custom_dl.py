@@ -5,135 +5,338 @@
 # Licensed under [License Name] (see LICENSE file in the original repository)
 
 import asyncio
+import bisect
 import logging
+import time
+from collections import deque
+from contextlib import aclosing
 from pyrogram import utils, raw
-from pyrogram.errors import AuthBytesInvalid
+from pyrogram.errors import AuthBytesInvalid, FloodWait, FileReferenceExpired
 from pyrogram.file_id import FileId, FileType, ThumbnailSource
 from pyrogram.session import Session, Auth
-from typing import Dict, Union, AsyncGenerator
+from typing import Callable, Dict, Union, AsyncGenerator, Optional
 from utils.exceptions import FileNotFound
-from utils.file_properties import get_file_ids
-from app import work_loads
+from utils.file_properties import get_file_ids, encode_file_properties, decode_file_properties
+from utils.db_utils.registry import get_file_db
+from utils.db_utils.executor import run_db
+from utils.chunk_cache import chunk_cache
+from utils.singleflight import SingleFlight
+from utils.scheduler import client_scheduler
+from utils.chunk_planner import MIN_CHUNK_SIZE
+from utils.ttl_cache import TTLCache
+from utils import metrics
+from state import work_loads, active_streams, multi_clients
+from config import STREAM_PREFETCH, FILE_CACHE_SIZE, FILE_CACHE_TTL, FILE_CACHE_STALE_TTL
 from pyrogram import Client, utils, raw
 
+inflight_chunks = SingleFlight()
+class_cache = {}
+# FileIds by (bot_id, chat_id, message_id), shared by every ByteStreamer
+file_properties_cache = TTLCache(
+    FILE_CACHE_SIZE, FILE_CACHE_TTL, FILE_CACHE_STALE_TTL, evict_on=(FileNotFound,))
+
+
+# Errors after which the rest of a range is resumed on another client
+RESUMABLE_ERRORS = (TimeoutError, FloodWait, FileReferenceExpired)
+MAX_FAILOVERS = 3
+
+
+class StreamStats:
+    """
+    Per-stream throughput counters, used to tune the prefetch window.
+    Everything recorded here is also fed into the aggregate /metrics counters.
+    """
+
+    def __init__(self, client_index: int, dc_id: int, part_count: int, window: int):
+        self.client_index = client_index
+        self.dc_id = dc_id
+        self.part_count = part_count
+        self.window = window
+        self.started = time.monotonic()
+        self.first_byte_at: Optional[float] = None
+        self.bytes_sent = 0
+        self.parts_sent = 0
+        self.requests = 0
+        self.request_time = 0.0
+        self.rtt_buckets = [0] * (len(metrics.LATENCY_BUCKETS) + 1)
+        self.retries = 0
+        self.labels = {"client": client_index, "dc": dc_id}
+        metrics.streams_started.inc(**self.labels)
+
+    def record_request(self, rtt: float) -> None:
+        self.requests += 1
+        self.request_time += rtt
+        self.rtt_buckets[bisect.bisect_left(metrics.LATENCY_BUCKETS, rtt)] += 1
+        metrics.getfile_rtt.observe(rtt, **self.labels)
+
+    def record_retry(self) -> None:
+        self.retries += 1
+        metrics.getfile_retries.inc(**self.labels)
+
+    def record_part(self, size: int) -> None:
+        if self.first_byte_at is None:
+            self.first_byte_at = time.monotonic()
+            metrics.stream_ttfb.observe(self.first_byte_at - self.started, **self.labels)
+        self.bytes_sent += size
+        self.parts_sent += 1
+        metrics.stream_bytes.inc(size, **self.labels)
+
+    def record_error(self, error: Exception) -> None:
+        metrics.stream_errors.inc(error=type(error).__name__, **self.labels)
+
+    def as_dict(self) -> Dict[str, Union[int, float, None]]:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return {
+            "client_index": self.client_index,
+            "dc_id": self.dc_id,
+            "window": self.window,
+            "parts_sent": self.parts_sent,
+            "part_count": self.part_count,
+            "bytes_sent": self.bytes_sent,
+            "elapsed": round(elapsed, 3),
+            "throughput_bps": round(self.bytes_sent / elapsed, 2),
+            "ttfb": round(self.first_byte_at - self.started, 3) if self.first_byte_at else None,
+            "avg_rtt": round(self.request_time / self.requests, 3) if self.requests else None,
+            "rtt_histogram": dict(zip([str(b) for b in metrics.LATENCY_BUCKETS] + ["+Inf"], self.rtt_buckets)),
+            "retries": self.retries,
+        }
+
 
 class ByteStreamer:
     def __init__(self, client: Client):
-        self.clean_timer = 30 * 60
         self.client: Client = client
-        self.__cached_file_ids: Dict[int, FileId] = {}
-        self.__file_properties_cache: Dict[tuple, FileId] = {}  # Manual cache
-        asyncio.create_task(self.clean_cache())
+        self.__session_locks: Dict[int, asyncio.Lock] = {}
 
     async def get_file_properties(self, chat_id: int, message_id: int) -> FileId:
-        cache_key = (chat_id, message_id)
-        if cache_key in self.__file_properties_cache:
-            return self.__file_properties_cache[cache_key]
+        return await file_properties_cache.get_or_load(
+            self.file_cache_key(chat_id, message_id),
+            lambda: self.resolve_file_properties(chat_id, message_id),
+        )
+
+    def file_cache_key(self, chat_id: int, message_id: int) -> tuple:
+        # FileIds carry a per-bot access hash, so each bot resolves its own
+        return (self.bot_id or id(self.client), int(chat_id), int(message_id))
 
-        if message_id not in self.__cached_file_ids:
+    async def resolve_file_properties(self, chat_id: int, message_id: int) -> FileId:
+        file_id = await self.load_stored_file_id(chat_id, message_id)
+        if file_id is None:
             file_id = await get_file_ids(self.client, int(chat_id), int(message_id))
             if not file_id:
                 logging.info('Message with ID %s not found!', message_id)
                 raise FileNotFound
-            self.__cached_file_ids[message_id] = file_id
-
-        file_id = self.__cached_file_ids[message_id]
-        self.__file_properties_cache[cache_key] = file_id
+            await self.store_file_id(chat_id, message_id, file_id)
         return file_id
 
-    async def yield_file(self, file_id: FileId, index: int, offset: int, first_part_cut: int, last_part_cut: int, part_count: int, chunk_size: int) -> AsyncGenerator[bytes, None]:
-        client = self.client
+    @property
+    def bot_id(self) -> Optional[int]:
+        me = getattr(self.client, "me", None)
+        return me.id if me else None
+
+    async def load_stored_file_id(self, chat_id: int, message_id: int) -> Optional[FileId]:
+        """Look the FileId up in the persistent file index, saving a get_messages call."""
+        if self.bot_id is None:
+            return None
+        try:
+            file_data = await run_db(
+                lambda: get_file_db().find_file(int(chat_id), int(message_id), self.bot_id))
+            return decode_file_properties(file_data) if file_data else None
+        except Exception as e:
+            logging.warning(f"Failed to load stored FileId for message {message_id}: {e}")
+            return None
+
+    async def store_file_id(self, chat_id: int, message_id: int, file_id: FileId) -> None:
+        if self.bot_id is None:
+            return
+        try:
+            file_data = encode_file_properties(file_id)
+            await run_db(
+                lambda: get_file_db().upsert_file(int(chat_id), int(message_id), self.bot_id, file_data))
+        except Exception as e:
+            logging.warning(f"Failed to store FileId for message {message_id}: {e}")
+
+    async def invalidate_file_properties(self, chat_id: int, message_id: int) -> None:
+        """Drop a cached and stored FileId after its file reference expired."""
+        file_properties_cache.pop(self.file_cache_key(chat_id, message_id))
+        if self.bot_id is not None:
+            await run_db(
+                lambda: get_file_db().delete_file(int(chat_id), int(message_id), self.bot_id))
+
+    async def yield_file(self, file_id: FileId, index: int, offset: int, first_part_cut: int, last_part_cut: int, part_count: int, chunk_size: int) -> AsyncGenerator[Union[bytes, memoryview], None]:
+        """
+        Yield the requested parts of a file while keeping up to STREAM_PREFETCH
+        GetFile requests in flight. Parts are yielded in order, and new requests
+        are only issued when the consumer pulls, so a slow client never buffers
+        more than the prefetch window. Edge parts are memoryview slices of the
+        fetched part, so consumers must not rely on getting bytes.
+        """
         work_loads[index] += 1
+        client_scheduler.stream_started(index)
         logging.debug(f"Starting to yield file with client {index}.")
         
         if chunk_size <= 0:
-            chunk_size = 1024
+            chunk_size = MIN_CHUNK_SIZE
             
-        media_session = await self.generate_media_session(client, file_id)
         current_part = 1
-        location = await self.get_location(file_id)
+        window = max(1, STREAM_PREFETCH)
+        stats = StreamStats(index, file_id.dc_id, part_count, window)
+        active_streams[id(stats)] = stats
+        pending = deque()
+        next_offset = offset
+        requested = 0
         try:
             while current_part <= part_count:
-                # Retry logic for handling timeouts
-                max_retries = 3
-                retry_count = 0
-                retry_delay = 1  # Initial delay in seconds
-                
-                while True:
-                    try:
-                        r = await media_session.send(raw.functions.upload.GetFile(
-                            location=location, offset=offset, limit=chunk_size))
-                        break  # Success - exit retry loop
-                    except TimeoutError:
-                        retry_count += 1
-                        if retry_count > max_retries:
-                            logging.error(f"Request timed out after {max_retries} retries at offset {offset}")
-                            raise  # Re-raise if we've exhausted retries
-                        
-                        logging.warning(f"Request timed out, retrying ({retry_count}/{max_retries}) at offset {offset}")
-                        await asyncio.sleep(retry_delay)
-                        retry_delay *= 2  # Exponential backoff
-                
-                if isinstance(r, raw.types.upload.File):
-                    chunk = r.bytes
-                    if not chunk:
-                        break
-                    if part_count == 1:
-                        yield chunk[first_part_cut:last_part_cut]
-                    elif current_part == 1:
-                        yield chunk[first_part_cut:]
-                    elif current_part == part_count:
-                        yield chunk[:last_part_cut]
-                    else:
-                        yield chunk
-
-                    current_part += 1
-                    offset += chunk_size
-                    logging.debug(f"Yielded part {current_part-1}/{part_count}, offset {offset}")
-                else:
-                    logging.error("Unexpected response type from Telegram")
+                while requested < part_count and len(pending) < window:
+                    pending.append(asyncio.create_task(
+                        self.fetch_chunk(file_id, next_offset, chunk_size, stats)))
+                    next_offset += chunk_size
+                    requested += 1
+
+                chunk = await pending.popleft()
+                if not chunk:
                     break
+                # Cut the edge parts through a memoryview instead of copying them
+                if part_count == 1:
+                    chunk = memoryview(chunk)[first_part_cut:last_part_cut]
+                elif current_part == 1:
+                    chunk = memoryview(chunk)[first_part_cut:]
+                elif current_part == part_count:
+                    chunk = memoryview(chunk)[:last_part_cut]
+
+                stats.record_part(len(chunk))
+                yield chunk
+
+                current_part += 1
+                offset += chunk_size
+                logging.debug(f"Yielded part {current_part-1}/{part_count}, offset {offset}")
         except Exception as e:
             logging.error(f"Error while streaming file: {e}")
+            stats.record_error(e)
             raise
         finally:
-            logging.debug(f"Finished yielding file with {current_part-1} parts.")
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            active_streams.pop(id(stats), None)
+            logging.debug(f"Finished yielding file with {current_part-1} parts: {stats.as_dict()}")
             work_loads[index] -= 1
+            client_scheduler.stream_finished(index)
+
+    async def fetch_chunk(self, file_id: FileId, offset: int, chunk_size: int, stats: Optional[StreamStats] = None) -> Optional[bytes]:
+        """
+        Fetch a single part, from the local chunk cache when possible,
+        otherwise from Telegram with retries. Returns None on an unexpected response.
+        A media session is only set up once a part actually misses the cache.
+        """
+        if chunk_cache:
+            cached = await chunk_cache.get(file_id.media_id, offset, chunk_size)
+            if cached is not None:
+                return cached
 
+        # Viewers seeking to the same part at once share a single GetFile call
+        return await inflight_chunks.do(
+            (file_id.media_id, offset, chunk_size),
+            lambda: self.request_chunk(file_id, offset, chunk_size, stats),
+        )
+
+    async def request_chunk(self, file_id: FileId, offset: int, chunk_size: int, stats: Optional[StreamStats] = None) -> Optional[bytes]:
+        """
+        Request a single part from Telegram, retrying on timeouts.
+
+        A failure is charged to the client that issued the GetFile here, once;
+        viewers that joined this request through inflight_chunks only see the
+        error and fail over, without putting their own clients in cooldown.
+        """
+        try:
+            return await self._request_chunk(file_id, offset, chunk_size, stats)
+        except Exception as e:
+            if stats:
+                client_scheduler.record_error(stats.client_index, e)
+            raise
+
+    async def _request_chunk(self, file_id: FileId, offset: int, chunk_size: int, stats: Optional[StreamStats]) -> Optional[bytes]:
+        media_session = await self.get_media_session(file_id.dc_id)
+        location = await self.get_location(file_id)
+        # Retry logic for handling timeouts
+        max_retries = 3
+        retry_count = 0
+        retry_delay = 1  # Initial delay in seconds
+
+        while True:
+            try:
+                started = time.monotonic()
+                r = await media_session.send(raw.functions.upload.GetFile(
+                    location=location, offset=offset, limit=chunk_size))
+                if stats:
+                    rtt = time.monotonic() - started
+                    stats.record_request(rtt)
+                    if isinstance(r, raw.types.upload.File):
+                        client_scheduler.record_sample(stats.client_index, len(r.bytes), rtt)
+                break  # Success - exit retry loop
+            except TimeoutError:
+                retry_count += 1
+                if stats:
+                    stats.record_retry()
+                if retry_count > max_retries:
+                    logging.error(f"Request timed out after {max_retries} retries at offset {offset}")
+                    raise  # Re-raise if we've exhausted retries
 
-    async def generate_media_session(self, client: Client, file_id: FileId) -> Session:
-        media_session = client.media_sessions.get(file_id.dc_id, None)
+                logging.warning(f"Request timed out, retrying ({retry_count}/{max_retries}) at offset {offset}")
+                await asyncio.sleep(retry_delay)
+                retry_delay *= 2  # Exponential backoff
+
+        if isinstance(r, raw.types.upload.File):
+            if chunk_cache and r.bytes:
+                file_size = getattr(file_id, "file_size", 0) or 0
+                edge = offset == 0 or offset + chunk_size >= file_size
+                await chunk_cache.put(file_id.media_id, offset, chunk_size, r.bytes, edge=edge)
+            return r.bytes
+        logging.error("Unexpected response type from Telegram")
+        return None
+
+
+    async def get_media_session(self, dc_id: int) -> Session:
+        """Return the media session for a DC, creating it at most once at a time."""
+        media_session = self.client.media_sessions.get(dc_id, None)
+        if media_session is not None:
+            return media_session
+        lock = self.__session_locks.setdefault(dc_id, asyncio.Lock())
+        async with lock:
+            return await self.generate_media_session(self.client, dc_id)
+
+    async def generate_media_session(self, client: Client, dc_id: int) -> Session:
+        media_session = client.media_sessions.get(dc_id, None)
         if (media_session is None):
-            if file_id.dc_id != await client.storage.dc_id():
+            if dc_id != await client.storage.dc_id():
                 media_session = Session(client,
-                                        file_id.dc_id,
-                                        await Auth(client, file_id.dc_id, await client.storage.test_mode()).create(),
+                                        dc_id,
+                                        await Auth(client, dc_id, await client.storage.test_mode()).create(),
                                         await client.storage.test_mode(),
                                         is_media=True)
                 await media_session.start()
                 for _ in range(6):
-                    exported_auth = await client.invoke(raw.functions.auth.ExportAuthorization(dc_id=file_id.dc_id))
+                    exported_auth = await client.invoke(raw.functions.auth.ExportAuthorization(dc_id=dc_id))
                     try:
                         await media_session.send(raw.functions.auth.ImportAuthorization(id=exported_auth.id, bytes=exported_auth.bytes))
                         break
                     except AuthBytesInvalid:
                         logging.debug(
-                            'Invalid authorization bytes for DC %s!', file_id.dc_id)
+                            'Invalid authorization bytes for DC %s!', dc_id)
                         continue
                 else:
                     await media_session.stop()
                     raise AuthBytesInvalid
             else:
                 media_session = Session(client,
-                                        file_id.dc_id,
+                                        dc_id,
                                         await client.storage.auth_key(),
                                         await client.storage.test_mode(),
                                         is_media=True)
                 await media_session.start()
-            logging.debug(f"Created media session for DC {file_id.dc_id}")
-            client.media_sessions[file_id.dc_id] = media_session
+            logging.debug(f"Created media session for DC {dc_id}")
+            client.media_sessions[dc_id] = media_session
         else:
-            logging.debug(f"Using cached media session for DC {file_id.dc_id}")
+            logging.debug(f"Using cached media session for DC {dc_id}")
         return media_session
 
     @staticmethod
@@ -165,12 +368,64 @@ class ByteStreamer:
                                                            thumb_size=file_id.thumbnail_size)
         return location
 
-    async def clean_cache(self) -> None:
-        """
-        function to clean the cache to reduce memory usage
-        """
-        while True:
-            await asyncio.sleep(self.clean_timer)
-            self.__cached_file_ids.clear()
-            self.__file_properties_cache.clear()
-            logging.debug("Cleaned the cache")
\ No newline at end of file
+
+async def stream_with_failover(get_streamer: Callable[[int], "ByteStreamer"], chat_id: int, message_id: int, index: int, file_id: FileId, offset: int, first_part_cut: int, last_part_cut: int, part_count: int, chunk_size: int) -> AsyncGenerator[Union[bytes, memoryview], None]:
+    """
+    Wrap ByteStreamer.yield_file so a range survives a throttled or failing client.
+
+    Parts are chunk aligned, so after `parts_sent` parts the remainder of the
+    range starts exactly at offset + parts_sent * chunk_size with no first-part
+    cut. On a resumable error the scheduler (which has already put the client
+    that issued the failing GetFile in cooldown) picks another client, the FileId is re-resolved for it
+    and streaming continues from that part, keeping the output byte-exact.
+    """
+    parts_sent = 0
+    failovers = 0
+    streamer = get_streamer(index)
+    while True:
+        try:
+            # Closed explicitly so its cleanup (prefetch cancellation, load
+            # counters) runs as soon as this generator is closed, not at GC
+            async with aclosing(streamer.yield_file(
+                file_id,
+                index,
+                offset + parts_sent * chunk_size,
+                first_part_cut if parts_sent == 0 else 0,
+                last_part_cut,
+                part_count - parts_sent,
+                chunk_size,
+            )) as parts:
+                async for chunk in parts:
+                    parts_sent += 1
+                    yield chunk
+            return
+        except RESUMABLE_ERRORS as e:
+            failovers += 1
+            if failovers > MAX_FAILOVERS:
+                logging.error(f"Giving up after {MAX_FAILOVERS} failovers at part {parts_sent}/{part_count}")
+                raise
+            if isinstance(e, FileReferenceExpired):
+                await streamer.invalidate_file_properties(chat_id, message_id)
+
+            remaining = (part_count - parts_sent) * chunk_size
+            new_index = client_scheduler.pick(expected_bytes=remaining, dc_id=file_id.dc_id)
+            if new_index is None:
+                raise
+            logging.warning(f"Resuming stream from part {parts_sent + 1}/{part_count} on client {new_index} after {type(e).__name__} on client {index}")
+            metrics.stream_failovers.inc(from_client=index, to_client=new_index)
+            index = new_index
+            streamer = get_streamer(index)
+            file_id = await streamer.get_file_properties(chat_id, message_id)
+
+
+def get_streamer(index: int) -> ByteStreamer:
+    """Return the cached ByteStreamer for a client, creating it on first use."""
+    client = multi_clients[index]
+    if client in class_cache:
+        logging.debug(f"Using cached ByteStreamer object for client {index}")
+        return class_cache[client]["object"]
+
+    logging.debug(f"Creating new ByteStreamer object for client {index}")
+    tg_connect = ByteStreamer(client)
+    class_cache[client] = {"object": tg_connect, "timestamp": time.time()}
+    return tg_connect
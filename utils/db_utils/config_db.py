@@ -1,16 +1,23 @@
 from pymongo import MongoClient
 from typing import Dict, List, Any, Optional
-from config import DATABASE_URL
+from utils.db_utils.mongo_client import mongo_client
+from utils.db_utils.indexes import reconcile_indexes
 
 class ConfigDatabase:
-    def __init__(self, connection_string: str = DATABASE_URL, db_name: str = "config_db"):
-        """Initialize MongoDB connection."""
-        self.client = MongoClient(connection_string)
+    def __init__(self, connection_string: Optional[str] = None, db_name: str = "config_db"):
+        """
+        Initialize MongoDB connection.
+
+        Uses the shared pooled client unless a separate connection string is given.
+        """
+        self.client = MongoClient(connection_string) if connection_string else mongo_client
+        self.owns_client = bool(connection_string)
         self.db = self.client[db_name]
         self.config_collection = self.db["configs"]
-        
-        
-        self.config_collection.create_index("key", unique=True)
+
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        """Reconcile this collection's indexes with utils.db_utils.indexes."""
+        return reconcile_indexes(self.config_collection)
     
     def upsert_config(self, key: str, value: Any, description: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -151,8 +158,9 @@ class ConfigDatabase:
             return []
     
     def close(self):
-        """Close the MongoDB connection."""
-        self.client.close()
+        """Close the MongoDB connection if this instance opened its own."""
+        if self.owns_client:
+            self.client.close()
 
     
     
@@ -0,0 +1,25 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from config import MONGO_POOL_SIZE
+
+# One thread per pooled connection, so a query never waits for a socket
+# after it has already been handed a thread
+db_executor = ThreadPoolExecutor(max_workers=MONGO_POOL_SIZE, thread_name_prefix="mongo")
+
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking pymongo call on the database executor.
+
+    Routes and plugins await this instead of calling DAO methods directly,
+    so a slow catalog query never stalls the event loop that also drives
+    streaming and the bot.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor() -> None:
+    db_executor.shutdown(wait=False, cancel_futures=True)
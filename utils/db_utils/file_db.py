@@ -0,0 +1,75 @@
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+from utils.db_utils.mongo_client import get_database
+from utils.db_utils.indexes import reconcile_indexes
+
+
+class FileDatabase:
+    def __init__(self):
+        """Initialize MongoDB connection."""
+        db = get_database("files_db")
+        self.files_collection = db["files"]
+
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        """Reconcile this collection's indexes with utils.db_utils.indexes."""
+        return reconcile_indexes(self.files_collection)
+
+    def find_file(self, chat_id: int, msg_id: int, bot_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Find the stored FileId and properties of a message as seen by one bot.
+
+        FileIds carry a per-bot access hash, so entries are keyed by bot too.
+        """
+        try:
+            return self.files_collection.find_one(
+                {"chat_id": chat_id, "msg_id": msg_id, "bot_id": bot_id}, {"_id": 0}
+            )
+        except Exception as e:
+            print(f"Error finding file: {str(e)}")
+            return None
+
+    def upsert_file(self, chat_id: int, msg_id: int, bot_id: int, file_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store or update the FileId and properties of a message.
+
+        Args:
+            chat_id: Chat the message lives in
+            msg_id: Message ID
+            bot_id: Telegram ID of the bot the FileId was resolved with
+            file_data: Encoded file_id, file_size, mime_type, file_name, unique_id, dc_id
+
+        Returns:
+            Dict with operation status
+        """
+        try:
+            update_doc = dict(file_data, updated_at=datetime.now())
+            result = self.files_collection.update_one(
+                {"chat_id": chat_id, "msg_id": msg_id, "bot_id": bot_id},
+                {"$set": update_doc},
+                upsert=True,
+            )
+            return {
+                "status": "inserted" if result.upserted_id else "updated",
+                "modified_count": result.modified_count,
+            }
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def delete_file(self, chat_id: int, msg_id: int, bot_id: Optional[int] = None) -> Dict[str, Any]:
+        """Forget a stored FileId, for one bot or for all of them."""
+        try:
+            query = {"chat_id": chat_id, "msg_id": msg_id}
+            if bot_id is not None:
+                query["bot_id"] = bot_id
+            result = self.files_collection.delete_many(query)
+            return {"status": "success", "deleted_count": result.deleted_count}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def distinct_dc_ids(self) -> List[int]:
+        """DCs holding at least one catalog file."""
+        try:
+            return [dc_id for dc_id in self.files_collection.distinct("dc_id") if dc_id]
+        except Exception as e:
+            print(f"Error listing file DCs: {str(e)}")
+            return []
@@ -0,0 +1,201 @@
+import logging
+from typing import Any, Dict, List
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+LOGGER = logging.getLogger(__name__)
+
+# Case-insensitive ordering for titles; search sorts with the same collation
+# so the planner can walk this index instead of sorting in memory
+TITLE_COLLATION = {"locale": "en", "strength": 2}
+
+
+def catalog_indexes(id_field: str) -> List[IndexModel]:
+    """Indexes backing the browse, similar and search queries of movies/shows."""
+    return [
+        IndexModel([(id_field, ASCENDING)], name=f"{id_field}_1", unique=True),
+        # Pagination sorts ("most" and "date"), _id breaks ties between equal values
+        IndexModel([("vote_average", DESCENDING), ("_id", DESCENDING)], name="sort_vote_average"),
+        IndexModel([("release_date", DESCENDING), ("_id", DESCENDING)], name="sort_release_date"),
+        # Similar-by-genre results are ordered by popularity
+        IndexModel([("popularity", DESCENDING)], name="sort_popularity"),
+        # Multikey index over the genres array
+        IndexModel([("genres", ASCENDING)], name="genres"),
+        IndexModel([("title", ASCENDING)], name="title_ci", collation=TITLE_COLLATION),
+    ]
+
+
+# Declared indexes per "<database>.<collection>"
+INDEXES: Dict[str, List[IndexModel]] = {
+    "movies_db.movies": catalog_indexes("mid"),
+    "shows_db.shows": catalog_indexes("sid"),
+    "users_db.users": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_1", unique=True),
+    ],
+    "config_db.configs": [
+        IndexModel([("key", ASCENDING)], name="key_1", unique=True),
+    ],
+    "files_db.files": [
+        IndexModel(
+            [("chat_id", ASCENDING), ("msg_id", ASCENDING), ("bot_id", ASCENDING)],
+            name="chat_id_1_msg_id_1_bot_id_1",
+            unique=True,
+        ),
+    ],
+}
+
+# Options compared when deciding whether an existing index matches its declaration
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def _same_keys(existing: Dict[str, Any], declared: Dict[str, Any]) -> bool:
+    """Whether two indexes occupy the same slot (key pattern plus collation)."""
+    if list(existing["key"].items()) != list(declared["key"].items()):
+        return False
+    # The server fills in every collation default, so only compare what we declared
+    collation = declared.get("collation")
+    if collation:
+        existing_collation = existing.get("collation") or {}
+        return all(existing_collation.get(k) == v for k, v in collation.items())
+    return "collation" not in existing
+
+
+def _matches(existing: Dict[str, Any], declared: Dict[str, Any]) -> bool:
+    if not _same_keys(existing, declared):
+        return False
+    return all(
+        existing.get(option) == declared.get(option)
+        or (not existing.get(option) and not declared.get(option))
+        for option in COMPARED_OPTIONS
+    )
+
+
+def _model_from_existing(index: Dict[str, Any]) -> IndexModel:
+    """IndexModel recreating an index as reported by list_indexes."""
+    options = {k: v for k, v in index.items() if k not in ("v", "key", "ns")}
+    return IndexModel(list(index["key"].items()), **options)
+
+
+def _replace_index(collection: Collection, model: IndexModel, stale: List[Dict[str, Any]]) -> bool:
+    """
+    Swap `stale` indexes for `model`, never leaving the collection without
+    them when the new index cannot be built (e.g. duplicates under a new
+    unique constraint).
+
+    Returns:
+        Whether the declared index now exists
+    """
+    document = model.document
+    name = document["name"]
+
+    if not any(_same_keys(index, document) for index in stale):
+        # Only the name is taken: build and validate the new keys under a
+        # temporary name before the old index goes away
+        pending = IndexModel(
+            list(document["key"].items()),
+            **{**{k: v for k, v in document.items() if k != "key"}, "name": f"{name}_pending"},
+        )
+        try:
+            collection.create_indexes([pending])
+        except PyMongoError as e:
+            LOGGER.error(f"Could not build index {name} on {collection.full_name}, keeping the old one: {e}")
+            return False
+        for index in stale:
+            collection.drop_index(index["name"])
+        try:
+            collection.create_indexes([model])
+        except PyMongoError as e:
+            LOGGER.error(f"Could not create index {name} on {collection.full_name}, {name}_pending stays in use: {e}")
+            return False
+        collection.drop_index(f"{name}_pending")
+        return True
+
+    # Mongo keeps one index per key pattern (and collation), so the old one
+    # has to be dropped first; it is restored if the new one fails to build
+    for index in stale:
+        collection.drop_index(index["name"])
+    try:
+        collection.create_indexes([model])
+        return True
+    except PyMongoError as e:
+        LOGGER.error(f"Could not rebuild index {name} on {collection.full_name}, restoring the old one: {e}")
+        collection.create_indexes([_model_from_existing(index) for index in stale])
+        return False
+
+
+def reconcile_indexes(collection: Collection) -> Dict[str, List[str]]:
+    """
+    Bring a collection's indexes in line with its declaration in INDEXES.
+
+    Missing indexes are created, and indexes whose keys or options drifted
+    (or that hold a declared key pattern under another name) are rebuilt.
+    A rebuild that fails keeps the old index and is reported as failed.
+    Indexes that are not declared are left alone and only reported, so
+    nothing created by hand is dropped.
+
+    Returns:
+        Dict with the names of created, rebuilt, failed and unmanaged indexes
+    """
+    declared = INDEXES.get(collection.full_name, [])
+    existing = {index["name"]: index for index in collection.list_indexes()}
+    report = {"created": [], "rebuilt": [], "failed": [], "unmanaged": []}
+    replaced = set()
+
+    for model in declared:
+        document = model.document
+        name = document["name"]
+        current = existing.get(name)
+        if current is not None and _matches(current, document):
+            continue
+
+        stale = [current] if current is not None else [
+            index for index in existing.values()
+            if index["name"] != "_id_" and _same_keys(index, document)
+        ]
+        if not stale:
+            try:
+                collection.create_indexes([model])
+                report["created"].append(name)
+            except PyMongoError as e:
+                LOGGER.error(f"Could not create index {name} on {collection.full_name}: {e}")
+                report["failed"].append(name)
+            continue
+
+        if _replace_index(collection, model, stale):
+            replaced.update(index["name"] for index in stale)
+            report["rebuilt"].append(name)
+        else:
+            report["failed"].append(name)
+
+    declared_names = {model.document["name"] for model in declared}
+    report["unmanaged"] = sorted(
+        name for name in existing
+        if name != "_id_" and name not in declared_names and name not in replaced
+    )
+
+    if report["created"] or report["rebuilt"]:
+        LOGGER.info(
+            f"Indexes on {collection.full_name}: created {report['created']}, rebuilt {report['rebuilt']}"
+        )
+    if report["unmanaged"]:
+        LOGGER.info(f"Unmanaged indexes on {collection.full_name}: {report['unmanaged']}")
+    return report
+
+
+def index_usage(collection: Collection) -> List[Dict[str, Any]]:
+    """Per-index access counters from $indexStats, most used first."""
+    stats = []
+    for entry in collection.aggregate([{"$indexStats": {}}]):
+        accesses = entry.get("accesses", {})
+        since = accesses.get("since")
+        stats.append({
+            "name": entry.get("name"),
+            "key": dict(entry.get("key", {})),
+            "ops": int(accesses.get("ops", 0)),
+            "since": since.isoformat() if since else None,
+            "declared": entry.get("name") in {
+                model.document["name"] for model in INDEXES.get(collection.full_name, [])
+            },
+        })
+    return sorted(stats, key=lambda s: s["ops"], reverse=True)
@@ -1,8 +1,8 @@
 from pymongo import MongoClient
-from config import DATABASE_URL
+from config import DATABASE_URL, MONGO_POOL_SIZE
 
 
-mongo_client = MongoClient(DATABASE_URL)
+mongo_client = MongoClient(DATABASE_URL, maxPoolSize=MONGO_POOL_SIZE)
 
 
 def get_database(db_name):  
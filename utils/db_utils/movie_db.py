@@ -1,5 +1,7 @@
+from datetime import datetime, timezone
 from typing import Dict, List, Any, Optional
 from utils.db_utils.mongo_client import get_database
+from utils.db_utils.indexes import reconcile_indexes, TITLE_COLLATION
 
 
 class MovieDatabase:
@@ -7,8 +9,10 @@ class MovieDatabase:
         """Initialize MongoDB connection."""
         db = get_database("movies_db")
         self.movies_collection = db["movies"]
-        
-        self.movies_collection.create_index("mid", unique=True)
+
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        """Reconcile this collection's indexes with utils.db_utils.indexes."""
+        return reconcile_indexes(self.movies_collection)
     
     def upsert_movie(self, movie_dict: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -27,6 +31,8 @@ class MovieDatabase:
         
         try:
             existing_movie = self.movies_collection.find_one({"mid": movie_id})
+            # Version of the document, used for ETag/Last-Modified of the API
+            now = datetime.now(timezone.utc)
             
             if existing_movie:
                 fields_to_update = [
@@ -37,7 +43,7 @@ class MovieDatabase:
                     "file_hash", "msg_id", "chat_id", "trailer"
                 ]
                 
-                update_doc = {}
+                update_doc = {"updated_at": now}
                 for field in fields_to_update:
                     if field in movie_dict:
                         update_doc[field] = movie_dict[field]
@@ -62,6 +68,7 @@ class MovieDatabase:
                     "modified_count": result.modified_count
                 }
             else:
+                movie_dict["updated_at"] = now
                 result = self.movies_collection.insert_one(movie_dict)
                 
                 return {
@@ -75,22 +82,48 @@ class MovieDatabase:
                 "message": str(e)
             }
     
-    def find_movie_by_id(self, movie_id: int) -> Optional[Dict[str, Any]]:
-        """Find a movie by its ID."""
+    def find_movie_by_id(self, movie_id: int, projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Find a movie by its ID, optionally returning only the projected fields."""
         try:
             movie_id = int(movie_id)
-            movie = self.movies_collection.find_one({"mid": movie_id})
+            movie = self.movies_collection.find_one({"mid": movie_id}, projection)
             print(f"Searching for movie with mid: {movie_id}, Found: {movie is not None}")
             return movie
         except Exception as e:
             print(f"Error finding movie: {str(e)}")
             return None
     
+    def find_movies_by_ids(self, movie_ids: List[int], projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Find several movies with one $in query.
+
+        Args:
+            movie_ids: IDs to look up
+            projection: Optional fields to return (mid is always included)
+
+        Returns:
+            The movies found, in the order of movie_ids; missing IDs are skipped
+        """
+        try:
+            ids = [int(movie_id) for movie_id in movie_ids]
+        except (TypeError, ValueError) as e:
+            print(f"Error finding movies: {str(e)}")
+            return []
+        if not ids:
+            return []
+        if projection is not None:
+            projection = {**projection, "mid": 1}
+        found = {
+            doc["mid"]: doc
+            for doc in self.movies_collection.find({"mid": {"$in": ids}}, projection)
+        }
+        return [found[movie_id] for movie_id in ids if movie_id in found]
+    
     def find_movies_by_title(self, title_query: str) -> List[Dict[str, Any]]:
-        """Find movies by title (case-insensitive partial match)."""
+        """Find movies by title (case-insensitive partial match), ordered by title."""
         cursor = self.movies_collection.find(
             {"title": {"$regex": title_query, "$options": "i"}}
-        )
+        ).sort("title", 1).collation(TITLE_COLLATION)
         return list(cursor)
     
     def delete_movie(self, movie_id: int) -> Dict[str, Any]:
@@ -114,7 +147,7 @@ class MovieDatabase:
                 "message": str(e)
             }
         
-    def find_movies_paginated(self, skip: int, limit: int, sort_fields=None) -> tuple:
+    def find_movies_paginated(self, skip: int, limit: int, sort_fields=None, after: Optional[Dict[str, Any]] = None) -> tuple:
         """
         Find movies with pagination and sorting.
         
@@ -122,17 +155,16 @@ class MovieDatabase:
             skip: Number of documents to skip
             limit: Number of documents to return
             sort_fields: List of tuples with field name and direction (1 for ascending, -1 for descending)
+            after: Optional keyset filter selecting the documents past the previous page
             
         Returns:
-            Tuple of (list of movies, total count)
+            Tuple of (list of movies, sort key values of the last movie or None)
         """
         if sort_fields is None:
             sort_fields = [("_id", -1)]  # Default sort by newest first
-            
-        total_count = self.movies_collection.count_documents({})
 
         projection = {
-            "_id": 0,
+            "_id": 1,
             "mid": 1,
             "title": 1,
             "release_date": 1,
@@ -141,11 +173,12 @@ class MovieDatabase:
             "vote_count": 1
         }
         
-        cursor = self.movies_collection.find({}, projection) \
+        cursor = self.movies_collection.find(after or {}, projection) \
             .sort(sort_fields) \
             .skip(skip) \
             .limit(limit)
         paginated_entries = []
+        last_key = None
         for entry in cursor:
             year = None
             if "release_date" in entry and entry["release_date"]:
@@ -164,5 +197,6 @@ class MovieDatabase:
                 "media_type": "movie"
             }
             paginated_entries.append(processed_entry)
+            last_key = [entry.get(field) for field, _ in sort_fields]
         
-        return paginated_entries, total_count
+        return paginated_entries, last_key
@@ -0,0 +1,81 @@
+import logging
+import threading
+from typing import Any, Dict, List, Type, TypeVar
+from utils.db_utils.movie_db import MovieDatabase
+from utils.db_utils.show_db import ShowDatabase
+from utils.db_utils.user_db import UserDatabase
+from utils.db_utils.config_db import ConfigDatabase
+from utils.db_utils.file_db import FileDatabase
+from utils.db_utils.indexes import index_usage
+
+LOGGER = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+REPOSITORIES = (MovieDatabase, ShowDatabase, UserDatabase, ConfigDatabase, FileDatabase)
+
+# Collection attribute of each repository, for index reporting
+COLLECTION_ATTRIBUTES = {
+    MovieDatabase: "movies_collection",
+    ShowDatabase: "shows_collection",
+    UserDatabase: "users_collection",
+    ConfigDatabase: "config_collection",
+    FileDatabase: "files_collection",
+}
+
+_instances: Dict[type, Any] = {}
+_lock = threading.Lock()
+
+
+def get_repository(cls: Type[T]) -> T:
+    """Return the process-wide instance of a DAO, all sharing one MongoClient."""
+    repository = _instances.get(cls)
+    if repository is None:
+        with _lock:
+            repository = _instances.get(cls)
+            if repository is None:
+                repository = _instances[cls] = cls()
+    return repository
+
+
+def get_movie_db() -> MovieDatabase:
+    return get_repository(MovieDatabase)
+
+
+def get_show_db() -> ShowDatabase:
+    return get_repository(ShowDatabase)
+
+
+def get_user_db() -> UserDatabase:
+    return get_repository(UserDatabase)
+
+
+def get_config_db() -> ConfigDatabase:
+    return get_repository(ConfigDatabase)
+
+
+def get_file_db() -> FileDatabase:
+    return get_repository(FileDatabase)
+
+
+def ensure_indexes() -> Dict[str, Dict[str, List[str]]]:
+    """Reconcile every repository's indexes; run once at startup."""
+    reports = {}
+    for cls in REPOSITORIES:
+        try:
+            reports[cls.__name__] = get_repository(cls).ensure_indexes()
+        except Exception as e:
+            LOGGER.error(f"Failed to reconcile indexes for {cls.__name__}: {str(e)}")
+    return reports
+
+
+def index_usage_report() -> Dict[str, List[Dict[str, Any]]]:
+    """$indexStats of every repository collection, keyed by namespace."""
+    report = {}
+    for cls in REPOSITORIES:
+        collection = getattr(get_repository(cls), COLLECTION_ATTRIBUTES[cls])
+        try:
+            report[collection.full_name] = index_usage(collection)
+        except Exception as e:
+            report[collection.full_name] = [{"error": str(e)}]
+    return report
@@ -1,13 +1,17 @@
+from datetime import datetime, timezone
 from typing import Dict, List, Any, Optional
 from utils.db_utils.mongo_client import get_database
+from utils.db_utils.indexes import reconcile_indexes, TITLE_COLLATION
 
 class ShowDatabase:
     def __init__(self):
         """Initialize MongoDB connection."""
         db = get_database("shows_db")
         self.shows_collection = db["shows"]
-        
-        self.shows_collection.create_index("sid", unique=True)
+
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        """Reconcile this collection's indexes with utils.db_utils.indexes."""
+        return reconcile_indexes(self.shows_collection)
     
     def upsert_show(self, show_dict: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -26,6 +30,8 @@ class ShowDatabase:
         
         try:
             existing_show = self.shows_collection.find_one({"sid": show_id})
+            # Version of the document, used for ETag/Last-Modified of the API
+            now = datetime.now(timezone.utc)
             
             if existing_show:
                 fields_to_update = [
@@ -36,7 +42,7 @@ class ShowDatabase:
                     "chat_id", "total_seasons", "total_episodes", "status", "trailer"
                 ]
                 
-                update_doc = {}
+                update_doc = {"updated_at": now}
                 for field in fields_to_update:
                     if field in show_dict:
                         update_doc[field] = show_dict[field]
@@ -91,6 +97,7 @@ class ShowDatabase:
                     "modified_count": result.modified_count
                 }
             else:
+                show_dict["updated_at"] = now
                 result = self.shows_collection.insert_one(show_dict)
                 
                 return {
@@ -104,22 +111,121 @@ class ShowDatabase:
                 "message": str(e)
             }
     
-    def find_show_by_id(self, show_id: int) -> Optional[Dict[str, Any]]:
-        """Find a show by its ID."""
+    def find_show_by_id(self, show_id: int, projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Find a show by its ID, optionally returning only the projected fields."""
         try:
             show_id = int(show_id)
-            show = self.shows_collection.find_one({"sid": show_id})
+            show = self.shows_collection.find_one({"sid": show_id}, projection)
             print(f"Searching for show with sid: {show_id}, Found: {show is not None}")
             return show
         except Exception as e:
             print(f"Error finding show: {str(e)}")
             return None
+
+    def find_episode_files(self, show_id: int, season_number: int, episode_number: int) -> Optional[Dict[str, Any]]:
+        """
+        Find the file references of a single episode.
+
+        Returns the show shaped like a full document, but holding only the
+        requested season and episode and only the file_hash, msg_id and
+        chat_id of each quality, so a stream lookup does not load the whole
+        show with every season's episodes.
+
+        Returns:
+            The trimmed show or None if the show is missing
+        """
+        def matching(array: str, item: str, field: str, value: int, shape: Dict[str, Any]) -> Dict[str, Any]:
+            return {"$map": {
+                "input": {"$filter": {
+                    "input": {"$ifNull": [array, []]},
+                    "as": item,
+                    "cond": {"$eq": [f"$${item}.{field}", value]},
+                }},
+                "as": item,
+                "in": shape,
+            }}
+
+        qualities = {"$map": {
+            "input": {"$ifNull": ["$$episode.quality", []]},
+            "as": "quality",
+            "in": {
+                "file_hash": "$$quality.file_hash",
+                "msg_id": "$$quality.msg_id",
+                "chat_id": "$$quality.chat_id",
+            },
+        }}
+        episodes = matching("$$season.episodes", "episode", "episode_number", int(episode_number), {
+            "episode_number": "$$episode.episode_number",
+            "quality": qualities,
+        })
+        seasons = matching("$season", "season", "season_number", int(season_number), {
+            "season_number": "$$season.season_number",
+            "episodes": episodes,
+        })
+        try:
+            shows = list(self.shows_collection.aggregate([
+                {"$match": {"sid": int(show_id)}},
+                {"$limit": 1},
+                {"$project": {"_id": 0, "season": seasons}},
+            ]))
+            return shows[0] if shows else None
+        except Exception as e:
+            print(f"Error finding episode files: {str(e)}")
+            return None
+
+    def find_show_season(self, show_id: int, season_number: int) -> Optional[Dict[str, Any]]:
+        """
+        Find a single season of a show, with its episodes.
+
+        Only the matching season element is returned by Mongo, not the
+        whole season array.
+
+        Returns:
+            The season document or None if the show or season is missing
+        """
+        try:
+            show = self.shows_collection.find_one(
+                {"sid": int(show_id)},
+                {"_id": 0, "season": {"$elemMatch": {"season_number": int(season_number)}}},
+            )
+            if not show or not show.get("season"):
+                return None
+            return show["season"][0]
+        except Exception as e:
+            print(f"Error finding season: {str(e)}")
+            return None
+    
+    def find_shows_by_ids(self, show_ids: List[int], projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Find several shows with one $in query.
+
+        Args:
+            show_ids: IDs to look up
+            projection: Optional fields to return (sid is always included)
+
+        Returns:
+            The shows found, in the order of show_ids; missing IDs are skipped
+        """
+        try:
+            ids = [int(show_id) for show_id in show_ids]
+        except (TypeError, ValueError) as e:
+            print(f"Error finding shows: {str(e)}")
+            return []
+        if not ids:
+            return []
+        if projection is not None:
+            projection = {**projection, "sid": 1}
+        found = {
+            doc["sid"]: doc
+            for doc in self.shows_collection.find({"sid": {"$in": ids}}, projection)
+        }
+        return [found[show_id] for show_id in ids if show_id in found]
     
     def find_shows_by_title(self, title_query: str) -> List[Dict[str, Any]]:
-        """Find shows by title (case-insensitive partial match)."""
+        """Find shows by title (case-insensitive partial match), ordered by title."""
         cursor = self.shows_collection.find(
             {"title": {"$regex": title_query, "$options": "i"}}
-        )
+        ).sort("title", 1).collation(TITLE_COLLATION)
         return list(cursor)
     
     def delete_show(self, show_id: int) -> Dict[str, Any]:
@@ -143,7 +249,7 @@ class ShowDatabase:
                 "message": str(e)
             }
     
-    def find_shows_paginated(self, skip: int, limit: int, sort_fields=None) -> tuple:
+    def find_shows_paginated(self, skip: int, limit: int, sort_fields=None, after: Optional[Dict[str, Any]] = None) -> tuple:
         """
         Find shows with pagination and sorting.
         
@@ -151,16 +257,16 @@ class ShowDatabase:
             skip: Number of documents to skip
             limit: Number of documents to return
             sort_fields: List of tuples with field name and direction (1 for ascending, -1 for descending)
+            after: Optional keyset filter selecting the documents past the previous page
             
         Returns:
-            Tuple of (list of shows, total count)
+            Tuple of (list of shows, sort key values of the last show or None)
         """
         if sort_fields is None:
             sort_fields = [("_id", -1)]  # Default sort by newest first
-            
-        total_count = self.shows_collection.count_documents({})
+
         projection = {
-            "_id": 0,
+            "_id": 1,
             "sid": 1,
             "title": 1,
             "release_date": 1,
@@ -169,11 +275,12 @@ class ShowDatabase:
             "vote_count": 1
         }
         
-        cursor = self.shows_collection.find({}, projection) \
+        cursor = self.shows_collection.find(after or {}, projection) \
             .sort(sort_fields) \
             .skip(skip) \
             .limit(limit)
         paginated_entries = []
+        last_key = None
         for entry in cursor:
             year = None
             if "release_date" in entry and entry["release_date"]:
@@ -192,5 +299,6 @@ class ShowDatabase:
                 "media_type": "show"
             }
             paginated_entries.append(processed_entry)
+            last_key = [entry.get(field) for field, _ in sort_fields]
         
-        return paginated_entries, total_count
+        return paginated_entries, last_key
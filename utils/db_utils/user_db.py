@@ -1,6 +1,7 @@
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from utils.db_utils.mongo_client import get_database
+from utils.db_utils.indexes import reconcile_indexes
 
 
 class UserDatabase:
@@ -9,7 +10,9 @@ class UserDatabase:
         db = get_database("users_db")
         self.users_collection = db["users"]
 
-        self.users_collection.create_index("user_id", unique=True)
+    def ensure_indexes(self) -> Dict[str, List[str]]:
+        """Reconcile this collection's indexes with utils.db_utils.indexes."""
+        return reconcile_indexes(self.users_collection)
 
     def register_user(self, user_dict: Dict[str, Any]) -> Dict[str, Any]:
         """
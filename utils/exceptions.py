@@ -10,4 +10,11 @@ class InvalidHash(Exception):
 
 
 class FileNotFound(Exception):
-    message = 'File not found!'
\ No newline at end of file
+    message = 'File not found!'
+
+class RangeNotSatisfiable(Exception):
+    message = 'Range not satisfiable!'
+
+
+class StreamLimitExceeded(Exception):
+    message = 'Too many concurrent streams!'
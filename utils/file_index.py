@@ -0,0 +1,95 @@
+import mimetypes
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from pyrogram.file_id import FileId
+
+
+def resolve_file_meta(file_id: FileId) -> Dict[str, Any]:
+    """
+    Extract the response metadata of a file, filling in a MIME type and file
+    name the same way media_streamer always has when Telegram omits them.
+    """
+    mime_type = file_id.mime_type
+    file_name = file_id.file_name
+
+    if mime_type:
+        if not file_name:
+            try:
+                file_name = f"{secrets.token_hex(2)}.{mime_type.split('/')[1]}"
+            except (IndexError, AttributeError):
+                file_name = f"{secrets.token_hex(2)}.unknown"
+    else:
+        if file_name:
+            mime_type = mimetypes.guess_type(file_name)[0]
+        else:
+            mime_type = "application/octet-stream"
+            file_name = f"{secrets.token_hex(2)}.unknown"
+
+    return {
+        "file_size": file_id.file_size,
+        "mime_type": mime_type,
+        "file_name": file_name,
+        "unique_id": file_id.unique_id,
+        "media_id": file_id.media_id,
+        "dc_id": file_id.dc_id,
+    }
+
+
+class FileMetaIndex:
+    """
+    In-process index answering stream probes without Mongo or Telegram.
+
+    `locations` maps a stream request (id, media type, quality, season,
+    episode) to the stored chat_id/msg_id/hash and expires after
+    `location_ttl` so catalog edits are picked up. `files` maps
+    (chat_id, msg_id) to size, MIME type, name, unique id and media id,
+    which never change for a given message.
+    """
+
+    def __init__(self, max_entries: int = 20000, location_ttl: int = 600):
+        self.max_entries = max_entries
+        self.location_ttl = location_ttl
+        self.locations: "OrderedDict[tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.files: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+
+    def _trim(self, entries: OrderedDict) -> None:
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def get_location(self, key: tuple) -> Optional[Dict[str, Any]]:
+        entry = self.locations.get(key)
+        if entry is None:
+            return None
+        stored_at, details = entry
+        if time.monotonic() - stored_at > self.location_ttl:
+            del self.locations[key]
+            return None
+        self.locations.move_to_end(key)
+        return details
+
+    def set_location(self, key: tuple, details: Dict[str, Any]) -> None:
+        self.locations[key] = (time.monotonic(), details)
+        self.locations.move_to_end(key)
+        self._trim(self.locations)
+
+    def get_meta(self, chat_id: int, msg_id: int) -> Optional[Dict[str, Any]]:
+        meta = self.files.get((chat_id, msg_id))
+        if meta is not None:
+            self.files.move_to_end((chat_id, msg_id))
+        return meta
+
+    def remember(self, chat_id: int, msg_id: int, file_id: FileId) -> Dict[str, Any]:
+        meta = self.files.get((chat_id, msg_id))
+        if meta is None or meta["unique_id"] != file_id.unique_id:
+            meta = resolve_file_meta(file_id)
+            self.files[(chat_id, msg_id)] = meta
+            self._trim(self.files)
+        return meta
+
+    def forget(self, chat_id: int, msg_id: int) -> None:
+        self.files.pop((chat_id, msg_id), None)
+
+
+file_index = FileMetaIndex()
@@ -25,4 +25,24 @@ async def get_file_ids(client: Client, chat_id: int, message_id: int) -> Optiona
     setattr(file_id, 'file_size', getattr(media, 'file_size', 0))
     setattr(file_id, 'mime_type', getattr(media, 'mime_type', ''))
     setattr(file_id, 'unique_id', file_unique_id)
-    return file_id
\ No newline at end of file
+    return file_id
+
+def encode_file_properties(file_id: FileId) -> dict:
+    """Serialize a FileId returned by get_file_ids for the persistent file index."""
+    return {
+        "file_id": file_id.encode(),
+        "file_name": getattr(file_id, 'file_name', ''),
+        "file_size": getattr(file_id, 'file_size', 0),
+        "mime_type": getattr(file_id, 'mime_type', ''),
+        "unique_id": getattr(file_id, 'unique_id', None),
+        "dc_id": file_id.dc_id,
+    }
+
+def decode_file_properties(file_data: dict) -> FileId:
+    """Rebuild a FileId with the same extra attributes get_file_ids sets."""
+    file_id = FileId.decode(file_data["file_id"])
+    setattr(file_id, 'file_name', file_data.get('file_name', ''))
+    setattr(file_id, 'file_size', file_data.get('file_size', 0))
+    setattr(file_id, 'mime_type', file_data.get('mime_type', ''))
+    setattr(file_id, 'unique_id', file_data.get('unique_id'))
+    return file_id
@@ -0,0 +1,173 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, List, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.precompressed import etag_matches
+from config import (
+    CACHE_CONTROL_HOME,
+    CACHE_CONTROL_DETAILS,
+    CACHE_CONTROL_LISTS,
+    CACHE_CONTROL_SEARCH,
+)
+
+# Cache-Control sent with each policy ("" sends none, validators still apply)
+CACHE_POLICIES = {
+    "home": CACHE_CONTROL_HOME,
+    "details": CACHE_CONTROL_DETAILS,
+    "lists": CACHE_CONTROL_LISTS,
+    "search": CACHE_CONTROL_SEARCH,
+}
+
+# Public catalog routes by path prefix; anything not listed is passed through untouched
+ROUTE_POLICIES: List[Tuple[str, str]] = [
+    ("/api/v1/heroslider", "home"),
+    ("/api/v1/getlatest/", "home"),
+    ("/api/v1/trending", "home"),
+    ("/api/v1/getMovieDetails/", "details"),
+    ("/api/v1/getShowDetails/", "details"),
+    ("/api/v1/paginated/", "lists"),
+    ("/api/v1/similar", "lists"),
+    ("/api/v1/search", "search"),
+]
+
+# Headers describing the body, which a 304 must not carry
+BODY_HEADERS = ("content-length", "content-type", "content-encoding")
+
+
+def route_policy(path: str) -> Optional[str]:
+    for prefix, policy in ROUTE_POLICIES:
+        if path.startswith(prefix):
+            return policy
+    return None
+
+
+def as_utc(value: datetime) -> datetime:
+    """Mongo hands back naive datetimes that are in UTC."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(as_utc(value).replace(microsecond=0), usegmt=True)
+
+
+def document_etag(kind: str, doc_id, updated_at: datetime, variant: Iterable[str] = ()) -> str:
+    """
+    Weak ETag of a catalog document version.
+
+    Args:
+        kind: "movie" or "show"
+        doc_id: The mid or sid
+        updated_at: The document's updated_at
+        variant: What else shapes the representation, e.g. the requested fields
+    """
+    version = int(as_utc(updated_at).timestamp() * 1000)
+    tag = f"{kind}-{doc_id}-{version}"
+    variant = ",".join(variant)
+    if variant:
+        tag += "-" + hashlib.blake2b(variant.encode(), digest_size=4).hexdigest()
+    return f'W/"{tag}"'
+
+
+def version_headers(kind: str, doc_id, updated_at: datetime, variant: Iterable[str] = ()) -> dict:
+    """ETag and Last-Modified of a catalog document version."""
+    return {
+        "ETag": document_etag(kind, doc_id, updated_at, variant),
+        "Last-Modified": http_date(updated_at),
+    }
+
+
+def body_etag(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def is_conditional(headers: Headers) -> bool:
+    return "if-none-match" in headers or "if-modified-since" in headers
+
+
+def not_modified(headers: Headers, etag: Optional[str], last_modified: Optional[str] = None) -> bool:
+    """
+    Whether a GET can be answered with 304 (RFC 9110 13.2.2): If-None-Match
+    decides when present, If-Modified-Since is only used without it.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and etag_matches(if_none_match, etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class HTTPCacheMiddleware:
+    """
+    Caching headers and conditional GET for the public catalog routes.
+
+    Successful GET responses of the routes in ROUTE_POLICIES get the
+    Cache-Control of their policy, so browsers and a CDN in front of the
+    API can reuse them. Responses without an ETag (lists, search results,
+    documents without updated_at) get a weak one hashed from their body;
+    routes that know their document version set it themselves and may
+    answer 304 before touching Mongo. A request whose validators still
+    match gets an empty 304.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        policy = route_policy(scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        cache_control = CACHE_POLICIES[policy]
+        start: Optional[Message] = None
+        parts: List[bytes] = []
+
+        async def send_with_validators(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                if start["status"] not in (200, 304):
+                    await send(start)
+                return
+            if start["status"] not in (200, 304):
+                await send(message)
+                return
+
+            parts.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(parts)
+            headers = MutableHeaders(raw=list(start["headers"]))
+            if cache_control and "cache-control" not in headers:
+                headers["Cache-Control"] = cache_control
+            if "etag" not in headers and start["status"] == 200 and scope["method"] == "GET":
+                headers["ETag"] = body_etag(body)
+
+            status = start["status"]
+            if status == 200 and not_modified(request_headers, headers.get("etag"), headers.get("last-modified")):
+                status, body = 304, b""
+            if status == 304:
+                for name in BODY_HEADERS:
+                    if name in headers:
+                        del headers[name]
+                # The 200 would pass through CompressionMiddleware, which adds
+                # this; caches revalidating an encoded copy need it on the 304 too
+                headers.add_vary_header("Accept-Encoding")
+
+            await send({"type": "http.response.start", "status": status, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_with_validators)
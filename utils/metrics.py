@@ -0,0 +1,144 @@
+import bisect
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# GetFile round trips and time to first byte, in seconds
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Dict[str, str] = None) -> str:
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[LabelValues, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        self.values[self._key(labels)] += amount
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.values.items())
+        ]
+
+
+class GaugeFunc(Metric):
+    """Gauge whose samples are read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], collect: Callable[[], Iterable[Tuple[LabelValues, float]]]):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self.collect()
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self.counts: Dict[LabelValues, List[int]] = {}
+        self.sums: Dict[LabelValues, float] = defaultdict(float)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        counts = self.counts.setdefault(key, [0] * (len(self.buckets) + 1))
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, counts in sorted(self.counts.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, {'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(self.sums[key])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_func(self, name: str, documentation: str, labelnames: Sequence[str], collect) -> GaugeFunc:
+        return self.register(GaugeFunc(name, documentation, labelnames, collect))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+streams_started = registry.counter(
+    "reelnn_streams_started_total", "Streams started", ("client", "dc"))
+stream_bytes = registry.counter(
+    "reelnn_stream_bytes_total", "Bytes served to viewers", ("client", "dc"))
+stream_ttfb = registry.histogram(
+    "reelnn_stream_ttfb_seconds", "Time from stream start to first byte", ("client", "dc"))
+getfile_rtt = registry.histogram(
+    "reelnn_getfile_rtt_seconds", "upload.GetFile round trip time", ("client", "dc"))
+getfile_retries = registry.counter(
+    "reelnn_getfile_retries_total", "upload.GetFile retries after timeouts", ("client", "dc"))
+stream_errors = registry.counter(
+    "reelnn_stream_errors_total", "Streams interrupted by an error", ("client", "dc", "error"))
+stream_failovers = registry.counter(
+    "reelnn_stream_failovers_total", "Streams resumed on another client", ("from_client", "to_client"))
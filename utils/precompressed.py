@@ -0,0 +1,91 @@
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, Optional
+from starlette.requests import Request
+from starlette.responses import Response
+from config import COMPRESS_MIN_SIZE, GZIP_LEVEL, BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:
+    # Optional; without it responses are only offered gzip-encoded
+    brotli = None
+
+
+def compress_variants(body: bytes) -> Dict[str, bytes]:
+    """Encoded copies of `body` by Content-Encoding, empty when too small to be worth it."""
+    if len(body) < COMPRESS_MIN_SIZE:
+        return {}
+    variants = {"gzip": gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return variants
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Parse Accept-Encoding into {coding: q}."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: Optional[str], available) -> Optional[str]:
+    """Preferred available encoding the client accepts (br before gzip), None for identity."""
+    accepted = accepted_encodings(accept_encoding)
+    for coding in ("br", "gzip"):
+        if coding in available and accepted.get(coding, accepted.get("*", 0)) > 0:
+            return coding
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag` (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    strip_weak = lambda tag: tag.strip().removeprefix("W/")
+    return strip_weak(etag) in {strip_weak(tag) for tag in if_none_match.split(",")}
+
+
+class JSONSnapshot:
+    """
+    A JSON payload serialized, hashed and compressed once, served many times.
+
+    The ETag is derived from the body, so rebuilding a cache with unchanged
+    content (or building it in another worker) yields the same ETag and
+    clients keep their copies.
+    """
+
+    def __init__(self, content: Any):
+        # Same encoding as JSONResponse
+        self.body = json.dumps(
+            content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode("utf-8")
+        # Weak: the same tag covers every Content-Encoding of the body
+        self.etag = f'W/"{hashlib.blake2b(self.body, digest_size=12).hexdigest()}"'
+        self.variants = compress_variants(self.body)
+
+    def response(self, request: Request, headers: Optional[Dict[str, str]] = None) -> Response:
+        """Response for `request`: 304 when the client's copy is current, else the best encoding."""
+        headers = {**(headers or {}), "ETag": self.etag, "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=304, headers=headers)
+
+        encoding = choose_encoding(request.headers.get("accept-encoding"), self.variants)
+        if encoding is None:
+            return Response(self.body, media_type="application/json", headers=headers)
+        headers["Content-Encoding"] = encoding
+        return Response(self.variants[encoding], media_type="application/json", headers=headers)
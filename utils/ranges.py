@@ -0,0 +1,143 @@
+import secrets
+from contextlib import aclosing
+from typing import AsyncGenerator, Callable, List, Optional, Tuple, Union
+from utils.exceptions import RangeNotSatisfiable
+from utils.chunk_planner import count_parts
+
+# Guard against clients splitting a file into thousands of tiny ranges
+MAX_RANGES = 16
+# Single ranges up to this size (e.g. bytes=0-1) are treated as player probes
+PROBE_MAX_BYTES = 64 * 1024
+
+ByteRange = Tuple[int, int]
+
+
+def parse_range_header(range_header: Optional[str], file_size: int) -> Optional[List[ByteRange]]:
+    """
+    Parse an RFC 7233 `Range` header into inclusive (start, end) byte ranges.
+
+    Supports `a-b`, open-ended `a-` and suffix `-n` specs, and several
+    comma-separated specs. Overlapping or adjacent ranges are coalesced.
+
+    Args:
+        range_header: Raw header value, or None when absent
+        file_size: Size of the selected representation
+
+    Returns:
+        List of satisfiable ranges, or None when the header should be ignored
+        (absent, other unit or malformed) and the full file served
+
+    Raises:
+        RangeNotSatisfiable: When no spec overlaps the file
+    """
+    if not range_header:
+        return None
+
+    unit, _, specs = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not specs.strip():
+        return None
+
+    ranges = []
+    for spec in specs.split(","):
+        spec = spec.strip()
+        if not spec:
+            continue
+        first, sep, last = spec.partition("-")
+        first, last = first.strip(), last.strip()
+        if not sep or not (first.isdigit() or last.isdigit()):
+            return None
+        if (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+
+        if not first:
+            suffix = int(last)
+            if suffix == 0 or file_size == 0:
+                continue
+            start, end = max(0, file_size - suffix), file_size - 1
+        else:
+            start = int(first)
+            if last and int(last) < start:
+                return None
+            if start >= file_size:
+                continue
+            end = int(last) if last else file_size - 1
+            end = min(end, file_size - 1)
+        ranges.append((start, end))
+
+    if not ranges:
+        raise RangeNotSatisfiable
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+
+    if len(merged) > MAX_RANGES:
+        # Too fragmented to be worth it, serve the covering range instead
+        merged = [(merged[0][0], merged[-1][1])]
+    return merged
+
+
+def probe_range(ranges: Optional[List[ByteRange]]) -> Optional[ByteRange]:
+    """The range of a probe request, or None if `ranges` asks for more than a probe."""
+    if not ranges or len(ranges) != 1:
+        return None
+    start, end = ranges[0]
+    return ranges[0] if end - start + 1 <= PROBE_MAX_BYTES else None
+
+
+def plan_parts(from_bytes: int, until_bytes: int, chunk_size: int) -> Tuple[int, int, int, int]:
+    """
+    Map an inclusive byte range onto chunk-aligned GetFile parts.
+
+    Returns:
+        Tuple of (offset, first_part_cut, last_part_cut, part_count)
+    """
+    offset = from_bytes - (from_bytes % chunk_size)
+    first_part_cut = from_bytes - offset
+    last_part_cut = until_bytes % chunk_size + 1
+    part_count = count_parts(from_bytes, until_bytes, chunk_size)
+    return offset, first_part_cut, last_part_cut, part_count
+
+
+class MultipartByteranges:
+    """Framing for a `multipart/byteranges` body over several ranges of one file."""
+
+    def __init__(self, ranges: List[ByteRange], file_size: int, content_type: str):
+        self.ranges = ranges
+        self.file_size = file_size
+        self.content_type = content_type
+        self.boundary = secrets.token_hex(16)
+
+    @property
+    def media_type(self) -> str:
+        return f"multipart/byteranges; boundary={self.boundary}"
+
+    def part_header(self, start: int, end: int) -> bytes:
+        return (
+            f"--{self.boundary}\r\n"
+            f"Content-Type: {self.content_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{self.file_size}\r\n\r\n"
+        ).encode()
+
+    def closing(self) -> bytes:
+        return f"--{self.boundary}--\r\n".encode()
+
+    def content_length(self) -> int:
+        length = len(self.closing())
+        for start, end in self.ranges:
+            length += len(self.part_header(start, end)) + (end - start + 1) + 2
+        return length
+
+    async def body(self, stream_range: Callable[[int, int], AsyncGenerator[Union[bytes, memoryview], None]]) -> AsyncGenerator[Union[bytes, memoryview], None]:
+        for start, end in self.ranges:
+            yield self.part_header(start, end)
+            async with aclosing(stream_range(start, end)) as chunks:
+                async for chunk in chunks:
+                    yield chunk
+            yield b"\r\n"
+        yield self.closing()
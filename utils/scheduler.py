@@ -0,0 +1,162 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from pyrogram.errors import FloodWait, FileReferenceExpired
+from state import multi_clients
+from config import SCHEDULER_COOLDOWN, SCHEDULER_DC_HINTS
+
+LOGGER = logging.getLogger(__name__)
+
+# Assumed throughput for a client with no samples yet (bytes/sec)
+DEFAULT_THROUGHPUT = 2 * 1024 * 1024
+# Parts smaller than this mostly measure latency, not bandwidth (the planner
+# sends 4 KiB probe parts), so they only update the RTT estimate
+MIN_THROUGHPUT_SAMPLE = 256 * 1024
+# Extra time charged to a client that still has to authorize a media session for the DC
+SESSION_SETUP_PENALTY = 2.0
+
+
+class ClientState:
+    """Rolling health and throughput figures for a single streaming client."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.ewma_bps = 0.0
+        self.ewma_rtt = 0.0
+        self.active_streams = 0
+        self.bytes_served = 0
+        self.errors = 0
+        self.cooldown_until = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def throughput(self) -> float:
+        return self.ewma_bps or DEFAULT_THROUGHPUT
+
+    def in_cooldown(self, now: float) -> bool:
+        return self.cooldown_until > now
+
+    def as_dict(self, now: float) -> dict:
+        client = multi_clients.get(self.index)
+        media_sessions = getattr(client, "media_sessions", {}) if client else {}
+        return {
+            "index": self.index,
+            "ewma_bps": round(self.ewma_bps, 2),
+            "ewma_rtt": round(self.ewma_rtt, 4),
+            "active_streams": self.active_streams,
+            "bytes_served": self.bytes_served,
+            "errors": self.errors,
+            "cooldown_remaining": round(max(0.0, self.cooldown_until - now), 2),
+            "last_error": self.last_error,
+            "media_session_dcs": sorted(media_sessions.keys()),
+        }
+
+
+class ClientScheduler:
+    """
+    Route new streams to the client with the lowest expected completion time.
+
+    Each client's cost is the time to move the requested bytes at its EWMA
+    throughput, shared with the streams it is already serving, plus a penalty
+    when it has no media session for the file's DC yet. Clients cooling down
+    after FloodWait or repeated timeouts are skipped while others are usable.
+    """
+
+    def __init__(self, alpha: float = 0.2, cooldown: float = SCHEDULER_COOLDOWN, max_dc_hints: int = SCHEDULER_DC_HINTS):
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.clients: Dict[int, ClientState] = {}
+        self.max_dc_hints = max_dc_hints
+        self.dc_hints: "OrderedDict[tuple, int]" = OrderedDict()
+
+    def state(self, index: int) -> ClientState:
+        if index not in self.clients:
+            self.clients[index] = ClientState(index)
+        return self.clients[index]
+
+    def expected_completion(self, index: int, expected_bytes: int, dc_id: Optional[int] = None) -> float:
+        state = self.state(index)
+        cost = (state.active_streams + 1) * expected_bytes / state.throughput
+        if dc_id is not None:
+            client = multi_clients.get(index)
+            if client is not None and dc_id not in client.media_sessions:
+                cost += SESSION_SETUP_PENALTY
+        return cost
+
+    def pick(self, expected_bytes: int = 1024 * 1024, dc_id: Optional[int] = None) -> Optional[int]:
+        if not multi_clients:
+            return None
+        now = time.monotonic()
+        candidates = [i for i in multi_clients if not self.state(i).in_cooldown(now)]
+        if not candidates:
+            # Everyone is cooling down, use whoever recovers first
+            return min(multi_clients, key=lambda i: self.state(i).cooldown_until)
+        return min(candidates, key=lambda i: self.expected_completion(i, expected_bytes, dc_id))
+
+    def stream_started(self, index: int) -> None:
+        self.state(index).active_streams += 1
+
+    def stream_finished(self, index: int) -> None:
+        state = self.state(index)
+        state.active_streams = max(0, state.active_streams - 1)
+
+    def record_sample(self, index: int, size: int, seconds: float) -> None:
+        if seconds <= 0 or size <= 0:
+            return
+        state = self.state(index)
+        if size >= MIN_THROUGHPUT_SAMPLE:
+            sample = size / seconds
+            state.ewma_bps = sample if not state.ewma_bps else (
+                self.alpha * sample + (1 - self.alpha) * state.ewma_bps
+            )
+        state.ewma_rtt = seconds if not state.ewma_rtt else (
+            self.alpha * seconds + (1 - self.alpha) * state.ewma_rtt
+        )
+        state.bytes_served += size
+
+    def measurements(self, index: int) -> Tuple[Optional[float], Optional[float]]:
+        """Measured (rtt, throughput) of a client, None until it has served a part."""
+        state = self.state(index)
+        return state.ewma_rtt or None, state.ewma_bps or None
+
+    def record_error(self, index: int, error: Exception) -> None:
+        state = self.state(index)
+        state.errors += 1
+        state.last_error = f"{type(error).__name__}: {error}"
+        if isinstance(error, FileReferenceExpired):
+            # Not the client's fault, the FileId only needs to be re-resolved
+            return
+        if isinstance(error, FloodWait):
+            penalty = float(error.value)
+        elif isinstance(error, TimeoutError):
+            penalty = self.cooldown
+        else:
+            penalty = self.cooldown / 6
+        state.cooldown_until = max(state.cooldown_until, time.monotonic() + penalty)
+        LOGGER.warning(f"Client {index} cooling down for {penalty:.0f}s after {state.last_error}")
+
+    def remember_dc(self, chat_id: int, message_id: int, dc_id: int) -> None:
+        key = (chat_id, message_id)
+        self.dc_hints[key] = dc_id
+        self.dc_hints.move_to_end(key)
+        while len(self.dc_hints) > self.max_dc_hints:
+            self.dc_hints.popitem(last=False)
+
+    def dc_hint(self, chat_id: int, message_id: int) -> Optional[int]:
+        key = (chat_id, message_id)
+        dc_id = self.dc_hints.get(key)
+        if dc_id is not None:
+            self.dc_hints.move_to_end(key)
+        return dc_id
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {
+            "clients": [self.state(i).as_dict(now) for i in sorted(multi_clients)],
+            "default_throughput": DEFAULT_THROUGHPUT,
+            "cooldown": self.cooldown,
+        }
+
+
+client_scheduler = ClientScheduler()
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import random
+from typing import Iterable, List
+from pyrogram import raw
+from state import multi_clients
+from config import SESSION_HEALTH_INTERVAL
+from utils.custom_dl import get_streamer
+from utils.db_utils.registry import get_file_db
+from utils.db_utils.executor import run_db
+
+LOGGER = logging.getLogger(__name__)
+
+PING_TIMEOUT = 10
+
+
+async def catalog_dc_ids() -> List[int]:
+    """DCs referenced by stored catalog files, plus every client's home DC."""
+    dc_ids = set(await run_db(lambda: get_file_db().distinct_dc_ids()))
+    for client in multi_clients.values():
+        try:
+            dc_ids.add(await client.storage.dc_id())
+        except Exception:
+            pass
+    return sorted(dc_ids)
+
+
+async def warm_media_sessions(dc_ids: Iterable[int]) -> None:
+    """Create and authorize a media session on every client for every DC."""
+    jobs = {
+        (index, dc_id): get_streamer(index).get_media_session(dc_id)
+        for index in list(multi_clients)
+        for dc_id in dc_ids
+    }
+    results = await asyncio.gather(*jobs.values(), return_exceptions=True)
+    failed = 0
+    for (index, dc_id), result in zip(jobs, results):
+        if isinstance(result, Exception):
+            failed += 1
+            LOGGER.warning(f"Failed to warm media session for client {index} on DC {dc_id}: {result}")
+    LOGGER.info(f"Warmed {len(jobs) - failed}/{len(jobs)} media sessions")
+
+
+async def check_media_sessions() -> None:
+    """Ping every media session and rebuild the ones that stopped answering."""
+    for index, client in list(multi_clients.items()):
+        for dc_id, session in list(client.media_sessions.items()):
+            try:
+                await asyncio.wait_for(
+                    session.send(raw.functions.Ping(ping_id=random.getrandbits(63))),
+                    timeout=PING_TIMEOUT,
+                )
+                continue
+            except Exception as e:
+                LOGGER.warning(f"Media session for client {index} on DC {dc_id} is unhealthy: {e}")
+
+            if client.media_sessions.get(dc_id) is session:
+                del client.media_sessions[dc_id]
+            try:
+                await session.stop()
+            except Exception:
+                pass
+            try:
+                await get_streamer(index).get_media_session(dc_id)
+            except Exception as e:
+                LOGGER.error(f"Failed to rebuild media session for client {index} on DC {dc_id}: {e}")
+
+
+async def start_session_warmer() -> None:
+    """Pre-warm media sessions after startup, then health-check them periodically."""
+    try:
+        await warm_media_sessions(await catalog_dc_ids())
+    except Exception as e:
+        LOGGER.error(f"Media session warm-up failed: {str(e)}")
+
+    while True:
+        try:
+            await asyncio.sleep(SESSION_HEALTH_INTERVAL)
+            await check_media_sessions()
+        except asyncio.CancelledError:
+            LOGGER.info("Session warmer task cancelled")
+            break
+        except Exception as e:
+            LOGGER.error(f"Error in session health check: {str(e)}")
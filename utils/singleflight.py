@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one in-flight task.
+
+    The first caller starts the work, later callers await the same task and
+    receive the same result (or exception). The task is shielded, so a caller
+    going away (e.g. a viewer closing the player) does not cancel the fetch
+    for everyone else waiting on it; it is only cancelled once the last
+    caller waiting on it has gone away.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.calls = 0
+        self.shared = 0
+        self.abandoned = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.shared += 1
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # Nobody is left to use the result; later callers start afresh
+                    self.abandoned += 1
+                    if self._inflight.get(key) is task:
+                        del self._inflight[key]
+                    task.cancel()
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every waiter has gone away
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._inflight), "calls": self.calls, "shared": self.shared, "abandoned": self.abandoned}
@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Optional, Union
+from utils.exceptions import StreamLimitExceeded
+from config import (
+    STREAM_MAX_ACTIVE,
+    STREAM_USER_LIMIT,
+    STREAM_TOKEN_LIMIT,
+    STREAM_USER_BANDWIDTH_KB,
+    STREAM_TOKEN_BANDWIDTH_KB,
+    STREAM_QUEUE_TIMEOUT,
+    STREAM_TRUSTED_PROXIES,
+)
+
+# Claims a stream token may carry to identify the viewer
+USER_CLAIMS = ("userId", "user_id", "uid", "sub")
+
+
+def forwarded_client(forwarded_for: Optional[str], trusted_proxies: int = STREAM_TRUSTED_PROXIES) -> Optional[str]:
+    """
+    Client address from X-Forwarded-For, as seen by the outermost trusted proxy.
+
+    Entries left of that one are supplied by the client and can be forged,
+    so the header is ignored entirely unless trusted_proxies is configured.
+    """
+    if trusted_proxies <= 0 or not forwarded_for:
+        return None
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    if len(hops) < trusted_proxies:
+        return None
+    return hops[-trusted_proxies]
+
+
+def stream_identity(token: str, token_data: dict, forwarded_for: Optional[str] = None) -> tuple:
+    """
+    (user key, token key) used for limiting a stream request.
+
+    The user is taken from a user claim of the token. Tokens without one are
+    grouped by client address when X-Forwarded-For is trusted, and otherwise
+    count as their own user: the peer address is usually the platform's
+    router, which would put every viewer into one group.
+    """
+    token_key = hashlib.sha1(token.encode()).hexdigest()[:16]
+    for claim in USER_CLAIMS:
+        if token_data.get(claim) is not None:
+            return f"user:{token_data[claim]}", token_key
+    client = forwarded_client(forwarded_for)
+    if client is not None:
+        return f"ip:{client}", token_key
+    return f"token:{token_key}", token_key
+
+
+class TokenBucket:
+    """Byte rate limiter; a sender going over its budget sleeps off the debt."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or rate
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    async def consume(self, size: int) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= size
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class StreamLease:
+    """An admitted stream; holds its concurrency slot until released."""
+
+    def __init__(self, limiter: "StreamLimiter", user: str, token: str):
+        self.limiter = limiter
+        self.user = user
+        self.token = token
+        self.released = False
+
+    async def throttle(self, size: int) -> None:
+        for bucket in (self.limiter.user_buckets.get(self.user), self.limiter.token_buckets.get(self.token)):
+            if bucket is not None:
+                await bucket.consume(size)
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self.limiter.release(self)
+
+
+class LimitedStream:
+    """
+    Wrap a response body so it is paced by the lease's bandwidth caps and
+    releases the lease when closed, even if it was never iterated.
+    """
+
+    def __init__(self, body: AsyncIterator[Union[bytes, memoryview]], lease: StreamLease):
+        self.body = body
+        self.lease = lease
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Union[bytes, memoryview]:
+        try:
+            chunk = await self.body.__anext__()
+        except BaseException:
+            self.lease.release()
+            raise
+        await self.lease.throttle(len(chunk))
+        return chunk
+
+    async def aclose(self) -> None:
+        try:
+            aclose = getattr(self.body, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        finally:
+            self.lease.release()
+
+
+class StreamLimiter:
+    """
+    Per-user and per-token stream admission with fair-share queuing.
+
+    A stream is admitted while its user and token are under their concurrency
+    caps and the process is under STREAM_MAX_ACTIVE (0 means unlimited).
+    Otherwise it waits. Whenever a slot frees up, it goes to the waiting user
+    with the fewest active streams rather than to whoever queued first, so
+    one viewer opening many connections cannot starve the others. A waiter
+    that is not admitted within STREAM_QUEUE_TIMEOUT is rejected.
+    """
+
+    def __init__(
+        self,
+        max_active: int = STREAM_MAX_ACTIVE,
+        per_user: int = STREAM_USER_LIMIT,
+        per_token: int = STREAM_TOKEN_LIMIT,
+        user_rate: float = STREAM_USER_BANDWIDTH_KB * 1024,
+        token_rate: float = STREAM_TOKEN_BANDWIDTH_KB * 1024,
+        queue_timeout: float = STREAM_QUEUE_TIMEOUT,
+    ):
+        self.max_active = max_active
+        self.per_user = per_user
+        self.per_token = per_token
+        self.user_rate = user_rate
+        self.token_rate = token_rate
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        # Only keys with active streams are kept, so waiters that give up leave nothing behind
+        self.user_active: Dict[str, int] = {}
+        self.token_active: Dict[str, int] = {}
+        self.user_buckets: Dict[str, TokenBucket] = {}
+        self.token_buckets: Dict[str, TokenBucket] = {}
+        self.waiters: Dict[str, Deque[tuple]] = {}
+        self.rejected = 0
+
+    def _admissible(self, user: str, token: str) -> bool:
+        if self.max_active and self.active >= self.max_active:
+            return False
+        if self.per_user and self.user_active.get(user, 0) >= self.per_user:
+            return False
+        if self.per_token and self.token_active.get(token, 0) >= self.per_token:
+            return False
+        return True
+
+    def _admit(self, user: str, token: str) -> StreamLease:
+        self.active += 1
+        self.user_active[user] = self.user_active.get(user, 0) + 1
+        self.token_active[token] = self.token_active.get(token, 0) + 1
+        if self.user_rate and user not in self.user_buckets:
+            self.user_buckets[user] = TokenBucket(self.user_rate)
+        if self.token_rate and token not in self.token_buckets:
+            self.token_buckets[token] = TokenBucket(self.token_rate)
+        return StreamLease(self, user, token)
+
+    def _dispatch(self) -> None:
+        while True:
+            candidates = [
+                user for user, queue in self.waiters.items()
+                if self._admissible(user, queue[0][0])
+            ]
+            if not candidates:
+                return
+            user = min(candidates, key=lambda u: (self.user_active.get(u, 0), self.waiters[u][0][2]))
+            token, future, _ = self.waiters[user].popleft()
+            if not self.waiters[user]:
+                del self.waiters[user]
+            if not future.done():
+                future.set_result(self._admit(user, token))
+
+    async def acquire(self, user: str, token: str) -> StreamLease:
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(user, deque()).append((token, future, time.monotonic()))
+        self._dispatch()
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Admitted just as we gave up; hand the slot back
+                future.result().release()
+            else:
+                future.cancel()
+                self._forget(user, future)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected += 1
+            raise StreamLimitExceeded
+
+    def _forget(self, user: str, future: asyncio.Future) -> None:
+        queue = self.waiters.get(user)
+        if queue is None:
+            return
+        self.waiters[user] = deque(entry for entry in queue if entry[1] is not future)
+        if not self.waiters[user]:
+            del self.waiters[user]
+
+    def release(self, lease: StreamLease) -> None:
+        self.active -= 1
+        for counts, buckets, key in (
+            (self.user_active, self.user_buckets, lease.user),
+            (self.token_active, self.token_buckets, lease.token),
+        ):
+            counts[key] -= 1
+            if counts[key] <= 0:
+                del counts[key]
+                buckets.pop(key, None)
+        self._dispatch()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "users": len(self.user_active),
+            "waiting": sum(len(queue) for queue in self.waiters.values()),
+            "rejected": self.rejected,
+            "max_active": self.max_active,
+            "per_user": self.per_user,
+            "per_token": self.per_token,
+        }
+
+
+stream_limiter = StreamLimiter()
@@ -0,0 +1,83 @@
+import asyncio
+from typing import AsyncIterable, Mapping, Optional, Union
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+Chunk = Union[bytes, memoryview]
+
+
+class DirectStreamingResponse(Response):
+    """
+    Streaming response that hands each chunk straight to the ASGI send channel.
+
+    Unlike StreamingResponse it never re-encodes or copies chunks, so the
+    memoryview slices produced by ByteStreamer.yield_file reach the transport
+    as they are (uvicorn writes any bytes-like body). Client disconnects are
+    watched by a single receive task; once it fires, the body iterator is
+    closed so no further parts are fetched from Telegram.
+    """
+
+    def __init__(
+        self,
+        content: AsyncIterable[Chunk],
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        background: Optional[BackgroundTask] = None,
+    ):
+        self.body_iterator = content
+        self.status_code = status_code
+        self.media_type = self.media_type if media_type is None else media_type
+        self.background = background
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        next_chunk: Optional[asyncio.Future] = None
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            })
+            chunks = self.body_iterator.__aiter__()
+            while True:
+                # Race every part against the disconnect, so a viewer leaving
+                # while a part is still being fetched stops the stream at once
+                next_chunk = asyncio.ensure_future(chunks.__anext__())
+                await asyncio.wait({next_chunk, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnected.done():
+                    if not next_chunk.done():
+                        next_chunk.cancel()
+                        await asyncio.wait({next_chunk})
+                    break
+                try:
+                    chunk = next_chunk.result()
+                except StopAsyncIteration:
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+                    break
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        except OSError:
+            # The transport went away mid-write; nothing left to tell the client
+            pass
+        finally:
+            disconnected.cancel()
+            if next_chunk is not None and not next_chunk.done():
+                # Cancelled from outside mid-fetch; the generator can only be
+                # closed once that step has unwound
+                next_chunk.cancel()
+                await asyncio.wait({next_chunk})
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+        if self.background is not None:
+            await self.background()
+
+    @staticmethod
+    async def _wait_for_disconnect(receive: Receive) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+from utils.singleflight import SingleFlight
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache with per-entry TTL and stale-while-revalidate.
+
+    An entry is fresh for `ttl` seconds after it was loaded. For a further
+    `stale_ttl` seconds it is still served, and the first hit schedules one
+    background reload through the cache's own single-flight group. Entries
+    older than that are reloaded in the foreground. Loads for the same key are
+    collapsed, and entries expire individually, so there is no moment when the
+    whole cache goes cold at once. A background reload raising one of
+    `evict_on` drops the entry; any other failure keeps serving it until it
+    expires for good.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, stale_ttl: float = 0.0, evict_on: Tuple[type, ...] = ()):
+        self.max_entries = max_entries
+        self.evict_on = evict_on
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._loads = SingleFlight()
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _age(self, key: Hashable) -> Optional[float]:
+        entry = self._entries.get(key)
+        return None if entry is None else time.monotonic() - entry[0]
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a fresh or stale entry without loading it, or None."""
+        age = self._age(key)
+        if age is None:
+            return None
+        if age > self.ttl + self.stale_ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key][1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached value for `key`, loading it with `loader` when missing
+        or expired. A stale value is returned immediately while `loader`
+        refreshes it in the background.
+        """
+        value = self.get(key)
+        if value is not None:
+            if self._age(key) <= self.ttl:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._schedule_refresh(key, loader)
+            return value
+
+        self.misses += 1
+        return await self._loads.do(key, lambda: self._load(key, loader))
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def _schedule_refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = asyncio.ensure_future(self._refresh(key, loader))
+        task.add_done_callback(lambda t: self._refreshing.discard(key))
+
+    async def _refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            await self._loads.do(key, lambda: self._load(key, loader))
+        except Exception as e:
+            if isinstance(e, self.evict_on):
+                self.pop(key)
+            LOGGER.debug(f"Background refresh of {key} failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refreshing": len(self._refreshing),
+        }
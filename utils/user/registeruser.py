@@ -1,13 +1,13 @@
 from datetime import datetime
 from typing import Dict, Any
-from utils.db_utils.user_db import UserDatabase
+from utils.db_utils.registry import get_user_db
 from utils.models.user_model import UserSchema
 from pyrogram.types import User
 
 
 class UserRegistrationHandler:
     def __init__(self):
-        self.user_db = UserDatabase()
+        self.user_db = get_user_db()
 
     def register_user_from_telegram(self, telegram_user: User) -> Dict[str, Any]:
         """
@@ -1,6 +1,3 @@
-from config import PORT
-
-
 def get_app():
     from web.main import app
 
@@ -9,6 +6,7 @@ def get_app():
 
 async def serve():
     import uvicorn
+    from config import PORT
     from web.main import app
 
     config = uvicorn.Config(app, host="0.0.0.0", port=PORT)
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+from typing import Dict, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+# Seconds a worker gets to finish in-flight streams after SIGTERM
+STOP_TIMEOUT = 15
+
+
+def worker_tokens(worker_index: int, worker_count: int) -> Dict[int, str]:
+    """
+    Streaming tokens owned by one worker.
+
+    MULTI_TOKENS are dealt out round-robin so every token is logged in by
+    exactly one worker. A worker left without one streams through its own
+    no-updates session of BOT_TOKEN.
+    """
+    from config import MULTI_TOKENS, BOT_TOKEN
+
+    tokens = {
+        client_id: token
+        for position, (client_id, token) in enumerate(sorted(MULTI_TOKENS.items()))
+        if token and position % worker_count == worker_index
+    }
+    return tokens or {0: BOT_TOKEN}
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+async def run_worker(worker_index: int, worker_count: int, sock: socket.socket) -> None:
+    import uvicorn
+    from app import start_client
+    from state import multi_clients
+    from utils import cache_manager
+    from utils.session_warmer import start_session_warmer
+    from web.main import app
+
+    clients = await asyncio.gather(*(
+        start_client(client_id, token)
+        for client_id, token in worker_tokens(worker_index, worker_count).items()
+    ))
+    multi_clients.update({client_id: client for client_id, client in filter(None, clients)})
+    LOGGER.info(f"Web worker {worker_index} streaming with clients {sorted(multi_clients)}")
+
+    # Catalog caches and media sessions are per process
+    tasks = [
+        asyncio.create_task(cache_manager.start_cache_updater()),
+        asyncio.create_task(start_session_warmer()),
+    ]
+    server = uvicorn.Server(uvicorn.Config(app, timeout_graceful_shutdown=STOP_TIMEOUT))
+    try:
+        await server.serve(sockets=[sock])
+    finally:
+        for task in tasks:
+            task.cancel()
+        for client_id, client in multi_clients.items():
+            try:
+                await client.stop()
+            except Exception as e:
+                LOGGER.error(f"Error stopping client {client_id} in web worker {worker_index}: {e}")
+
+
+def worker_environment(worker_index: int, worker_count: int) -> Dict[str, str]:
+    """
+    Environment overrides of one worker.
+
+    Each worker keeps its own slice of the chunk cache so their LRU
+    bookkeeping (and cleanup of half-written parts) never fights over the
+    same files. These have to be in the environment the process is spawned
+    with: the child imports config, and builds utils.chunk_cache from it,
+    while re-importing the main module, before worker_main runs.
+    """
+    from config import CHUNK_CACHE_DIR, CHUNK_CACHE_SIZE_MB
+
+    return {
+        "CHUNK_CACHE_DIR": os.path.join(CHUNK_CACHE_DIR, f"worker-{worker_index}"),
+        "CHUNK_CACHE_SIZE_MB": str(CHUNK_CACHE_SIZE_MB // worker_count),
+        "WEB_WORKER_INDEX": str(worker_index),
+    }
+
+
+def worker_main(worker_index: int, worker_count: int, sock: socket.socket) -> None:
+    """Entry point of a spawned web worker process."""
+    asyncio.run(run_worker(worker_index, worker_count, sock))
+
+
+class WebCluster:
+    """Runs the FastAPI app in several processes sharing one listening socket."""
+
+    def __init__(self, worker_count: int, host: str = "0.0.0.0", port: Optional[int] = None):
+        from config import PORT
+
+        self.worker_count = worker_count
+        self.host = host
+        self.port = port or PORT
+        self.sock: Optional[socket.socket] = None
+        self.processes: List[multiprocessing.Process] = []
+        self.stopping = False
+
+    def spawn(self, worker_index: int) -> multiprocessing.Process:
+        process = multiprocessing.get_context("spawn").Process(
+            target=worker_main,
+            args=(worker_index, self.worker_count, self.sock),
+            name=f"web-worker-{worker_index}",
+            daemon=True,
+        )
+        # The spawned interpreter inherits os.environ as it is at start();
+        # the parent's own config was loaded long ago, so swapping is safe
+        overrides = worker_environment(worker_index, self.worker_count)
+        saved = {name: os.environ.get(name) for name in overrides}
+        os.environ.update(overrides)
+        try:
+            process.start()
+        finally:
+            for name, value in saved.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+        return process
+
+    def start(self) -> None:
+        self.sock = bind_socket(self.host, self.port)
+        self.processes = [self.spawn(worker_index) for worker_index in range(self.worker_count)]
+        LOGGER.info(f"Started {self.worker_count} web workers on {self.host}:{self.port}")
+
+    async def supervise(self, interval: float = 5.0) -> None:
+        """Restart workers that died unexpectedly."""
+        while not self.stopping:
+            await asyncio.sleep(interval)
+            if self.stopping:
+                break
+            for worker_index, process in enumerate(self.processes):
+                if process.is_alive():
+                    continue
+                LOGGER.error(f"Web worker {worker_index} exited with code {process.exitcode}, restarting")
+                self.processes[worker_index] = self.spawn(worker_index)
+
+    async def stop(self) -> None:
+        self.stopping = True
+        loop = asyncio.get_running_loop()
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            await loop.run_in_executor(None, process.join, STOP_TIMEOUT + 5)
+            if process.is_alive():
+                process.kill()
+        if self.sock is not None:
+            self.sock.close()
+        LOGGER.info("Web workers stopped")
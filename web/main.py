@@ -1,39 +1,51 @@
 from typing import List, Optional
 from fastapi import FastAPI, Query, Request, HTTPException, Form, Depends
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from utils.db_utils.config_db import ConfigDatabase
+from utils.db_utils.registry import get_movie_db, get_show_db, get_user_db, get_config_db, index_usage_report
 import jwt
 from fastapi.security import APIKeyQuery
-from datetime import datetime
-from fastapi.staticfiles import StaticFiles
+from datetime import datetime, timezone
+from web.precompress import PrecompressedStaticFiles, precompress_assets, precompressed_file_response
 from utils.api.search_results import get_cached_search_results
-from utils.api.hero_slider import get_hero_slider_items
 from utils.api.get_latest import get_latest_entries
-from utils.api.getMovieDetails import get_movie_details
-from utils.api.getShowDetalis import get_show_details
+from utils.api.getMovieDetails import get_movie_details, MOVIE_DETAIL_FIELDS
+from utils.api.getShowDetalis import get_show_details, get_season_episodes, SHOW_DETAIL_FIELDS, SHOW_COMPUTED_FIELDS
 from utils.api.pagination import get_paginated_entries
 from utils.api.get_trending import get_trending_entries
 from utils.api.get_simillar import get_similar_by_genre
-from utils.cache_manager import update_trending_cache
+from utils.cache_manager import (
+    update_trending_cache,
+    refresh_snapshots,
+    hero_slider_snapshot,
+    latest_snapshot,
+    trending_snapshot,
+)
 from pathlib import Path
-from state import work_loads, multi_clients
+from state import work_loads, multi_clients, active_streams
 from app import LOGGER
-from utils.exceptions import InvalidHash
-from utils.custom_dl import ByteStreamer
-import math
-import secrets
-import mimetypes
+from utils.exceptions import InvalidHash, RangeNotSatisfiable, StreamLimitExceeded
+from utils.ranges import parse_range_header, plan_parts, probe_range, MultipartByteranges
+from utils.chunk_planner import choose_chunk_size
+from utils.file_index import file_index
+from utils.streaming_response import DirectStreamingResponse
+from utils.stream_limiter import stream_limiter, stream_identity, LimitedStream
+from utils import metrics
+from utils.custom_dl import inflight_chunks, stream_with_failover, get_streamer, class_cache, file_properties_cache
+from utils.chunk_cache import chunk_cache
+from utils.scheduler import client_scheduler
 from fastapi.responses import StreamingResponse
 from config import SITE_SECRET
 import time
 from web.auth import verify_token, authenticate_user
 from contextlib import asynccontextmanager
 import asyncio
-from utils.db_utils.user_db import UserDatabase
+from utils.db_utils.executor import run_db
+from utils.cache_events import catalog_events
+from utils.compression import CompressionMiddleware
+from utils.http_cache import HTTPCacheMiddleware, is_conditional, not_modified, version_headers
 
 app = FastAPI()
-class_cache = {}
 token_query = APIKeyQuery(name="token", auto_error=False)
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -43,7 +55,9 @@ static_dir.mkdir(exist_ok=True)
 templates_dir = BASE_DIR / "templates"
 templates_dir.mkdir(exist_ok=True)
 
-app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
+# Only rewrites copies older than their asset; the Docker build has normally done this already
+precompress_assets([static_dir, templates_dir])
+app.mount("/static", PrecompressedStaticFiles(directory=str(static_dir)), name="static")
 
 app.add_middleware(
     CORSMiddleware,
@@ -52,6 +66,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(HTTPCacheMiddleware)
+# Added last so it wraps HTTPCacheMiddleware, which still hashes the plain body
+app.add_middleware(CompressionMiddleware)
 
 
 @asynccontextmanager
@@ -94,10 +111,11 @@ async def login(username: str = Form(...), password: str = Form(...)):
     
 
 @app.api_route("/", methods=["GET", "HEAD"], response_class=HTMLResponse)
-async def get_index():
+async def get_index(request: Request):
     """Serve the admin interface for managing trending content"""
-    with open(templates_dir / "index.html") as f:
-        return HTMLResponse(content=f.read())
+    return precompressed_file_response(
+        templates_dir / "index.html", request.headers.get("accept-encoding"), media_type="text/html"
+    )
 
 
 @app.get("/api/v1/auth-check")
@@ -108,12 +126,11 @@ async def auth_check(token_data: dict = Depends(verify_token)):
 
 @app.get("/api/v1/heroslider")
 async def get_hero_slider(request: Request):
-    items = get_hero_slider_items()
-    return JSONResponse(content=items)
+    return hero_slider_snapshot().response(request)
 
 
 @app.get("/api/v1/getlatest/{media_type}")
-async def get_latest(media_type: str, limit: int = Query(21, gt=0)):
+async def get_latest(request: Request, media_type: str, limit: int = Query(21, gt=0)):
     """
     Get the most recently added movie or show entries from the database.
 
@@ -124,43 +141,125 @@ async def get_latest(media_type: str, limit: int = Query(21, gt=0)):
     Returns:
         List of movie or show dictionaries or error dict
     """
+    if media_type.lower() in ("movie", "show"):
+        # The list holds at most 21 entries, so larger limits share one payload
+        return latest_snapshot(media_type.lower(), min(limit, 21)).response(request)
     items = get_latest_entries(media_type, limit)
 
     return JSONResponse(content=items)
 
 
+def parse_fields(fields: Optional[str], allowed) -> Optional[List[str]]:
+    """Split a comma-separated fields= parameter, rejecting unknown names with 400."""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested or None
+
+
+async def revalidate_document(request: Request, kind: str, find, doc_id: str, variant) -> Optional[Response]:
+    """
+    Answer a conditional request from the document's updated_at alone.
+
+    Returns:
+        A 304 response when the client's copy is current, otherwise None
+    """
+    if not is_conditional(request.headers):
+        return None
+    current = await run_db(find, doc_id, {"_id": 0, "updated_at": 1})
+    if not current or not current.get("updated_at"):
+        return None
+    headers = version_headers(kind, doc_id, current["updated_at"], variant)
+    if not_modified(request.headers, headers["ETag"], headers["Last-Modified"]):
+        return Response(status_code=304, headers=headers)
+    return None
+
+
+def document_response(details: dict, kind: str, doc_id: str, variant) -> JSONResponse:
+    updated_at = details.pop("updated_at", None)
+    headers = version_headers(kind, doc_id, updated_at, variant) if updated_at else None
+    return JSONResponse(content=details, headers=headers)
+
+
 @app.get("/api/v1/getMovieDetails/{mid}")
-async def getmovie_details(mid: str):
+async def getmovie_details(
+    request: Request,
+    mid: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (default: all)"),
+):
     """
     Get movie details by movie ID (mid).
 
     Args:
         mid: The movie ID to look up
+        fields: Optional comma-separated subset of fields to return
 
     Returns:
         Dictionary containing the requested movie fields or an error message
     """
-    details = get_movie_details(mid)
+    requested = parse_fields(fields, MOVIE_DETAIL_FIELDS)
+    not_modified_response = await revalidate_document(
+        request, "movie", get_movie_db().find_movie_by_id, mid, requested or ()
+    )
+    if not_modified_response is not None:
+        return not_modified_response
+
+    details = await run_db(get_movie_details, mid, requested)
     if not details:
         raise HTTPException(status_code=404, detail="Movie not found")
-    return JSONResponse(content=details)
+    return document_response(details, "movie", mid, requested or ())
 
 
 @app.get("/api/v1/getShowDetails/{sid}")
-async def getshow_details(sid: str):
+async def getshow_details(
+    request: Request,
+    sid: str,
+    fields: Optional[str] = Query(
+        None, description="Comma-separated fields to return (default: all); 'seasons' gives episode counts only"
+    ),
+):
     """
     Get show details by show ID (sid).
 
     Args:
         sid: The show ID to look up
+        fields: Optional comma-separated subset of fields to return
 
     Returns:
         Dictionary containing the requested show fields or an error message
     """
-    details = get_show_details(sid)
+    requested = parse_fields(fields, SHOW_DETAIL_FIELDS + list(SHOW_COMPUTED_FIELDS))
+    not_modified_response = await revalidate_document(
+        request, "show", get_show_db().find_show_by_id, sid, requested or ()
+    )
+    if not_modified_response is not None:
+        return not_modified_response
+
+    details = await run_db(get_show_details, sid, requested)
     if not details:
         raise HTTPException(status_code=404, detail="Show not found")
-    return JSONResponse(content=details)
+    return document_response(details, "show", sid, requested or ())
+
+
+@app.get("/api/v1/getShowDetails/{sid}/season/{season_number}")
+async def getshow_season(sid: int, season_number: int):
+    """
+    Get one season of a show with its episodes.
+
+    Args:
+        sid: The show ID to look up
+        season_number: The season to return
+
+    Returns:
+        The season with its episodes
+    """
+    season = await run_db(get_season_episodes, sid, season_number)
+    if season is None:
+        raise HTTPException(status_code=404, detail="Season not found")
+    return JSONResponse(content=season)
 
 
 @app.get("/api/v1/paginated/{media_type}")
@@ -171,6 +270,9 @@ async def get_paginated(
     sort_by: str = Query(
         "new", description="Sort by: new_release, most_rated, release_date"
     ),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor of the previous page; empty for the first page"
+    ),
 ):
     """
     Get paginated movie or show entries from the database.
@@ -180,11 +282,12 @@ async def get_paginated(
         page: Page number to retrieve (default: 1)
         items_per_page: Number of items per page (default: 20, max: 100)
         sort_by: Sorting method (default: "new_release")
+        cursor: Keyset cursor; when given, page is ignored
 
     Returns:
         Dictionary containing items and pagination metadata
     """
-    response = get_paginated_entries(media_type, page, items_per_page, sort_by)
+    response = await run_db(get_paginated_entries, media_type, page, items_per_page, sort_by, cursor)
 
     if "status" in response and response["status"] == "error":
         raise HTTPException(status_code=400, detail=response["message"])
@@ -192,7 +295,7 @@ async def get_paginated(
 
 
 @app.get("/api/v1/trending")
-async def get_trending_items():
+async def get_trending_items(request: Request):
     """
     Get the currently configured trending movies and shows.
 
@@ -201,8 +304,7 @@ async def get_trending_items():
     """
     try:
 
-        result = get_trending_entries()
-        return JSONResponse(content=result)
+        return trending_snapshot().response(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -226,15 +328,9 @@ async def search_media(media_type: str, query: str = Query(..., min_length=2)):
 
     try:
         if media_type == "movie":
-            from utils.db_utils.movie_db import MovieDatabase
-
-            db = MovieDatabase()
-            results = db.find_movies_by_title(query)
+            results = await run_db(lambda: get_movie_db().find_movies_by_title(query))
         else:
-            from utils.db_utils.show_db import ShowDatabase
-
-            db = ShowDatabase()
-            results = db.find_shows_by_title(query)
+            results = await run_db(lambda: get_show_db().find_shows_by_title(query))
 
         processed_results = []
         id_field = "mid" if media_type == "movie" else "sid"
@@ -292,12 +388,16 @@ async def update_trending(request: Request, token: str = Depends(token_query)):
         movie_ids = [int(mid) for mid in payload.get("movie", [])]
         show_ids = [int(sid) for sid in payload.get("show", [])]
 
-        config = ConfigDatabase()
-        save_result = config.save_trending_config(movie_ids, show_ids)
+        save_result = await run_db(
+            lambda: get_config_db().save_trending_config(movie_ids, show_ids)
+        )
 
         if save_result["status"] in ["inserted", "updated"]:
-            update_trending_cache()
-            result = get_trending_entries({"movie": movie_ids, "show": show_ids})
+            await run_db(update_trending_cache)
+            await run_db(refresh_snapshots)
+            result = await run_db(
+                get_trending_entries, {"movie": movie_ids, "show": show_ids}
+            )
             return JSONResponse(content={"status": "success", "data": result})
         else:
             raise Exception(
@@ -333,7 +433,7 @@ async def get_similar_media(
         raise HTTPException(status_code=400, detail="Must provide 1-2 genre keywords")
 
     try:
-        results = get_similar_by_genre(media_type, genres)
+        results = await run_db(get_similar_by_genre, media_type, genres)
         if not results:
             return JSONResponse(content=[])
         return JSONResponse(content=results)
@@ -367,7 +467,7 @@ async def search_all(
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
-@app.get("/api/v1/dl/{id}")
+@app.api_route("/api/v1/dl/{id}", methods=["GET", "HEAD"])
 async def stream_handler(
     request: Request,
     id: str,
@@ -385,6 +485,10 @@ async def stream_handler(
 ):
     """
     Stream movie or show content using JWT token authentication.
+
+    HEAD requests and small-range GET probes (e.g. bytes=0-1) are answered
+    from the file metadata index and the chunk cache when the file has been
+    seen before, without a Mongo lookup or Telegram media session.
     """
 
     if not token:
@@ -416,16 +520,21 @@ async def stream_handler(
 
         from utils.api.get_video import get_video_details
 
-        file_details = await get_video_details(
-            id, media_type, quality_index, season_number, episode_number
-        )
+        location_key = (id, media_type, quality_index, season_number, episode_number)
+        file_details = file_index.get_location(location_key)
+        if file_details is None:
+            file_details = await get_video_details(
+                id, media_type, quality_index, season_number, episode_number
+            )
+            file_index.set_location(location_key, file_details)
 
         msg_id = file_details["msg_id"]
         chat_id = f"{file_details['chat_id']}"
         file_hash = file_details["hash"]
 
         try:
-            return await media_streamer(request, int(chat_id), int(msg_id), file_hash)
+            identity = stream_identity(token, token_data, request.headers.get("x-forwarded-for"))
+            return await media_streamer(request, int(chat_id), int(msg_id), file_hash, identity)
         except TimeoutError:
 
             raise HTTPException(
@@ -445,106 +554,214 @@ async def stream_handler(
 # Also thanks to https://github.com/weebzone/Surf-TG for some optimizations
 
 
-async def media_streamer(request: Request, chat_id: int, id: int, secure_hash: str):
-    range_header = request.headers.get("Range", 0)
-
-    if not work_loads:
-        LOGGER.warning("No clients available in work_loads dictionary")
-
-    index = min(work_loads, key=work_loads.get)
-
-    faster_client = multi_clients[index]
-
-    if index not in multi_clients:
-        LOGGER.error(
-            f"Client index {index} found in work_loads but not in multi_clients"
-        )
-        raise HTTPException(
-            status_code=503, detail="Streaming client configuration error"
-        )
+async def cached_probe_part(meta: dict, range_header: Optional[str]) -> Optional[tuple]:
+    """The cached (offset, part) holding a probe's range, or None to stream it normally."""
+    if not chunk_cache or meta.get("media_id") is None:
+        return None
+    try:
+        probe = probe_range(parse_range_header(range_header, meta["file_size"]))
+    except RangeNotSatisfiable:
+        return None
+    if probe is None:
+        return None
+    return await chunk_cache.find_part(meta["media_id"], *probe)
+
+
+async def media_streamer(request: Request, chat_id: int, id: int, secure_hash: str, identity: Optional[tuple] = None):
+    range_header = request.headers.get("Range")
+    head_only = request.method == "HEAD"
+
+    # Probes are answered from the metadata index (and for GET the cached
+    # part holding the range) without touching a client
+    meta = file_index.get_meta(chat_id, id)
+    probe_part = None
+    if meta is not None and not head_only:
+        probe_part = await cached_probe_part(meta, range_header)
+    if meta is None or not (head_only or probe_part):
+        index = client_scheduler.pick(dc_id=client_scheduler.dc_hint(chat_id, id))
+
+        if index is None or index not in multi_clients:
+            LOGGER.error("No streaming clients available in multi_clients")
+            raise HTTPException(
+                status_code=503, detail="Streaming client configuration error"
+            )
 
-    LOGGER.debug(f"Client {index} is now serving {request.client.host}")
+        LOGGER.debug(f"Client {index} is now serving {request.client.host}")
 
-    if faster_client in class_cache:
-        tg_connect = class_cache[faster_client]["object"]
-        LOGGER.debug(f"Using cached ByteStreamer object for client {index}")
-    else:
-        LOGGER.debug(f"Creating new ByteStreamer object for client {index}")
-        tg_connect = ByteStreamer(faster_client)
-        class_cache[faster_client] = {"object": tg_connect, "timestamp": time.time()}
+        tg_connect = get_streamer(index)
 
-    LOGGER.debug("before calling get_file_properties")
-    try:
-        file_id = await tg_connect.get_file_properties(chat_id=chat_id, message_id=id)
-    except Exception as e:
-        LOGGER.error(f"Error getting file properties: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error retrieving file: {str(e)}")
+        LOGGER.debug("before calling get_file_properties")
+        try:
+            file_id = await tg_connect.get_file_properties(chat_id=chat_id, message_id=id)
+        except Exception as e:
+            LOGGER.error(f"Error getting file properties: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Error retrieving file: {str(e)}")
 
-    LOGGER.debug("after calling get_file_properties")
+        LOGGER.debug("after calling get_file_properties")
+        client_scheduler.remember_dc(chat_id, id, file_id.dc_id)
+        meta = file_index.remember(chat_id, id, file_id)
 
-    if file_id.unique_id[:6] != secure_hash:
+    if meta["unique_id"][:6] != secure_hash:
         LOGGER.debug(f"Invalid hash for message with ID {id}")
         raise InvalidHash
 
-    file_size = file_id.file_size
-    if range_header:
-        from_bytes, until_bytes = range_header.replace("bytes=", "").split("-")
-        from_bytes = int(from_bytes)
-        until_bytes = int(until_bytes) if until_bytes else file_size - 1
-    else:
-        from_bytes = 0
-        until_bytes = file_size - 1
-    if (until_bytes > file_size) or (from_bytes < 0) or (until_bytes < from_bytes):
+    file_size = meta["file_size"]
+    try:
+        ranges = parse_range_header(range_header, file_size)
+    except RangeNotSatisfiable:
         return StreamingResponse(
             content=(f"416: Range not satisfiable",),
             status_code=416,
             headers={"Content-Range": f"bytes */{file_size}"},
         )
-    chunk_size = min(1024 * 1024, max(1024, file_size // 10))
-    until_bytes = min(until_bytes, file_size - 1)
-
-    offset = from_bytes - (from_bytes % chunk_size)
-    first_part_cut = from_bytes - offset
-    last_part_cut = until_bytes % chunk_size + 1
 
-    req_length = until_bytes - from_bytes + 1
-    part_count = math.ceil(until_bytes / chunk_size) - math.floor(offset / chunk_size)
-    body = tg_connect.yield_file(
-        file_id, index, offset, first_part_cut, last_part_cut, part_count, chunk_size
-    )
-    mime_type = file_id.mime_type
-    file_name = file_id.file_name
+    mime_type = meta["mime_type"]
+    file_name = meta["file_name"]
     disposition = "inline"
 
-    if mime_type:
-        if not file_name:
-            try:
-                file_name = f"{secrets.token_hex(2)}.{mime_type.split('/')[1]}"
-            except (IndexError, AttributeError):
-                file_name = f"{secrets.token_hex(2)}.unknown"
+    headers = {
+        "Content-Disposition": f'{disposition}; filename="{file_name}"',
+        "Accept-Ranges": "bytes",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, HEAD, OPTIONS",
+        "Access-Control-Allow-Headers": "Range, Content-Type",
+    }
+
+    multipart = None
+    if ranges and len(ranges) > 1:
+        multipart = MultipartByteranges(ranges, file_size, f"{mime_type}")
+        headers["Content-Type"] = multipart.media_type
+        headers["Content-Length"] = str(multipart.content_length())
     else:
-        if file_name:
-            mime_type = mimetypes.guess_type(file_name)[0]
-        else:
-            mime_type = "application/octet-stream"
-            file_name = f"{secrets.token_hex(2)}.unknown"
-
-    return StreamingResponse(
-        status_code=206 if range_header else 200,
-        content=body,
-        headers={
-            "Content-Type": f"{mime_type}",
-            "Content-Range": f"bytes {from_bytes}-{until_bytes}/{file_size}",
-            "Content-Length": str(req_length),
-            "Content-Disposition": f'{disposition}; filename="{file_name}"',
-            "Accept-Ranges": "bytes",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, OPTIONS",
-            "Access-Control-Allow-Headers": "Range, Content-Type",
-        },
+        from_bytes, until_bytes = ranges[0] if ranges else (0, file_size - 1)
+        headers["Content-Type"] = f"{mime_type}"
+        headers["Content-Range"] = f"bytes {from_bytes}-{until_bytes}/{file_size}"
+        headers["Content-Length"] = str(until_bytes - from_bytes + 1)
+
+    status_code = 206 if ranges else 200
+    if head_only:
+        return Response(status_code=status_code, headers=headers)
+    if probe_part is not None:
+        part_offset, data = probe_part
+        body = bytes(memoryview(data)[from_bytes - part_offset:until_bytes - part_offset + 1])
+        return Response(content=body, status_code=status_code, headers=headers)
+
+    rtt, throughput = client_scheduler.measurements(index)
+
+    def stream_range(from_bytes: int, until_bytes: int):
+        chunk_size = choose_chunk_size(from_bytes, until_bytes, rtt, throughput)
+        offset, first_part_cut, last_part_cut, part_count = plan_parts(
+            from_bytes, until_bytes, chunk_size
+        )
+        return stream_with_failover(
+            get_streamer,
+            chat_id,
+            id,
+            index,
+            file_id,
+            offset,
+            first_part_cut,
+            last_part_cut,
+            part_count,
+            chunk_size,
+        )
+
+    lease = None
+    if identity is not None:
+        try:
+            lease = await stream_limiter.acquire(*identity)
+        except StreamLimitExceeded:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many concurrent streams",
+                headers={"Retry-After": str(stream_limiter.queue_timeout)},
+            )
+
+    if multipart:
+        body = multipart.body(stream_range)
+    else:
+        body = stream_range(from_bytes, until_bytes)
+    if lease is not None:
+        body = LimitedStream(body, lease)
+
+    return DirectStreamingResponse(status_code=status_code, content=body, headers=headers)
+
+
+def _client_gauge(field: str):
+    def collect():
+        now = time.monotonic()
+        for index in sorted(multi_clients):
+            yield (str(index),), client_scheduler.state(index).as_dict(now)[field]
+
+    return collect
+
+
+def _media_sessions():
+    for index, client in sorted(multi_clients.items()):
+        for dc_id in sorted(getattr(client, "media_sessions", {})):
+            yield (str(index), str(dc_id)), 1
+
+
+def _chunk_cache_stats():
+    for key, value in (chunk_cache.stats() if chunk_cache else {}).items():
+        yield (key,), value
+
+
+metrics.registry.gauge_func(
+    "reelnn_client_active_streams", "Streams currently served per client", ("client",), _client_gauge("active_streams"))
+metrics.registry.gauge_func(
+    "reelnn_client_throughput_bytes", "EWMA GetFile throughput per client", ("client",), _client_gauge("ewma_bps"))
+metrics.registry.gauge_func(
+    "reelnn_client_rtt_seconds", "EWMA GetFile round trip per client", ("client",), _client_gauge("ewma_rtt"))
+metrics.registry.gauge_func(
+    "reelnn_client_cooldown_seconds", "Remaining cooldown per client", ("client",), _client_gauge("cooldown_remaining"))
+metrics.registry.gauge_func(
+    "reelnn_media_session_up", "Media sessions held per client and DC", ("client", "dc"), _media_sessions)
+metrics.registry.gauge_func(
+    "reelnn_chunk_cache", "Chunk cache size and hit counters", ("stat",), _chunk_cache_stats)
+metrics.registry.gauge_func(
+    "reelnn_getfile_coalesced", "Coalesced GetFile calls", ("stat",),
+    lambda: (((key,), value) for key, value in inflight_chunks.stats().items()))
+metrics.registry.gauge_func(
+    "reelnn_file_properties_cache", "Resolved FileId cache size and hit counters", ("stat",),
+    lambda: (((key,), value) for key, value in file_properties_cache.stats().items()))
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics for the streaming path"""
+    return PlainTextResponse(
+        metrics.registry.render(), media_type="text/plain; version=0.0.4"
     )
 
 
+@app.get("/api/v1/scheduler")
+async def get_scheduler_state(token_data: dict = Depends(verify_token)):
+    """Show per-client throughput, load and cooldown state used for stream routing"""
+    return client_scheduler.snapshot()
+
+
+@app.get("/api/v1/indexes")
+async def get_index_usage(token_data: dict = Depends(verify_token)):
+    """Show how often each Mongo index has been used since the server started"""
+    return await run_db(index_usage_report)
+
+
+@app.get("/api/v1/streams")
+async def get_active_streams(token_data: dict = Depends(verify_token)):
+    """List throughput metrics for the streams currently being served"""
+    streams = [stats.as_dict() for stats in list(active_streams.values())]
+    return {
+        "streams": streams,
+        "count": len(streams),
+        "work_loads": work_loads,
+        "chunk_cache": chunk_cache.stats() if chunk_cache else None,
+        "inflight_chunks": inflight_chunks.stats(),
+        "file_properties_cache": file_properties_cache.stats(),
+        "stream_limiter": stream_limiter.stats(),
+    }
+
+
 def clean_cache():
     current_time = time.time()
     expired_keys = [
@@ -555,10 +772,11 @@ def clean_cache():
 
 
 @app.get("/login", response_class=HTMLResponse)
-async def login_page():
+async def login_page(request: Request):
     """Serve the login page."""
-    with open(templates_dir / "login.html") as f:
-        return HTMLResponse(content=f.read())
+    return precompressed_file_response(
+        templates_dir / "login.html", request.headers.get("accept-encoding"), media_type="text/html"
+    )
 
 
 @app.get("/api/v1/users")
@@ -569,8 +787,7 @@ async def get_users(
 ):
     """Get all users with pagination"""
     try:
-        user_db = UserDatabase()
-        users = user_db.get_all_users(skip=skip, limit=limit)
+        users = await run_db(lambda: get_user_db().get_all_users(skip=skip, limit=limit))
 
         if not isinstance(users, list):
             users = []
@@ -590,8 +807,7 @@ async def search_users(
 ):
     """Search users by username, first name, or user ID"""
     try:
-        user_db = UserDatabase()
-        users = user_db.search_users(query)
+        users = await run_db(lambda: get_user_db().search_users(query))
 
         if not isinstance(users, list):
             users = []
@@ -616,8 +832,7 @@ async def update_user(
         if "user_id" in payload:
             del payload["user_id"]
 
-        user_db = UserDatabase()
-        result = user_db.update_user(user_id, payload)
+        result = await run_db(lambda: get_user_db().update_user(user_id, payload))
 
         return result
     except Exception as e:
@@ -628,8 +843,7 @@ async def update_user(
 async def delete_user(user_id: int, token: str = Depends(token_query)):
     """Delete user"""
     try:
-        user_db = UserDatabase()
-        result = user_db.delete_user(user_id)
+        result = await run_db(lambda: get_user_db().delete_user(user_id))
 
         return result
     except Exception as e:
@@ -644,22 +858,23 @@ async def update_movie(
     try:
         payload = await request.json()
 
-        from utils.db_utils.movie_db import MovieDatabase
+        movie_db = get_movie_db()
 
-        movie_db = MovieDatabase()
-
-        existing_movie = movie_db.find_movie_by_id(movie_id)
+        existing_movie = await run_db(movie_db.find_movie_by_id, movie_id)
         if not existing_movie:
             raise HTTPException(status_code=404, detail="Movie not found")
 
         for field, value in payload.items():
             existing_movie[field] = value
 
-        result = movie_db.movies_collection.update_one(
-            {"mid": movie_id}, {"$set": payload}
+        result = await run_db(
+            movie_db.movies_collection.update_one,
+            {"mid": movie_id},
+            {"$set": {**payload, "updated_at": datetime.now(timezone.utc)}},
         )
 
         if result.modified_count > 0:
+            catalog_events.publish("movie", movie_id)
             return {"status": "success", "message": "Movie updated successfully"}
         else:
             return {"status": "no_changes", "message": "No changes made"}
@@ -703,7 +918,7 @@ async def check_user_endpoint(request: Request):
 
         from utils.api.checkUser import check_user
 
-        result = check_user(int(user_id))
+        result = await run_db(check_user, int(user_id))
         print(result)
 
         if result["status"] == "success":
@@ -727,22 +942,23 @@ async def update_show(
     try:
         payload = await request.json()
 
-        from utils.db_utils.show_db import ShowDatabase
-
-        show_db = ShowDatabase()
+        show_db = get_show_db()
 
-        existing_show = show_db.find_show_by_id(show_id)
+        existing_show = await run_db(show_db.find_show_by_id, show_id)
         if not existing_show:
             raise HTTPException(status_code=404, detail="Show not found")
 
         for field, value in payload.items():
             existing_show[field] = value
 
-        result = show_db.shows_collection.update_one(
-            {"sid": show_id}, {"$set": payload}
+        result = await run_db(
+            show_db.shows_collection.update_one,
+            {"sid": show_id},
+            {"$set": {**payload, "updated_at": datetime.now(timezone.utc)}},
         )
 
         if result.modified_count > 0:
+            catalog_events.publish("show", show_id)
             return {"status": "success", "message": "Show updated successfully"}
         else:
             return {"status": "no_changes", "message": "No changes made"}
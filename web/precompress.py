@@ -0,0 +1,149 @@
+"""
+Build-time compression of the web assets.
+
+Writes .gz (and, with the optional brotli package, .br) files next to
+every compressible file in web/static and web/templates, at the highest
+compression levels since this only runs once per build:
+
+    python -m web.precompress
+
+Neither this module nor the web package loads config at import time, so
+the build step runs without the bot's environment variables. web.main also
+calls precompress_assets when the server starts, which only touches files
+whose compressed copies are missing or older than the original.
+"""
+import gzip
+import mimetypes
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+WEB_DIR = Path(__file__).resolve().parent
+ASSET_DIRS = (WEB_DIR / "static", WEB_DIR / "templates")
+
+COMPRESSIBLE_SUFFIXES = {".html", ".js", ".mjs", ".css", ".json", ".svg", ".txt", ".map", ".xml"}
+# Small files gain nothing from compression
+MIN_SIZE = 512
+
+# Content-Encoding by file extension of the compressed copy, preferred first
+ENCODINGS: List[Tuple[str, str]] = [("br", ".br"), ("gzip", ".gz")] if brotli is not None else [("gzip", ".gz")]
+
+
+def _compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _is_stale(original: Path, compressed: Path) -> bool:
+    return not compressed.exists() or compressed.stat().st_mtime < original.stat().st_mtime
+
+
+def precompress_file(path: Path) -> List[Path]:
+    """Write the missing or outdated compressed copies of `path`."""
+    if path.suffix not in COMPRESSIBLE_SUFFIXES or path.stat().st_size < MIN_SIZE:
+        return []
+    written = []
+    data = None
+    for encoding, suffix in ENCODINGS:
+        target = path.with_name(path.name + suffix)
+        if not _is_stale(path, target):
+            continue
+        if data is None:
+            data = path.read_bytes()
+        compressed = _compress(data, encoding)
+        if len(compressed) >= len(data):
+            continue
+        # Write then rename, so a concurrently starting worker never serves a partial file
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(compressed)
+        os.replace(tmp, target)
+        written.append(target)
+    return written
+
+
+def precompress_assets(directories: Iterable[Path] = ASSET_DIRS) -> List[Path]:
+    """Precompress every asset under `directories`, returning the files written."""
+    written = []
+    for directory in directories:
+        if not directory.is_dir():
+            continue
+        for path in sorted(directory.rglob("*")):
+            if path.is_file():
+                written.extend(precompress_file(path))
+    return written
+
+
+def precompressed_variant(path: Path, accept_encoding: Optional[str]) -> Optional[Tuple[Path, str]]:
+    """
+    Up-to-date compressed copy of `path` the client accepts.
+
+    Returns:
+        (compressed file, Content-Encoding) or None to serve the original
+    """
+    # Imported here: utils.precompressed loads config, which needs the runtime
+    # environment, while the build step only calls precompress_assets
+    from utils.precompressed import choose_encoding
+
+    available = {}
+    for encoding, suffix in ENCODINGS:
+        candidate = path.with_name(path.name + suffix)
+        if candidate.exists() and not _is_stale(path, candidate):
+            available[encoding] = candidate
+    encoding = choose_encoding(accept_encoding, available)
+    if encoding is None:
+        return None
+    return available[encoding], encoding
+
+
+def precompressed_file_response(path: Path, accept_encoding: Optional[str], media_type: Optional[str] = None, **kwargs) -> Response:
+    """FileResponse for `path`, sending a compressed copy when the client accepts one."""
+    media_type = media_type or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    variant = precompressed_variant(path, accept_encoding)
+    headers = {"Vary": "Accept-Encoding"} if path.suffix in COMPRESSIBLE_SUFFIXES else {}
+    if variant is None:
+        return FileResponse(path, media_type=media_type, headers=headers, **kwargs)
+    compressed, encoding = variant
+    headers["Content-Encoding"] = encoding
+    return FileResponse(compressed, media_type=media_type, headers=headers, **kwargs)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that sends the .br/.gz copy of a file when the client accepts it."""
+
+    def file_response(self, full_path, stat_result, scope: Scope, status_code: int = 200) -> Response:
+        path = Path(full_path)
+        request_headers = Headers(scope=scope)
+        variant = precompressed_variant(path, request_headers.get("accept-encoding"))
+        if variant is None:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            if path.suffix in COMPRESSIBLE_SUFFIXES:
+                response.headers["Vary"] = "Accept-Encoding"
+            return response
+
+        # Same as StaticFiles.file_response, but typed as the original file
+        compressed, encoding = variant
+        response = FileResponse(
+            compressed,
+            status_code=status_code,
+            stat_result=os.stat(compressed),
+            media_type=mimetypes.guess_type(path.name)[0],
+            headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+if __name__ == "__main__":
+    for written in precompress_assets():
+        print(written.relative_to(WEB_DIR))